@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import sys
+import argparse
+import os
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+from utapi.common.utrc import UtrcType
+from utapi.common import crc16
+
+
+def legacy_pack(utrc):
+    buf = bytes([utrc.master_id])
+    buf += bytes([utrc.slave_id])
+    buf += bytes([((utrc.state & 0x01) << 7) + (utrc.len & 0x7F)])
+    buf += bytes([((utrc.rw & 0x01) << 7) + (utrc.cmd & 0x7F)])
+    for i in range(utrc.len - 1):
+        buf += bytes([utrc.data[i]])
+    buf += crc16.crc_modbus(buf)
+    return buf
+
+
+def legacy_unpack(utrc, buf):
+    utrc.buf = buf
+    if len(buf) < 6:
+        return -1
+    utrc.len = buf[2] & 0x7F
+    if utrc.len + 5 != len(buf):
+        return -1
+    utrc.master_id = buf[0]
+    utrc.slave_id = buf[1]
+    utrc.state = (buf[2] & 0x80) >> 7
+    utrc.rw = (buf[3] & 0x80) >> 7
+    utrc.cmd = buf[3] & 0x7F
+    data_len = utrc.len - 1
+    for i in range(data_len):
+        utrc.data[i] = buf[4 + i]
+    utrc.crc = [buf[data_len + 4], buf[data_len + 5]]
+    return 0
+
+
+if __name__ == '__main__':
+    u"""This is a micro-benchmark of the UTRC frame codec
+    run command:
+        python3 example/bench/bench01_utrc_codec.py --len 29 --num 20000
+    """
+    parser = argparse.ArgumentParser()
+    parser.description = 'UTRC codec benchmark'
+    parser.add_argument("--len", help="frame len field (1-126)", default=29, type=int)
+    parser.add_argument("--num", help="number of iterations", default=20000, type=int)
+    args = parser.parse_args()
+
+    tx = UtrcType()
+    tx.master_id = 0xAA
+    tx.slave_id = 0x55
+    tx.len = args.len
+    tx.rw = 1
+    tx.cmd = 0x31
+    tx.data[0:args.len - 1] = [i & 0xFF for i in range(args.len - 1)]
+
+    frame = bytes(tx.pack())
+    if frame != legacy_pack(tx):
+        print("error: frames are not byte-identical")
+        sys.exit(1)
+
+    rx = UtrcType()
+    rx_old = UtrcType()
+    t_old_pack = timeit.timeit(lambda: legacy_pack(tx), number=args.num)
+    t_new_pack = timeit.timeit(tx.pack, number=args.num)
+    t_old_unpack = timeit.timeit(lambda: legacy_unpack(rx_old, frame), number=args.num)
+    t_new_unpack = timeit.timeit(lambda: rx.unpack(frame), number=args.num)
+
+    print("frame len: %d bytes, iterations: %d" % (len(frame), args.num))
+    print("pack  : legacy %8.3f us, struct %8.3f us, speedup %5.2fx" %
+          (t_old_pack / args.num * 1e6, t_new_pack / args.num * 1e6, t_old_pack / t_new_pack))
+    print("unpack: legacy %8.3f us, struct %8.3f us, speedup %5.2fx" %
+          (t_old_unpack / args.num * 1e6, t_new_unpack / args.num * 1e6, t_old_unpack / t_new_unpack))
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import sys
+import argparse
+import os
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+from utapi.common import crc16
+
+
+def legacy_crc_modbus(data):
+    leng = len(data)
+    init_crch = 0xFF
+    init_crcl = 0xFF
+    i = 0
+    while leng > 0:
+        index = init_crch ^ data[i]
+        i += 1
+        init_crch = init_crcl ^ crc16.CRC_TABLE_H[index]
+        init_crcl = crc16.CRC_TABLE_L[index]
+        leng -= 1
+    crc16_val = init_crch << 8 | init_crcl
+    crc = bytes([crc16_val // 256 % 256])
+    crc += bytes([crc16_val % 256])
+    return crc
+
+
+def mbps(func, data, num):
+    t = timeit.timeit(lambda: func(data), number=num)
+    return len(data) * num / t / 1e6
+
+
+if __name__ == '__main__':
+    u"""This is a throughput benchmark of the modbus crc16 backends
+    run command:
+        python3 example/bench/bench02_crc16.py --len 64 --num 20000
+    """
+    parser = argparse.ArgumentParser()
+    parser.description = 'CRC16 benchmark'
+    parser.add_argument("--len", help="bytes per call", default=64, type=int)
+    parser.add_argument("--num", help="number of iterations", default=20000, type=int)
+    args = parser.parse_args()
+
+    data = bytes([i & 0xFF for i in range(args.len)])
+    if crc16.crc_modbus(data) != legacy_crc_modbus(data):
+        print("error: crc mismatch")
+        sys.exit(1)
+
+    print("backend: %s, %d bytes per call, iterations: %d" % (crc16.CRC16_BACKEND, args.len, args.num))
+    print("legacy two-table : %8.3f MB/s" % mbps(legacy_crc_modbus, data, args.num))
+    print("single-table     : %8.3f MB/s" % mbps(crc16.crc16_modbus_py, data, args.num))
+    print("crc_modbus       : %8.3f MB/s" % mbps(crc16.crc_modbus, data, args.num))
+    print("memoryview input : %8.3f MB/s" % mbps(crc16.crc_modbus, memoryview(bytearray(data)), args.num))
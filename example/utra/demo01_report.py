@@ -7,7 +7,6 @@
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
 
-import time
 import sys
 import argparse
 import os
@@ -37,9 +36,9 @@ if __name__ == '__main__':
     elif args.m == 3:
         ubot = UtraReportConfig10Hz(args.ip)
 
+    sub = ubot.subscribe()
     while 1:
-        time.sleep(0.001)
-        if ubot.is_update():
+        if sub.wait_next(1):
             ubot.print_data()
 """
 python3 example/utra/demo01_report.py --ip 192.168.1.xxx --m 1
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2021 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import sys
+import argparse
+import asyncio
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+from utapi.utra.utra_api_async import AsyncUtraApi
+
+
+async def main(ip):
+    ubot = await AsyncUtraApi.connect(ip)
+    if ubot.is_err():
+        print("connect failed")
+        return
+
+    ret, uuid = await ubot.get_uuid()
+    print("get_uuid       : %d, uuid    = %s" % (ret, uuid))
+
+    # independent reads are in flight at the same time
+    (ret1, joint), (ret2, pose), (ret3, num) = await asyncio.gather(
+        ubot.get_joint_target_pos(), ubot.get_tcp_target_pos(), ubot.get_cmd_num())
+    print("get_joint_target_pos: %d, joint = %s" % (ret1, joint))
+    print("get_tcp_target_pos  : %d, pose  = %s" % (ret2, pose))
+    print("get_cmd_num         : %d, num   = %d" % (ret3, num))
+    ubot.close()
+
+
+if __name__ == '__main__':
+    u"""This is a demo of the asyncio api
+    run command:
+        python3 example/utra/demo12_async_api.py --ip 192.168.1.xxx
+    """
+    parser = argparse.ArgumentParser()
+    parser.description = 'UTRA demo'
+    parser.add_argument("--ip", help=" ", default="127.0.0.1", type=str)
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main(args.ip))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import math
+import sys
+import argparse
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+from utapi.utra.utra_api_tcp import UtraApiTcp
+from utapi.utra.utra_report_status import UtraReportStatus100Hz
+from utapi.utra.utra_servo_streamer import ServoTrajectoryStreamer
+
+
+if __name__ == '__main__':
+    u"""This is a demo of streaming a long servo trajectory in joint space.
+    The streamer keeps the instruction cache of the controller at a fixed depth using the 100Hz status report,
+    so there is no need to guess sleeps between moveto_joint_servo calls.
+    run command:
+        python3 example/utra/demo13_servo_stream.py --ip 192.168.1.xxx
+    """
+    parser = argparse.ArgumentParser()
+    parser.description = 'UTRA demo'
+    parser.add_argument("--ip", help=" ", default="127.0.0.1", type=str)
+    args = parser.parse_args()
+
+    ubot = UtraApiTcp(args.ip)
+    report = UtraReportStatus100Hz(args.ip)
+
+    ret = ubot.reset_err()  # Reset error
+    print("reset_error   :%d" % (ret))
+    ret = ubot.set_motion_mode(0)  # Set the operating mode of the arm, 0: position control mode
+    print("set_motion_mode   :%d" % (ret))
+    ret = ubot.set_motion_enable(8, 1)  # Set the enable state of the arm
+    print("set_motion_enable :%d" % (ret))
+    ret = ubot.set_motion_status(0)  # Set the running status of the arm, 0: Set to ready
+    print("set_motion_status :%d" % (ret))
+
+    speed = 30 / 57.296
+    acc = 3
+    ret = ubot.moveto_home_p2p(speed, acc, 0)
+    print("moveto_home_p2p  :%d" % (ret))
+
+    # 10 seconds of a sine on joint 1 at 100 frames per second
+    joints = []
+    for i in range(1000):
+        joint = [0.0] * 6
+        joint[0] = 0.5 * math.sin(2 * math.pi * i / 500.0)
+        joints.append(joint)
+
+    streamer = ServoTrajectoryStreamer(ubot, report, depth=16)
+    ret = streamer.stream(joints, 0.01)
+    print("stream  :%d, frames: %d, packets: %d" % (ret, streamer.sent_frames, streamer.sent_packets))
@@ -37,6 +37,10 @@ setup(
     packages=find_packages(),
     python_requires='>=3.5, <4',
     install_requires=requirements,
+    extras_require={
+        "crc": ["crcmod"],
+        "numpy": ["numpy"],
+    },
     license="MIT",
     zip_safe=False,
 )
@@ -28,6 +28,63 @@ class AdraApiBase(_ServoApiBase):
         """
         return self._connect_to_id(id, virtual_id)
 
+    def set_timeout(self, timeout_s=1, adaptive=False, retries=0):
+        u"""Sets how long the api waits for the reply of the actuator.
+        With adaptive=True a read waits for the retransmission timeout estimated from the measured round trip times
+        (like TCP, at least 10ms), so a lost packet on UDP costs milliseconds instead of timeout_s.
+        Writes always wait timeout_s and are never retransmitted.
+
+        Args:
+            timeout_s (float, optional): Timeout of the replies [s], the upper limit of the adaptive timeout.
+                Defaults to 1.
+            adaptive (bool, optional): Reads use the estimated timeout. Defaults to False.
+            retries (int, optional): Times a read without reply is sent again. Defaults to 0.
+
+        Returns:
+            ret (int): Function execution result code, refer to appendix for code meaning.
+        """
+        return self._set_timeout(timeout_s, adaptive, retries)
+
+    def get_rtt_stats(self):
+        u"""Gets the round trip time statistics of the reads of this connection.
+
+        Returns:
+            stats (dict): srtt, rttvar and rto [s], the number of samples, timeouts and retransmits.
+        """
+        return self.rtt.stats()
+
+    def set_param_cache(self, enable=True):
+        u"""Turns the parameter cache on or off.
+        With the cache the getters of the configuration parameters (ratios, limits, pid, smoothing periods,
+        brake delay) ask the actuator only once, later reads return the cached value without bus traffic.
+        A successful setter stores its value in the cache. reset_err, erase_parm, restart_driver and set_com_id
+        drop the cached values of the actuator. Changes made by another connection are not seen, see refresh_param_cache.
+
+        Args:
+            enable (bool, optional): Turn the cache on. Defaults to True.
+
+        Returns:
+            ret (int): Function execution result code, refer to appendix for code meaning.
+        """
+        return self._set_param_cache(enable)
+
+    def refresh_param_cache(self):
+        u"""Reads all cached parameters of the actuator again.
+
+        Returns:
+            ret (int): Function execution result code of the first failed read, refer to appendix for code meaning.
+        """
+        return self._refresh_param_cache()
+
+    def get_param_cache_stats(self):
+        u"""Gets the statistics of the parameter cache.
+
+        Returns:
+            stats (dict): hits, misses, hit_rate, entries and dirty, None if the cache is off.
+                dirty is a list of (id, register name) set since the last saved_parm, a reboot would lose them.
+        """
+        return self._get_param_cache_stats()
+
     ############################################################
     #                       Basic Api
     ############################################################
@@ -500,6 +557,27 @@ class AdraApiBase(_ServoApiBase):
         """
         return self._get_error_code()
 
+    def read_many(self, names, timeout_s=1, window=1):
+        u"""Read several registers of the actuator in one batch.
+        By default the requests are sent one at a time, the RS485/CAN bus is half-duplex also behind an EtherNet module.
+        If the bus or module can queue requests, a larger window sends them back-to-back and collects the replies
+        afterwards, so a sweep costs about one round trip instead of one per register.
+
+            ret, values = adra.read_many(["TEMP_DRIVER", "TEMP_MOTOR", "BUS_VOLT", "BUS_CURR", "ERROR_CODE"])
+
+        Args:
+            names (list): Names of SERVO_REG registers, such as "TEMP_DRIVER".
+            timeout_s (float, optional): Timeout of each reply in seconds. Defaults to 1.
+            window (int, optional): Maximum number of requests on the bus at the same time,
+                0 sends all of them at once. Only use more than 1 if the bus or EtherNet module queues requests.
+                Defaults to 1.
+
+        Returns:
+            ret (int): Function execution result code of the first register that failed, 0 if all succeeded.
+            values (dict): {name: value}, decoded as the get_xxx api of the register, None if it failed.
+        """
+        return self._read_many(names, timeout_s, window)
+
     ############################################################
     #                       Position Api
     ############################################################
@@ -1151,14 +1229,16 @@ class AdraApiBase(_ServoApiBase):
         """
         return self._get_spostau_current()
 
-    def get_cpostau_current(self, sid, eid):
+    def get_cpostau_current(self, sid, eid, timeout_s=1):
         u"""Broadcast mode (one packet) gets multiple actuator current position,
         current torque, and number of write broadcasts received.
         At the same time, the number of received broadcast write commands is cleared to zero.
+        The replies are matched to the actuators by ID, a missing actuator only costs the deadline once.
 
         Args:
             sid (int): ID of the first actuator.
             eid (int): ID of the last actuator.
+            timeout_s (float, optional): Deadline for the replies of all actuators. Defaults to 1.
 
         Returns:
             ret (list): Function execution result code, refer to appendix for code meaning,
@@ -1167,16 +1247,18 @@ class AdraApiBase(_ServoApiBase):
             tau (list): Current torque of actuators, in ascending order of ID number.
             num (list): Cnumber of write broadcasts received, in ascending order of ID number.
         """
-        return self._get_cpostau_current(sid, eid)
+        return self._get_cpostau_current(sid, eid, timeout_s)
 
-    def get_cpvt_current(self, sid, eid):
+    def get_cpvt_current(self, sid, eid, timeout_s=1):
         u"""Broadcast mode (one packet) gets multiple actuator current position, velocity,
         torque, and number of write broadcasts received.
         At the same time, the number of received broadcast write commands is cleared to zero.
+        The replies are matched to the actuators by ID, a missing actuator only costs the deadline once.
 
         Args:
             sid (int): ID of the first actuator.
             eid (int): ID of the last actuator.
+            timeout_s (float, optional): Deadline for the replies of all actuators. Defaults to 1.
 
         Returns:
             ret (list): Function execution result code, refer to appendix for code meaning,
@@ -1186,7 +1268,42 @@ class AdraApiBase(_ServoApiBase):
             tau (list): Current torque of actuators, in ascending order of ID number.
             num (list): Cnumber of write broadcasts received, in ascending order of ID number.
         """
-        return self._get_cpvt_current(sid, eid)
+        return self._get_cpvt_current(sid, eid, timeout_s)
+
+    def get_cpostau_current_array(self, sid, eid, timeout_s=1):
+        u"""The same as get_cpostau_current, but returns numpy arrays indexed by ID - sid.
+        Requires numpy.
+
+        Args:
+            sid (int): ID of the first actuator.
+            eid (int): ID of the last actuator.
+            timeout_s (float, optional): Deadline for the replies of all actuators. Defaults to 1.
+
+        Returns:
+            valid (ndarray): bool, True for the actuators that answered.
+            num (ndarray): Number of write broadcasts received, 0 if not valid.
+            pos (ndarray): Current position of actuators, 0 if not valid.
+            tau (ndarray): Current torque of actuators, 0 if not valid.
+        """
+        return self._get_cpostau_current_array(sid, eid, timeout_s)
+
+    def get_cpvt_current_array(self, sid, eid, timeout_s=1):
+        u"""The same as get_cpvt_current, but returns numpy arrays indexed by ID - sid.
+        Requires numpy.
+
+        Args:
+            sid (int): ID of the first actuator.
+            eid (int): ID of the last actuator.
+            timeout_s (float, optional): Deadline for the replies of all actuators. Defaults to 1.
+
+        Returns:
+            valid (ndarray): bool, True for the actuators that answered.
+            num (ndarray): Number of write broadcasts received, 0 if not valid.
+            pos (ndarray): Current position of actuators, 0 if not valid.
+            vel (ndarray): Current velocity of actuators, 0 if not valid.
+            tau (ndarray): Current torque of actuators, 0 if not valid.
+        """
+        return self._get_cpvt_current_array(sid, eid, timeout_s)
 
     ############################################################
     #                      Production Api
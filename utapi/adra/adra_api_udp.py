@@ -9,9 +9,8 @@
 from utapi.common.utrc import UtrcType, UtrcClient
 from utapi.common.utcc import UtccType, UtccClient
 from utapi.common.socket_udp import SocketUDP
+from utapi.common.net_reset import connect_ready, reset_net
 from utapi.adra.adra_api_base import AdraApiBase
-import time
-import socket
 
 
 class AdraApiUdp(AdraApiBase):
@@ -30,7 +29,7 @@ class AdraApiUdp(AdraApiBase):
                     2. If connection type is UDP and DataLink is not connected to TCP after being powered on, you do not need to reset.
                     3. If connection type is TCP and DataLink is connected to TCP or UDP after being powered on, reset is required.
                     4. If connection type is TCP and DataLink is not connected to TCP or UDP after being powered on, you do not need to reset.
-                    Note: In any case, it is good to use reset, but the initialization time is about 3 seconds longer than that without reset.
+                    Note: In any case, it is good to use reset, the initialization waits until the module answers again after the reset.
                     Note: After DataLink is powered on and connected to USB, it needs to be powered on again to connect to TCP or UDP.
             tcp_port (int, optional): TCP port of EtherNet module. The default value is 6001.
             baud (int, optional): Set the baud rate of the EtherNet to RS485/CAN module to be the same as that of the actuator.
@@ -52,7 +51,7 @@ class AdraApiUdp(AdraApiBase):
                 self._reset_net_can(ip, tcp_port, port)
             self.socket_fp.flush()
             self.bus_client = UtccClient(self.socket_fp)
-            ret = self.bus_client.connect_device(baud)
+            ret = connect_ready(self.bus_client, baud, is_reset)
             if ret != 0:
                 self.__is_err = 1
                 print(self.DB_FLG + "Error: connect_device: ret = ", ret)
@@ -66,7 +65,7 @@ class AdraApiUdp(AdraApiBase):
                 self._reset_net_rs485(ip, tcp_port, port)
             self.socket_fp.flush()
             self.bus_client = UtrcClient(self.socket_fp)
-            ret = self.bus_client.connect_device(baud)
+            ret = connect_ready(self.bus_client, baud, is_reset)
             if ret != 0:
                 self.__is_err = 1
                 print(self.DB_FLG + "Error: connect_device: ret = ", ret)
@@ -93,24 +92,8 @@ class AdraApiUdp(AdraApiBase):
         tx_utrc.cmd = 0x7F
         tx_utrc.data[0:8] = [0x7F, 0x7F, 0x7F, 0x7F, 0x7F, 0x7F, 0x7F]
         buf = tx_utrc.pack()
-        try:
-            print(self.DB_FLG + "Reset Net Step1: connect to tcp")
-            fp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            fp.connect((ip, tcp_port))
-            fp.send(buf)
-        except Exception as err:
-            print(err)
-        time.sleep(0.1)
-
-        try:
-            print(self.DB_FLG + "Reset Net Step2: connect to udp")
-            addr = (ip, udp_port)
-            fp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            fp.sendto(buf, addr)
-        except Exception as err:
-            print(err)
+        reset_net(ip, tcp_port, udp_port, buf, self.DB_FLG)
         self.__is_err = 0
-        time.sleep(3)
 
     def _reset_net_can(self, ip, tcp_port, udp_port):
         tx_utcc = UtccType()
@@ -122,22 +105,5 @@ class AdraApiUdp(AdraApiBase):
         tx_utcc.cmd = 0x7F
         tx_utcc.data[0:8] = [0x7F, 0x7F, 0x7F, 0x7F, 0x7F, 0x7F, 0x7F]
         buf = tx_utcc.pack()
-
-        try:
-            print(self.DB_FLG + "Reset Net Step1: connect to tcp")
-            fp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            fp.connect((ip, tcp_port))
-            fp.send(buf)
-        except Exception as err:
-            print(err)
-        time.sleep(0.1)
-
-        try:
-            print(self.DB_FLG + "Reset Net Step2: connect to udp")
-            addr = (ip, udp_port)
-            fp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            fp.sendto(buf, addr)
-        except Exception as err:
-            print(err)
+        reset_net(ip, tcp_port, udp_port, buf, self.DB_FLG)
         self.__is_err = 0
-        time.sleep(3)
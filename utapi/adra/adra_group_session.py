@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import logging
+import struct
+import threading
+import time
+
+from utapi.base.servo_reg import SERVO_REG
+from utapi.common import crc16
+from utapi.common.utrc import UTRC_RW
+
+
+class GroupControlSession:
+    # mode: (register, number of values of each actuator)
+    MODES = {
+        "pos": (SERVO_REG.CPOS_TARGET, 1),
+        "vel": (SERVO_REG.CVEL_TARGET, 1),
+        "tau": (SERVO_REG.CTAU_TARGET, 1),
+        "postau": (SERVO_REG.CPOSTAU_TARGET, 2),
+        "posvel": (SERVO_REG.CPOSVEL_TARGET, 2),
+    }
+
+    def __init__(self, adra, sid, eid, mode="pos"):
+        """Broadcast control of the actuators sid..eid at a fixed rate.
+        The broadcast frame is built once, each set_target() only packs the floats and the crc into it,
+        and the id of the adra connection is not changed.
+
+            session = GroupControlSession(adra, 1, 12, "pos")
+            session.set_target(pos)               # sends at once
+            session.start(0.001)                  # or sends the latest target every 1ms
+            session.set_target(pos)
+            session.stop()
+
+        Args:
+            adra (AdraApiBase): Connection of the bus, any of AdraApiSerial/Tcp/Udp/File
+            sid (int): ID of the first actuator
+            eid (int): ID of the last actuator
+            mode (string, optional): "pos", "vel", "tau", "postau" or "posvel". Defaults to "pos".
+        """
+        if mode not in self.MODES:
+            raise ValueError("[GroupSes] unknown mode: %s" % mode)
+        self.DB_FLG = "[GroupSes] "
+        self.adra = adra
+        self.sid = sid
+        self.eid = eid
+        self.mode = mode
+        self.num = eid - sid + 1
+        self.sent_frames = 0
+        self.overruns = 0
+
+        reg, per_axis = self.MODES[mode]
+        self.per_axis = per_axis
+        count = self.num * per_axis
+        tx = type(adra.tx_data)()
+        tx.id = 0x55
+        tx.slave_id = 0x55
+        tx.rw = UTRC_RW.W
+        tx.cmd = reg[0]
+        tx.len = 2 + 4 * count + 1
+        tx.data[0] = sid
+        tx.data[1] = eid
+        self.frame = bytearray(tx.pack())
+        self.__view = memoryview(self.frame)
+        self.__end = len(self.frame) - 2
+        self.__offset = self.__end - 4 * count
+        self.__struct = struct.Struct(">%df" % count)
+        self.__values = [0.0] * count
+
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__running = False
+
+    def set_target(self, values, values2=None):
+        """Sets the target of all actuators, sends it at once if start() was not called
+
+        Args:
+            values (list): pos, vel or tau of the actuators in ascending order of ID, a list, tuple or ndarray
+            values2 (list, optional): tau of the "postau" mode or vel of the "posvel" mode. Defaults to None.
+
+        Returns:
+            ret (int): meaningless.
+        """
+        if self.per_axis == 1:
+            datas = values[0:self.num]
+        else:
+            datas = self.__values
+            datas[0::2] = values[0:self.num]
+            datas[1::2] = values2[0:self.num]
+
+        with self.__lock:
+            self.__struct.pack_into(self.frame, self.__offset, *datas)
+            self.frame[self.__end:] = crc16.crc_modbus(self.__view[:self.__end])
+        if not self.__running:
+            self.__send()
+        return 0
+
+    def __send(self):
+        with self.__lock:
+            buf = bytes(self.frame)
+        # holds the mutex of the connection, so the broadcast does not cut into a request and its reply
+        with self.adra.mutex:
+            if self.adra.is_err():
+                return
+            self.adra.socket_fp.write(buf)
+        self.sent_frames += 1
+
+    def start(self, period_s):
+        """Starts a thread that sends the latest target every period_s.
+        It sleeps until about 1ms before each deadline and spins for the rest (releasing the GIL),
+        so the period does not drift with the sleep resolution of the os.
+        A period missed completely is counted in overruns, a caller that never releases the GIL causes them.
+
+        Args:
+            period_s (float): Send period [s], such as 0.001 for 1kHz
+        """
+        self.stop()
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__send_proc, args=(period_s,))
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self):
+        """Stops the sender thread of start()"""
+        self.__running = False
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __send_proc(self, period_s):
+        logging.info(self.DB_FLG + "send thread start, period: %.6fs" % period_s)
+        next_t = time.perf_counter()
+        while self.__running:
+            self.__send()
+            next_t += period_s
+            now = time.perf_counter()
+            if now - next_t > period_s:
+                self.overruns += 1
+                next_t = now
+                continue
+            if next_t - now > 0.002:
+                time.sleep(next_t - now - 0.001)
+            while time.perf_counter() < next_t:
+                time.sleep(0)
+        logging.info(self.DB_FLG + "send thread exit")
@@ -6,23 +6,38 @@
 #
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
+import collections
 import logging
 import threading
+import time
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utapi.base.arm_kinematics import ArmKinematics
 from utapi.base.arm_reg import ARM_REG, RS485_LINE
 from utapi.base.gpio_reg import GPIO_REG
 from utapi.common import hex_data
-from utapi.common.utrc import UTRC_RW, UTRC_RX_ERROR, UtrcClient, UtrcType
+from utapi.common.lru_cache import LruCache
+from utapi.common.param_cache import ParamCache
+from utapi.common.utrc import UTRC_RW, UTRC_RX_ERROR, UtrcClient, UtrcFuture, UtrcType
 
 
 class _ArmApiBase:
-    def __init__(self, socket_fp, id=0x55):
+    def __init__(self, socket_fp, id=0x55, pipeline=None):
+        self._init_link(socket_fp, id, pipeline)
+        ret, axis = self.get_axis()
+        self._init_axis(ret, axis)
+
+    def _init_link(self, socket_fp, id, pipeline):
         self.DB_FLG = "[UbotApi ] "
         self.__is_err = 0
 
         self.socket_fp = socket_fp
         self.socket_fp.flush()
-        self.utrc_client = UtrcClient(self.socket_fp)
+        self.utrc_client = UtrcClient(self.socket_fp, pipeline)
         self.mutex = threading.Lock()
 
         self.tx_data = UtrcType()
@@ -32,14 +47,23 @@ class _ArmApiBase:
 
         self.tgpio_id = 1
         self.cgpio_id = 1
-        self.__AXIS = 6
-        self.reg = ARM_REG(self.__AXIS)
-
-        ret, axis = self.get_axis()
-
+        self._AXIS = 6
+        self.reg = ARM_REG(self._AXIS)
+        self._kin_cache = None
+        self._kin_resolution = 1e-4
+        self.param_cache = None
+
+        # queue commands without waiting for the ack, see set_que_no_wait
+        self._que_no_wait = False
+        self._que_callback = None
+        self._que_cond = threading.Condition()
+        self._que_stats = {"sent": 0, "acked": 0, "errors": 0, "last_error": 0}
+        self._que_pending = collections.deque()
+
+    def _init_axis(self, ret, axis):
         if ret == UTRC_RX_ERROR.STATE or ret == 0:
-            self.__AXIS = axis
-            self.reg = ARM_REG(self.__AXIS)
+            self._AXIS = axis
+            self.reg = ARM_REG(self._AXIS)
         else:
             logging.error("[UbotApi ] Error: __init__ get_axis, ret: %d" % ret)
             self.__is_err = 1
@@ -50,95 +74,346 @@ class _ArmApiBase:
             self.socket_fp.close()
             logging.info("[UbotApi ] ubot api close")
 
-    def __send(self, rw, cmd, cmd_data):
-        if self.__is_err:
-            return 0
-
+    def _submit(self, rw, cmd, cmd_data, timeout_s=1):
         if rw == UTRC_RW.R:
             data_wlen = cmd[1]
+            data_rlen = cmd[2]
         else:
             data_wlen = cmd[3]
+            data_rlen = cmd[4]
+
+        self.mutex.acquire()
+        if self.__is_err:
+            future = UtrcFuture(self.tx_data, data_rlen, 0)
+            future.set_result(-999, self.tx_data)
+            self.mutex.release()
+            return future
 
         self.tx_data.rw = rw
         self.tx_data.cmd = cmd[0]
         self.tx_data.len = data_wlen + 1
+        if data_wlen > 0:
+            self.tx_data.data[0:data_wlen] = cmd_data[0:data_wlen]
+        if rw == UTRC_RW.W and self._kin_cache is not None and cmd[0] in self._kin_model_cmd:
+            self._kin_cache.clear()
+        if rw == UTRC_RW.W and self.param_cache is not None:
+            # every write path (sync, async, pipelined) drops what it may change, _sendpend stores the new value
+            if cmd[0] in self.param_cache.cmds:
+                self.param_cache.drop(0, cmd[0])
+            elif cmd[0] in (self.reg.RESET_ERR[0], self.reg.SYS_REBOOT[0], self.reg.ERASE_PARM[0]):
+                self.param_cache.clear()
+
+        # with a pipeline only the write is serialized, the response is awaited outside the lock
+        future = self.utrc_client.submit(self.tx_data, data_rlen, timeout_s)
+        self.mutex.release()
+        return future
+
+    # The api methods build their request and decode the response through the hooks below.
+    # Here a request is waited for at once, AsyncUtraApi overrides the hooks to return coroutines,
+    # so the same methods serve both connections.
+
+    def _wait(self, future, timeout_s=None):
+        return future.result(timeout_s)
+
+    def _then(self, result, decode):
+        return decode(*result)
+
+    def _done(self, value):
+        return value
+
+    def _run(self, steps):
+        # steps is a generator that yields requests, the result of each request is sent back into it
+        value = None
+        try:
+            while True:
+                value = steps.send(value)
+        except StopIteration as stop:
+            return stop.value
+
+    def _request(self, rw, reg, tx_data, decode):
+        return self._then(self._sendpend(rw, reg, tx_data), decode)
+
+    def _gather(self, futures, decode):
+        return self._run(self.__gather_steps(futures, decode))
+
+    def __gather_steps(self, futures, decode):
+        results = []
+        for future in futures:
+            result = yield self._wait(future)
+            results.append(result)
+        return decode(results)
+
+    def _sendpend(self, rw, reg, tx_data):
+        cache = self.param_cache
+        if cache is None or (reg[0] not in cache.cmds and reg[0] != self.reg.SAVED_PARM[0]):
+            return self._wait(self._submit(rw, reg, tx_data))
+
+        # a broken connection fails in _submit as without the cache
+        if rw == UTRC_RW.R and not self.__is_err:
+            data = cache.get(0, reg[0])
+            if data is not None:
+                utrc_rmsg = UtrcType()
+                utrc_rmsg.data[0:len(data)] = data
+                utrc_rmsg.len = len(data) + 1
+                return self._done((0, utrc_rmsg))
+
+        def store(ret, utrc_rmsg):
+            if ret != 0:
+                return ret, utrc_rmsg
+            if reg[0] == self.reg.SAVED_PARM[0]:
+                cache.saved()
+            elif rw == UTRC_RW.R:
+                cache.put(0, reg[0], utrc_rmsg.data[0:reg[2]])
+            else:
+                cache.put(0, reg[0], tx_data[0:reg[3]], True)
+            return ret, utrc_rmsg
+
+        return self._then(self._wait(self._submit(rw, reg, tx_data)), store)
+
+    def _get_kin_cached(self, get, reg, rx_n, txdata, tx_n):
+        cache = self._kin_cache
+        if cache is None:
+            return get(reg, rx_n, txdata, tx_n)
+        res = self._kin_resolution
+        key = (reg[0],) + tuple(int(round(txdata[i] / res)) for i in range(tx_n))
+        value = cache.get(key)
+        if value is not None:
+            return self._done((0, list(value) if isinstance(value, tuple) else value))
+
+        def store(ret, value):
+            if ret == 0:
+                cache.put(key, tuple(value) if isinstance(value, list) else value)
+            return ret, value
+
+        return self._then(get(reg, rx_n, txdata, tx_n), store)
+
+    def request_async(self, rw, reg, tx_data=None, timeout_s=1):
+        """Sends one register request without waiting for the response.
+        Several requests can be in flight at the same time when the connection has a pipeline.
 
-        for i in range(data_wlen):
-            self.tx_data.data[i] = cmd_data[i]
+        Args:
+            rw (int): UTRC_RW.R or UTRC_RW.W
+            reg (list): Register of self.reg
+            tx_data (bytes, optional): Data to send. Defaults to None.
+            timeout_s (float, optional): Response timeout in seconds. Defaults to 1.
 
-        self.utrc_client.send(self.tx_data)
+        Returns:
+            future (UtrcFuture): future.result() returns (ret, utrc_rmsg) as the blocking calls do
+        """
+        return self._submit(rw, reg, tx_data, timeout_s)
 
-    def __pend(self, rw, cmd, timeout_s=1):
-        if self.__is_err:
-            return -999, self.tx_data
+    def is_err(self):
+        return self.__is_err
 
-        if rw == UTRC_RW.R:
-            data_rlen = cmd[2]
+    def set_que_no_wait(self, enable=True, callback=None):
+        """Queue commands (set_utrc_*_que, set_pass_rs485_que) return as soon as their frame is written,
+        their acks are checked in the receive thread. Errors are counted in get_que_stats(),
+        callback(ret, cmd) is called for every ack that reports an error or never came,
+        and wait_que_ack() waits for the acks of all queue commands sent so far.
+        An ack still missing after the timeout of its command fails with UTRC_RX_ERROR.TIMEOUT
+        the next time wait_que_ack() or get_que_stats() is called, the callback is then called in that thread.
+        Needs a connection with a pipeline (UtraApiTcp), other connections wait for each ack.
+
+        Args:
+            enable (bool, optional): Do not wait for the acks. Defaults to True.
+            callback (function, optional): callback(ret, cmd) of a failed queue command. Defaults to None.
+
+        Returns:
+            ret(int): 0, -1 if the connection has no pipeline
+        """
+        if enable and self.utrc_client.pipeline is None:
+            logging.warning(self.DB_FLG + "set_que_no_wait: the connection has no pipeline")
+            return -1
+        self._que_callback = callback
+        self._que_no_wait = enable
+        return 0
+
+    def wait_que_ack(self, timeout_s=1):
+        """Waits for the acks of all queue commands sent without waiting
+
+        Args:
+            timeout_s (float, optional): Longest wait [s]. Defaults to 1.
+
+        Returns:
+            ret(int): 0 if all acks came without error since the last call,
+                UTRC_RX_ERROR.TIMEOUT if acks are missing, else the code of the last failed ack
+        """
+        return self._run(self.__wait_que_steps(timeout_s))
+
+    def __wait_que_steps(self, timeout_s):
+        end = time.monotonic() + timeout_s
+        while True:
+            now = time.monotonic()
+            future = self.__expire_que(now)
+            if future is None or now >= end:
+                break
+            yield self._wait(future, min(future.deadline, end) - now)
+
+        with self._que_cond:
+            stats = self._que_stats
+            done = stats["acked"] == stats["sent"]
+            ret = stats["last_error"]
+            stats["last_error"] = 0
+        if not done:
+            return UTRC_RX_ERROR.TIMEOUT
+        return ret
+
+    def get_que_stats(self):
+        """Get the statistics of the queue commands sent without waiting
+
+        Returns:
+            stats (dict): {"sent", "acked", "errors", "pending"}, errors counts failed and missing acks
+        """
+        self.__expire_que(time.monotonic())
+        with self._que_cond:
+            stats = self._que_stats
+            return {"sent": stats["sent"], "acked": stats["acked"], "errors": stats["errors"],
+                    "pending": stats["sent"] - stats["acked"]}
+
+    def _sendpend_que(self, reg, tx_data):
+        if not self._que_no_wait:
+            return self._request(UTRC_RW.W, reg, tx_data, self.__que_ret)
+
+        future = self._submit(UTRC_RW.W, reg, tx_data)
+        with self._que_cond:
+            self._que_stats["sent"] += 1
+            self._que_pending.append(future)
+        future.add_done_callback(self.__que_acked)
+        return self._done(0)
+
+    def __expire_que(self, now):
+        # the pipeline drops a request without ack only when later traffic comes, so a missing ack is
+        # failed here at its deadline, a late ack still matches the request in the pipeline and is ignored
+        with self._que_cond:
+            overdue = [future for future in self._que_pending if not future.done() and future.deadline <= now]
+        for future in overdue:
+            future.set_result(UTRC_RX_ERROR.TIMEOUT, UtrcType())
+
+        with self._que_cond:
+            pending = self._que_pending
+            while len(pending) and pending[0].done():
+                pending.popleft()
+            return pending[0] if len(pending) else None
+
+    def __que_ret(self, ret, utrc_rmsg):
+        if ret == UTRC_RX_ERROR.STATE:
+            return 0
         else:
-            data_rlen = cmd[4]
-        return self.utrc_client.pend(self.tx_data, data_rlen, timeout_s)
+            return ret
 
-    def __sendpend(self, rw, reg, tx_data):
-        self.mutex.acquire()
-        self.__send(rw, reg, tx_data)
-        ret, utrc_rmsg = self.__pend(rw, reg)
-        self.mutex.release()
-        return ret, utrc_rmsg
+    def __que_acked(self, future):
+        ret = future.ret
+        failed = ret != 0 and ret != UTRC_RX_ERROR.STATE
+        with self._que_cond:
+            stats = self._que_stats
+            stats["acked"] += 1
+            if failed:
+                stats["errors"] += 1
+                stats["last_error"] = ret
+            self._que_cond.notify_all()
+        callback = self._que_callback
+        if failed and callback is not None:
+            callback(ret, future.cmd)
+
+    # decode type of the registers that can be read by read_many
+    _READ_MANY_TYPE = {
+        "UUID": "str", "SW_VERSION": "str", "HW_VERSION": "str", "UBOT_AXIS": "int8",
+        "SYS_AUTORUN": "int8", "MOTION_MDOE": "int8", "MOTION_ENABLE": "int32", "BRAKE_ENABLE": "int32",
+        "ERROR_CODE": "int8", "SERVO_MSG": "int8", "MOTION_STATUS": "int8", "CMD_NUM": "int32",
+        "TCP_JERK": "fp32", "TCP_MAXACC": "fp32", "JOINT_JERK": "fp32", "JOINT_MAXACC": "fp32",
+        "TCP_OFFSET": "fp32", "LOAD_PARAM": "fp32", "GRAVITY_DIR": "fp32", "COLLIS_SENS": "int8",
+        "TEACH_SENS": "int8", "LIMIT_FUN": "int32", "TCP_POS_CURR": "fp32", "JOINT_POS_CURR": "fp32",
+        "JOINT_VEL_CURR": "fp32",
+    }
+
+    def read_many(self, names, timeout_s=1):
+        """Read several registers in one batch.
+        All requests are sent before the first reply is awaited, with a pipelined connection
+        the batch costs about one round trip instead of one per register.
+
+            ret, values = arm.read_many(["ERROR_CODE", "MOTION_STATUS", "CMD_NUM", "JOINT_POS_CURR"])
 
-    def is_err(self):
-        return self.__is_err
+        Args:
+            names (list): Names of the registers of self.reg, such as "TCP_OFFSET"
+            timeout_s (float, optional): Response timeout in seconds. Defaults to 1.
+
+        Returns:
+            ret (int): Function execution result code of the first register that failed, 0 if all succeeded
+            values (dict): {name: value}, decoded as the get_xxx api of the register, None if it failed
+        """
+        futures = []
+        for name in names:
+            if name not in self._READ_MANY_TYPE:
+                raise ValueError(self.DB_FLG + "read_many: register %s can not be read in a batch" % name)
+            futures.append(self._submit(UTRC_RW.R, getattr(self.reg, name), None, timeout_s))
+        return self._gather(futures, lambda results: self._read_many_result(names, results))
+
+    def _read_many_result(self, names, results):
+        ret = 0
+        values = {}
+        for name, (ret_i, utrc_rmsg) in zip(names, results):
+            if ret_i == 0 or ret_i == UTRC_RX_ERROR.STATE:
+                kind = self._READ_MANY_TYPE[name]
+                reg = getattr(self.reg, name)
+                n = reg[2] if kind in ("int8", "str") else reg[2] // 4
+                values[name] = hex_data.bytes_to_value(utrc_rmsg.data, kind, n)
+            else:
+                values[name] = None
+            if ret == 0:
+                ret = ret_i
+        return ret, values
 
     ############################################################
     #                       Basic Function
     ############################################################
 
-    def __get_reg_int8(self, reg, n):
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, reg, None)
-        if n == 1:
-            value = hex_data.bytes_to_int8(utrc_rmsg.data[0], n)
-        else:
-            value = hex_data.bytes_to_int8(utrc_rmsg.data[0:n], n)
-        return ret, value
+    def __int8_value(self, n):
+        def decode(ret, utrc_rmsg):
+            if n == 1:
+                value = hex_data.bytes_to_int8(utrc_rmsg.data[0], n)
+            else:
+                value = hex_data.bytes_to_int8(utrc_rmsg.data[0:n], n)
+            return ret, value
 
-    def __set_reg_int8(self, reg, value, n):
-        txdata = hex_data.int8_to_bytes_big(value, n)
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, reg, txdata)
+        return decode
+
+    def __write_ret(self, ret, utrc_rmsg):
         return ret
 
-    def __get_reg_int32(self, reg, n):
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, reg, None)
-        value = hex_data.bytes_to_int32_big(utrc_rmsg.data, n)
-        return ret, value
+    def _get_reg_int8(self, reg, n):
+        return self._request(UTRC_RW.R, reg, None, self.__int8_value(n))
 
-    def __set_reg_int32(self, reg, value, n):
+    def _set_reg_int8(self, reg, value, n):
+        txdata = hex_data.int8_to_bytes_big(value, n)
+        return self._request(UTRC_RW.W, reg, txdata, self.__write_ret)
+
+    def _get_reg_int32(self, reg, n):
+        return self._request(
+            UTRC_RW.R, reg, None, lambda ret, utrc_rmsg: (ret, hex_data.bytes_to_int32_big(utrc_rmsg.data, n))
+        )
+
+    def _set_reg_int32(self, reg, value, n):
         txdata = hex_data.int32_to_bytes_big(value, n)
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, reg, txdata)
-        return ret
+        return self._request(UTRC_RW.W, reg, txdata, self.__write_ret)
 
-    def __get_reg_fp32(self, reg, n):
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, reg, None)
-        value = hex_data.bytes_to_fp32_big(utrc_rmsg.data, n)
-        return ret, value
+    def _get_reg_fp32(self, reg, n):
+        return self._request(
+            UTRC_RW.R, reg, None, lambda ret, utrc_rmsg: (ret, hex_data.bytes_to_fp32_big(utrc_rmsg.data, n))
+        )
 
-    def __set_reg_fp32(self, reg, value, n):
+    def _set_reg_fp32(self, reg, value, n):
         datas = hex_data.fp32_to_bytes_big(value, n)
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, reg, datas)
-        return ret
+        return self._request(UTRC_RW.W, reg, datas, self.__write_ret)
 
-    def __get_reg_fp32_fp32(self, reg, rx_n, txdata, tx_n):
+    def _get_reg_fp32_fp32(self, reg, rx_n, txdata, tx_n):
         datas = hex_data.fp32_to_bytes_big(txdata, tx_n)
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, reg, datas)
-        value = hex_data.bytes_to_fp32_big(utrc_rmsg.data, rx_n)
-        return ret, value
+        return self._request(
+            UTRC_RW.R, reg, datas, lambda ret, utrc_rmsg: (ret, hex_data.bytes_to_fp32_big(utrc_rmsg.data, rx_n))
+        )
 
-    def __get_reg_int8_fp32(self, reg, rx_n, txdata, tx_n):
+    def _get_reg_int8_fp32(self, reg, rx_n, txdata, tx_n):
         datas = hex_data.fp32_to_bytes_big(txdata, tx_n)
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, reg, datas)
-        if rx_n == 1:
-            value = hex_data.bytes_to_int8(utrc_rmsg.data[0], rx_n)
-        else:
-            value = hex_data.bytes_to_int8(utrc_rmsg.data[0:rx_n], rx_n)
-        return ret, value
+        return self._request(UTRC_RW.R, reg, datas, self.__int8_value(rx_n))
 
     ############################################################
     #                       Basic Api
@@ -152,9 +427,7 @@ class _ArmApiBase:
             uuid (string): The unique code of umbratek products is also a certificate of repair and warranty
                            17-bit string
         """
-        ret, uuid = self.__get_reg_int8(self.reg.UUID, 17)
-        uuid = "".join([chr(x) for x in uuid])
-        return ret, uuid
+        return self._then(self._get_reg_int8(self.reg.UUID, 17), self.__str_value)
 
     def get_sw_version(self):
         """Get the software version
@@ -163,9 +436,7 @@ class _ArmApiBase:
             ret (int): Function execution result code, refer to appendix for code meaning
             version (string): Software version, 20-bit string
         """
-        ret, version = self.__get_reg_int8(self.reg.SW_VERSION, 20)
-        ver_srt = "".join([chr(x) for x in version])
-        return ret, ver_srt
+        return self._then(self._get_reg_int8(self.reg.SW_VERSION, 20), self.__str_value)
 
     def get_hw_version(self):
         """Get the hardware version
@@ -174,9 +445,10 @@ class _ArmApiBase:
             ret (int): Function execution result code, refer to appendix for code meaning
             version (string): Hardware version, 20-bit string
         """
-        ret, version = self.__get_reg_int8(self.reg.HW_VERSION, 20)
-        ver_srt = "".join([chr(x) for x in version])
-        return ret, ver_srt
+        return self._then(self._get_reg_int8(self.reg.HW_VERSION, 20), self.__str_value)
+
+    def __str_value(self, ret, value):
+        return ret, "".join([chr(x) for x in value])
 
     def get_axis(self):
         """Get the number of arm axes
@@ -185,9 +457,11 @@ class _ArmApiBase:
             ret (int): Function execution result code, refer to appendix for code meaning
             axis (int): The number of arm axes
         """
-        ret, axis = self.__get_reg_int8(self.reg.UBOT_AXIS, 1)
-        self.__AXIS = axis
-        return ret, axis
+        def decode(ret, axis):
+            self._AXIS = axis
+            return ret, axis
+
+        return self._then(self._get_reg_int8(self.reg.UBOT_AXIS, 1), decode)
 
     def get_sys_autorun(self):
         """Get the arm automatically starts symbol when it is powered on.
@@ -198,7 +472,7 @@ class _ArmApiBase:
                            1: The arm automatically starts when it is powered on.
 
         """
-        return self.__get_reg_int8(self.reg.SYS_AUTORUN, 1)
+        return self._get_reg_int8(self.reg.SYS_AUTORUN, 1)
 
     def set_sys_autorun(self, autorun):
         """Set the arm to start automatically when it is powered on.
@@ -210,7 +484,7 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.SYS_AUTORUN, int(autorun), 1)
+        return self._set_reg_int8(self.reg.SYS_AUTORUN, int(autorun), 1)
 
     def shutdown_system(self):
         """Power off the controller
@@ -218,7 +492,7 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.SYS_SHUTDOWN, self.reg.SYS_SHUTDOWN[0], 1)
+        return self._set_reg_int8(self.reg.SYS_SHUTDOWN, self.reg.SYS_SHUTDOWN[0], 1)
 
     def reset_err(self):
         """Reset the error state of the device
@@ -226,7 +500,7 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.RESET_ERR, self.reg.RESET_ERR[0], 1)
+        return self._set_reg_int8(self.reg.RESET_ERR, self.reg.RESET_ERR[0], 1)
 
     def reboot_system(self):
         """Restart the system
@@ -234,7 +508,7 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.SYS_REBOOT, self.reg.SYS_REBOOT[0], 1)
+        return self._set_reg_int8(self.reg.SYS_REBOOT, self.reg.SYS_REBOOT[0], 1)
 
     def erase_parm(self):
         """Restore the parameters to factory settings
@@ -242,7 +516,7 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.ERASE_PARM, self.reg.ERASE_PARM[0], 1)
+        return self._set_reg_int8(self.reg.ERASE_PARM, self.reg.ERASE_PARM[0], 1)
 
     def saved_parm(self):
         """Save the current parameter settings
@@ -250,7 +524,7 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.SAVED_PARM, self.reg.SAVED_PARM[0], 1)
+        return self._set_reg_int8(self.reg.SAVED_PARM, self.reg.SAVED_PARM[0], 1)
 
     ############################################################
     #                       Control Api
@@ -268,7 +542,7 @@ class _ArmApiBase:
                 3: cartesian teaching mode (NOT used in current version)
 
         """
-        return self.__get_reg_int8(self.reg.MOTION_MDOE, 1)
+        return self._get_reg_int8(self.reg.MOTION_MDOE, 1)
 
     def set_motion_mode(self, mode):
         """Set the operating mode of the arm.
@@ -283,7 +557,7 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.MOTION_MDOE, int(mode), 1)
+        return self._set_reg_int8(self.reg.MOTION_MDOE, int(mode), 1)
 
     def into_motion_mode_pos(self):
         return self.set_motion_mode(0)
@@ -302,7 +576,7 @@ class _ArmApiBase:
                 0x0000 means all disable
                 0x0001 means only the first joint is enabled
         """
-        return self.__get_reg_int32(self.reg.MOTION_ENABLE, 1)
+        return self._get_reg_int32(self.reg.MOTION_ENABLE, 1)
 
     def set_motion_enable(self, axis, en):
         """Set the enable state of the arm
@@ -318,7 +592,7 @@ class _ArmApiBase:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
         txdata = [int(axis), int(en)]
-        return self.__set_reg_int8(self.reg.MOTION_ENABLE, txdata, 2)
+        return self._set_reg_int8(self.reg.MOTION_ENABLE, txdata, 2)
 
     def into_motion_enable(self):
         return self.set_motion_enable(99, 1)
@@ -338,7 +612,7 @@ class _ArmApiBase:
                 0x0001 means only the first joint is enabled
 
         """
-        return self.__get_reg_int32(self.reg.BRAKE_ENABLE, 1)
+        return self._get_reg_int32(self.reg.BRAKE_ENABLE, 1)
 
     def set_brake_enable(self, axis, en):
         """Only set the enable state of the joint brake
@@ -354,7 +628,7 @@ class _ArmApiBase:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
         txdata = [int(axis), int(en)]
-        return self.__set_reg_int8(self.reg.BRAKE_ENABLE, txdata, 2)
+        return self._set_reg_int8(self.reg.BRAKE_ENABLE, txdata, 2)
 
     def get_error_code(self):
         """Get error code
@@ -363,7 +637,7 @@ class _ArmApiBase:
             ret (int): Function execution result code, refer to appendix for code meaning
             code (list): code[0] is error code, code[1] is warning code
         """
-        return self.__get_reg_int8(self.reg.ERROR_CODE, 2)
+        return self._get_reg_int8(self.reg.ERROR_CODE, 2)
 
     def get_servo_msg(self):
         """Get servo status information
@@ -378,9 +652,8 @@ class _ArmApiBase:
                     -4: There is an error in the joint, please check the error code
                 msg[Axis:2*Axis] Servo error code. Check the error code table in the ADRA actuator manual
         """
-        ret, msg = self.__get_reg_int8(self.reg.SERVO_MSG, self.__AXIS * 2)
-        msg_srt = " ".join([str(x) for x in msg])
-        return ret, msg_srt
+        msg = self._get_reg_int8(self.reg.SERVO_MSG, self._AXIS * 2)
+        return self._then(msg, lambda ret, msg: (ret, " ".join([str(x) for x in msg])))
 
     def get_motion_status(self):
         """Get the running status of the arm
@@ -394,7 +667,7 @@ class _ArmApiBase:
                 4: Stopping
 
         """
-        return self.__get_reg_int8(self.reg.MOTION_STATUS, 1)
+        return self._get_reg_int8(self.reg.MOTION_STATUS, 1)
 
     def set_motion_status(self, state):
         """Set the running status of the arm
@@ -412,16 +685,16 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.MOTION_STATUS, int(state), 1)
+        return self._set_reg_int8(self.reg.MOTION_STATUS, int(state), 1)
 
     def motion_status_into_stop(self):
-        self.set_motion_status(4)
+        return self.set_motion_status(4)
 
     def motion_status_into_ready(self):
-        self.set_motion_status(0)
+        return self.set_motion_status(0)
 
     def motion_status_into_pause(self):
-        self.set_motion_status(3)
+        return self.set_motion_status(3)
 
     def get_cmd_num(self):
         """Get the current number of instruction cache
@@ -429,7 +702,7 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__get_reg_int32(self.reg.CMD_NUM, 1)
+        return self._get_reg_int32(self.reg.CMD_NUM, 1)
 
     def set_cmd_num(self, value=0):
         """Clear the current instruction cache
@@ -440,7 +713,7 @@ class _ArmApiBase:
         Returns:
             ret (int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int32(self.reg.CMD_NUM, int(value), 1)
+        return self._set_reg_int32(self.reg.CMD_NUM, int(value), 1)
 
     ############################################################
     #                     Trajectory Api
@@ -467,7 +740,7 @@ class _ArmApiBase:
         txdata[6] = mvvelo
         txdata[7] = mvacc
         txdata[8] = mvtime
-        return self.__set_reg_fp32(self.reg.MOVET_LINE, txdata, 9)
+        return self._set_reg_fp32(self.reg.MOVET_LINE, txdata, 9)
 
     def moveto_cartesian_lineb(self, mvpose, mvvelo, mvacc, mvtime, mvradii):
         """Blend circular (in tool-space) and move linear (in tool-space) to position.
@@ -492,7 +765,7 @@ class _ArmApiBase:
         txdata[7] = mvacc
         txdata[8] = mvtime
         txdata[9] = mvradii
-        return self.__set_reg_fp32(self.reg.MOVET_LINEB, txdata, 10)
+        return self._set_reg_fp32(self.reg.MOVET_LINEB, txdata, 10)
 
     def moveto_cartesian_circle(self, pose1, pose2, mvvelo, mvacc, mvtime, percent):
         """Move to position (circular in tool-space).
@@ -521,7 +794,7 @@ class _ArmApiBase:
         txdata[13] = mvacc
         txdata[14] = mvtime
         txdata[15] = percent
-        return self.__set_reg_fp32(self.reg.MOVET_CIRCLE, txdata, 16)
+        return self._set_reg_fp32(self.reg.MOVET_CIRCLE, txdata, 16)
 
     def moveto_cartesian_p2p(self, mvpose, mvvelo, mvacc, mvtime):
         """Move to position(linear in joint - space).
@@ -544,7 +817,7 @@ class _ArmApiBase:
         txdata[6] = mvvelo
         txdata[7] = mvacc
         txdata[8] = mvtime
-        return self.__set_reg_fp32(self.reg.MOVET_P2P, txdata, 9)
+        return self._set_reg_fp32(self.reg.MOVET_P2P, txdata, 9)
 
     def moveto_cartesian_p2pb(self):
         """NOT public in current version
@@ -552,7 +825,7 @@ class _ArmApiBase:
         Returns:
             [type]: [description]
         """
-        return 0
+        return self._done(0)
 
     def moveto_joint_line(self, mvjoint, mvvelo, mvacc, mvtime):
         """Move to position(linear in tool - space).
@@ -569,13 +842,13 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        txdata = [0] * (self.__AXIS + 3)
-        for i in range(self.__AXIS):
+        txdata = [0] * (self._AXIS + 3)
+        for i in range(self._AXIS):
             txdata[i] = mvjoint[i]
-        txdata[self.__AXIS] = mvvelo
-        txdata[self.__AXIS + 1] = mvacc
-        txdata[self.__AXIS + 2] = mvtime
-        return self.__set_reg_fp32(self.reg.MOVEJ_LINE, txdata, self.__AXIS + 3)
+        txdata[self._AXIS] = mvvelo
+        txdata[self._AXIS + 1] = mvacc
+        txdata[self._AXIS + 2] = mvtime
+        return self._set_reg_fp32(self.reg.MOVEJ_LINE, txdata, self._AXIS + 3)
 
     def moveto_joint_lineb(self, mvjoint, mvvelo, mvacc, mvtime, mvradii):
         """Blend circular ( in tool-space) and move linear ( in tool-space) to position.
@@ -593,14 +866,14 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        txdata = [0] * (self.__AXIS + 4)
-        for i in range(self.__AXIS):
+        txdata = [0] * (self._AXIS + 4)
+        for i in range(self._AXIS):
             txdata[i] = mvjoint[i]
-        txdata[self.__AXIS] = mvvelo
-        txdata[self.__AXIS + 1] = mvacc
-        txdata[self.__AXIS + 2] = mvtime
-        txdata[self.__AXIS + 3] = mvradii
-        return self.__set_reg_fp32(self.reg.MOVEJ_LINEB, txdata, self.__AXIS + 4)
+        txdata[self._AXIS] = mvvelo
+        txdata[self._AXIS + 1] = mvacc
+        txdata[self._AXIS + 2] = mvtime
+        txdata[self._AXIS + 3] = mvradii
+        return self._set_reg_fp32(self.reg.MOVEJ_LINEB, txdata, self._AXIS + 4)
 
     def moveto_joint_circle(self, mvjoint1, mvjoint2, mvvelo, mvacc, mvtime, percent):
         """Move to position(circular in tool - space).
@@ -620,16 +893,16 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        txdata = [0] * (self.__AXIS * 2 + 4)
-        for i in range(self.__AXIS):
+        txdata = [0] * (self._AXIS * 2 + 4)
+        for i in range(self._AXIS):
             txdata[i] = mvjoint1[i]
-        for i in range(self.__AXIS):
-            txdata[self.__AXIS + i] = mvjoint2[i]
-        txdata[self.__AXIS * 2] = mvvelo
-        txdata[self.__AXIS * 2 + 1] = mvacc
-        txdata[self.__AXIS * 2 + 2] = mvtime
-        txdata[self.__AXIS * 2 + 3] = percent
-        return self.__set_reg_fp32(self.reg.MOVEJ_CIRCLE, txdata, self.__AXIS * 2 + 4)
+        for i in range(self._AXIS):
+            txdata[self._AXIS + i] = mvjoint2[i]
+        txdata[self._AXIS * 2] = mvvelo
+        txdata[self._AXIS * 2 + 1] = mvacc
+        txdata[self._AXIS * 2 + 2] = mvtime
+        txdata[self._AXIS * 2 + 3] = percent
+        return self._set_reg_fp32(self.reg.MOVEJ_CIRCLE, txdata, self._AXIS * 2 + 4)
 
     def moveto_joint_p2p(self, mvjoint, mvvelo, mvacc, mvtime):
         """Move to position(linear in joint - space).
@@ -646,13 +919,13 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        txdata = [0] * (self.__AXIS + 3)
-        for i in range(self.__AXIS):
+        txdata = [0] * (self._AXIS + 3)
+        for i in range(self._AXIS):
             txdata[i] = mvjoint[i]
-        txdata[self.__AXIS] = mvvelo
-        txdata[self.__AXIS + 1] = mvacc
-        txdata[self.__AXIS + 2] = mvtime
-        return self.__set_reg_fp32(self.reg.MOVEJ_P2P, txdata, self.__AXIS + 3)
+        txdata[self._AXIS] = mvvelo
+        txdata[self._AXIS + 1] = mvacc
+        txdata[self._AXIS + 2] = mvtime
+        return self._set_reg_fp32(self.reg.MOVEJ_P2P, txdata, self._AXIS + 3)
 
     def moveto_joint_p2pb(self, mvjoint, mvvelo, mvacc, mvtime, mvradii):
         """Move to position(linear in joint - space). The velocity is continuous between multiple position points.
@@ -673,14 +946,14 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        txdata = [0] * (self.__AXIS + 4)
-        for i in range(self.__AXIS):
+        txdata = [0] * (self._AXIS + 4)
+        for i in range(self._AXIS):
             txdata[i] = mvjoint[i]
-        txdata[self.__AXIS] = mvvelo
-        txdata[self.__AXIS + 1] = mvacc
-        txdata[self.__AXIS + 2] = mvtime
-        txdata[self.__AXIS + 3] = mvradii
-        return self.__set_reg_fp32(self.reg.MOVEJ_P2PB, txdata, self.__AXIS + 4)
+        txdata[self._AXIS] = mvvelo
+        txdata[self._AXIS + 1] = mvacc
+        txdata[self._AXIS + 2] = mvtime
+        txdata[self._AXIS + 3] = mvradii
+        return self._set_reg_fp32(self.reg.MOVEJ_P2PB, txdata, self._AXIS + 4)
 
     def moveto_home_p2p(self, mvvelo, mvacc, mvtime):
         """Move to position of home(linear in joint - space).
@@ -698,7 +971,7 @@ class _ArmApiBase:
         txdata[0] = mvvelo
         txdata[1] = mvacc
         txdata[2] = mvtime
-        return self.__set_reg_fp32(self.reg.MOVEJ_HOME, txdata, 3)
+        return self._set_reg_fp32(self.reg.MOVEJ_HOME, txdata, 3)
 
     def moveto_servo_joint(self, frames_num, mvjoint, mvtime):
         return self.moveto_joint_servo(frames_num, mvjoint, mvtime)
@@ -716,20 +989,19 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        data_len = frames_num * (self.__AXIS + 1)
+        data_len = frames_num * (self._AXIS + 1)
         txdata = [0] * data_len
 
         for i in range(frames_num):
-            for j in range(self.__AXIS):
-                txdata[i * (self.__AXIS + 1) + j] = mvjoint[i][j]
-            txdata[i * (self.__AXIS + 1) + self.__AXIS] = mvtime[i]
+            for j in range(self._AXIS):
+                txdata[i * (self._AXIS + 1) + j] = mvjoint[i][j]
+            txdata[i * (self._AXIS + 1) + self._AXIS] = mvtime[i]
 
         datas = hex_data.uint32_to_bytes_big(frames_num)
         datas += hex_data.fp32_to_bytes_big(txdata, data_len)
 
-        self.reg.MOVEJ_SERVO[3] = (data_len + 1) * 4
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.MOVEJ_SERVO, datas)
-        return ret
+        cmd_reg = self.reg.MOVEJ_SERVO.with_len(w_tx_len=(data_len + 1) * 4)
+        return self._request(UTRC_RW.W, cmd_reg, datas, self.__write_ret)
 
     def moveto_cartesian_servo(self, frames_num, mvpose, mvtime):
         """Move to position(linear in joint - space) When using this command,
@@ -760,8 +1032,49 @@ class _ArmApiBase:
         datas = hex_data.uint32_to_bytes_big(frames_num)
         datas += hex_data.fp32_to_bytes_big(txdata, data_len)
 
-        self.reg.MOVET_SERVO[3] = (data_len + 1) * 4
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.MOVET_SERVO, datas)
+        cmd_reg = self.reg.MOVET_SERVO.with_len(w_tx_len=(data_len + 1) * 4)
+        return self._request(UTRC_RW.W, cmd_reg, datas, self.__write_ret)
+
+    # frames of one MOVEJ_SERVO / MOVET_SERVO packet
+    SERVO_FRAMES_MAX = 3
+
+    def _cartesian_servo_packets(self, mvpose, mvtime):
+        if np is None:
+            raise ImportError(self.DB_FLG + "moveto_cartesian_servo_array requires numpy, pip install numpy")
+        poses = np.asarray(mvpose, dtype=np.float64).reshape(-1, 6)
+        num = poses.shape[0]
+        frames = np.empty((num, 7), dtype=">f4")
+        frames[:, 0:6] = poses
+        frames[:, 6] = np.broadcast_to(np.asarray(mvtime, dtype=np.float64).reshape(-1), (num,))
+        payload = frames.tobytes()
+
+        for k in range(0, num, self.SERVO_FRAMES_MAX):
+            frames_num = min(self.SERVO_FRAMES_MAX, num - k)
+            datas = hex_data.uint32_to_bytes_big(frames_num) + payload[k * 28:(k + frames_num) * 28]
+            yield self.reg.MOVET_SERVO.with_len(w_tx_len=len(datas)), datas
+
+    def moveto_cartesian_servo_array(self, mvpose, mvtime):
+        """Streams any number of cartesian servo frames, for high rate tele-operation.
+        The frames are packed with numpy in one pass and sent in packets of SERVO_FRAMES_MAX frames,
+        with a pipelined connection all packets are sent before the first response is awaited.
+
+        Args:
+            mvpose (numpy.ndarray): (N, 6) cartesian positions [mm mm mm rad rad rad], or one pose of 6 values
+            mvtime (float or numpy.ndarray): Time to move to each target [seconds], one value or N values
+
+        Returns:
+            ret(int): Function execution result code of the first packet that failed, refer to appendix for code meaning
+        """
+        futures = []
+        for reg, datas in self._cartesian_servo_packets(mvpose, mvtime):
+            futures.append(self._submit(UTRC_RW.W, reg, datas))
+        return self._gather(futures, self.__first_ret)
+
+    def __first_ret(self, results):
+        ret = 0
+        for ret_i, utrc_rmsg in results:
+            if ret == 0:
+                ret = ret_i
         return ret
 
     def move_sleep(self, time):
@@ -773,7 +1086,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_fp32(self.reg.MOVE_SLEEP, time, 1)
+        return self._set_reg_fp32(self.reg.MOVE_SLEEP, time, 1)
 
     def plan_sleep(self, time):
         """Sleep for an amount of plan time
@@ -784,7 +1097,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_fp32(self.reg.PLAN_SLEEP, time, 1)
+        return self._set_reg_fp32(self.reg.PLAN_SLEEP, time, 1)
 
     ############################################################
     #                    Parameter Api
@@ -798,7 +1111,7 @@ class _ArmApiBase:
             jerk(float): jerk[mm / s ^ 3]
 
         """
-        return self.__get_reg_fp32(self.reg.TCP_JERK, 1)
+        return self._get_reg_fp32(self.reg.TCP_JERK, 1)
 
     def set_tcp_jerk(self, jerk):
         """Set the jerk of the tool - space
@@ -809,7 +1122,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_fp32(self.reg.TCP_JERK, jerk, 1)
+        return self._set_reg_fp32(self.reg.TCP_JERK, jerk, 1)
 
     def get_tcp_maxacc(self):
         """Set the maximum acceleration of the tool - space
@@ -818,7 +1131,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             maxacc(float): maximum acceleration[mm / s ^ 2]
         """
-        return self.__get_reg_fp32(self.reg.TCP_MAXACC, 1)
+        return self._get_reg_fp32(self.reg.TCP_MAXACC, 1)
 
     def set_tcp_maxacc(self, maxacc):
         """Set the maximum acceleration of the tool - space
@@ -829,7 +1142,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_fp32(self.reg.TCP_MAXACC, maxacc, 1)
+        return self._set_reg_fp32(self.reg.TCP_MAXACC, maxacc, 1)
 
     def get_joint_jerk(self):
         """Get the jerk of the joint - space
@@ -838,7 +1151,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             jerk(float): jerk[rad / s ^ 3]
         """
-        return self.__get_reg_fp32(self.reg.JOINT_JERK, 1)
+        return self._get_reg_fp32(self.reg.JOINT_JERK, 1)
 
     def set_joint_jerk(self, jerk):
         """Set the jerk of the joint - space
@@ -849,7 +1162,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_fp32(self.reg.JOINT_JERK, jerk, 1)
+        return self._set_reg_fp32(self.reg.JOINT_JERK, jerk, 1)
 
     def get_joint_maxacc(self):
         """Get the maximum acceleration of the joint - space
@@ -858,7 +1171,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             maxacc(float): Maximum acceleration[rad / s ^ 2]
         """
-        return self.__get_reg_fp32(self.reg.JOINT_MAXACC, 1)
+        return self._get_reg_fp32(self.reg.JOINT_MAXACC, 1)
 
     def set_joint_maxacc(self, maxacc):
         """Set the maximum acceleration of the joint - space
@@ -869,7 +1182,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_fp32(self.reg.JOINT_MAXACC, maxacc, 1)
+        return self._set_reg_fp32(self.reg.JOINT_MAXACC, maxacc, 1)
 
     def get_tcp_offset(self):
         """Get the coordinate offset of the end tcp tool
@@ -878,7 +1191,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             offset(list): Offset cartesian position[mm mm mm rad rad rad]
         """
-        return self.__get_reg_fp32(self.reg.TCP_OFFSET, 6)
+        return self._get_reg_fp32(self.reg.TCP_OFFSET, 6)
 
     def set_tcp_offset(self, offset):
         """Set the coordinate offset of the end tcp tool
@@ -889,7 +1202,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_fp32(self.reg.TCP_OFFSET, offset, 6)
+        return self._set_reg_fp32(self.reg.TCP_OFFSET, offset, 6)
 
     def get_tcp_load(self):
         """Get payload mass and center of gravity
@@ -898,7 +1211,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             value(list): [Mass, CoGx, CoGy, CoGz], mass in kilograms, Center of Gravity in millimeter
         """
-        return self.__get_reg_fp32(self.reg.LOAD_PARAM, 4)
+        return self._get_reg_fp32(self.reg.LOAD_PARAM, 4)
 
     def set_tcp_load(self, mass, dir):
         """Set payload mass and center of gravity
@@ -914,7 +1227,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
         txdata = [mass, dir[0], dir[1], dir[2]]
-        return self.__set_reg_fp32(self.reg.LOAD_PARAM, txdata, 4)
+        return self._set_reg_fp32(self.reg.LOAD_PARAM, txdata, 4)
 
     def get_gravity_dir(self):
         """Get the direction of the acceleration experienced by the robot
@@ -923,7 +1236,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             value(list): 3D vector, describing the direction of the gravity, relative to the base of the robot.
         """
-        return self.__get_reg_fp32(self.reg.GRAVITY_DIR, 3)
+        return self._get_reg_fp32(self.reg.GRAVITY_DIR, 3)
 
     def set_gravity_dir(self, value):
         """Set the direction of the acceleration experienced by the robot. When the robot mounting is fixed,
@@ -936,7 +1249,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_fp32(self.reg.GRAVITY_DIR, value, 3)
+        return self._set_reg_fp32(self.reg.GRAVITY_DIR, value, 3)
 
     def get_collis_sens(self):
         """Get the sensitivity of collision detection
@@ -945,7 +1258,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             num(int): 0 - 101
         """
-        return self.__get_reg_int8(self.reg.COLLIS_SENS, 1)
+        return self._get_reg_int8(self.reg.COLLIS_SENS, 1)
 
     def set_collis_sens(self, num):
         """Set the sensitivity of collision detection
@@ -957,7 +1270,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.COLLIS_SENS, int(num), 1)
+        return self._set_reg_int8(self.reg.COLLIS_SENS, int(num), 1)
 
     def get_teach_sens(self):
         """Get the sensitivity of freedrive
@@ -966,7 +1279,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             num(int): 90 - 110
         """
-        return self.__get_reg_int8(self.reg.TEACH_SENS, 1)
+        return self._get_reg_int8(self.reg.TEACH_SENS, 1)
 
     def set_teach_sens(self, num):
         """Set the sensitivity of freedrive
@@ -977,7 +1290,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int8(self.reg.TEACH_SENS, int(num), 1)
+        return self._set_reg_int8(self.reg.TEACH_SENS, int(num), 1)
 
     def get_limit_fun(self):
         """Get the function of limit
@@ -986,7 +1299,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             fun(int): bit0 - angle limit, bit1 - geometry limit.(High: open, Low: Close)
         """
-        return self.__get_reg_int32(self.reg.LIMIT_FUN, 1)
+        return self._get_reg_int32(self.reg.LIMIT_FUN, 1)
 
     def set_limit_fun(self, fun):
         """Set the function of limit.(High: open, Low: Close)
@@ -999,7 +1312,7 @@ class _ArmApiBase:
         Returns:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
-        return self.__set_reg_int32(self.reg.LIMIT_FUN, fun, 1)
+        return self._set_reg_int32(self.reg.LIMIT_FUN, fun, 1)
 
     def set_limit_angle_enable(self, en):
         """Turn off / on Angle limit detection
@@ -1043,9 +1356,7 @@ class _ArmApiBase:
         """
         txdata = bytes([self.reg.FRICTION[0]])
         txdata += bytes([int(axis)])
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.FRICTION, txdata)
-        fri = hex_data.bytes_to_fp32_big(utrc_rmsg.data, 4)
-        return ret, fri
+        return self._request(UTRC_RW.R, self.reg.FRICTION, txdata, self.__fp32x4_value)
 
     def set_friction(self, axis, fri):
         """Set the friction of the joint
@@ -1061,8 +1372,7 @@ class _ArmApiBase:
         txdata = bytes([self.reg.FRICTION[0]])
         txdata += bytes([int(axis)])
         txdata += hex_data.fp32_to_bytes_big(fri, 4)
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.FRICTION, txdata)
-        return ret
+        return self._request(UTRC_RW.W, self.reg.FRICTION, txdata, self.__write_ret)
 
     def get_dh_offset(self, axis):
         """Get the dh offset of the joint
@@ -1076,9 +1386,7 @@ class _ArmApiBase:
         """
         txdata = bytes([self.reg.DH_OFFSET[0]])
         txdata += bytes([int(axis)])
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.DH_OFFSET, txdata)
-        offset = hex_data.bytes_to_fp32_big(utrc_rmsg.data, 4)
-        return ret, offset
+        return self._request(UTRC_RW.R, self.reg.DH_OFFSET, txdata, self.__fp32x4_value)
 
     def set_dh_offset(self, axis, offset):
         """Set the dh offset of the joint
@@ -1094,8 +1402,10 @@ class _ArmApiBase:
         txdata = bytes([self.reg.DH_OFFSET[0]])
         txdata += bytes([int(axis)])
         txdata += hex_data.fp32_to_bytes_big(offset, 4)
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.DH_OFFSET, txdata)
-        return ret
+        return self._request(UTRC_RW.W, self.reg.DH_OFFSET, txdata, self.__write_ret)
+
+    def __fp32x4_value(self, ret, utrc_rmsg):
+        return ret, hex_data.bytes_to_fp32_big(utrc_rmsg.data, 4)
 
     ############################################################
     #                       State Api
@@ -1113,7 +1423,7 @@ class _ArmApiBase:
             pos(list): The current target TCP vector; ([X, Y, Z, Rx, Ry, Rz])[mm mm mm rad rad rad]
 
         """
-        return self.__get_reg_fp32(self.reg.TCP_POS_CURR, 6)
+        return self._get_reg_fp32(self.reg.TCP_POS_CURR, 6)
 
     def get_tcp_actual_pos(self):
         """NOT public in current version
@@ -1125,7 +1435,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             pos(list): The current actual TCP vector: ([X, Y, Z, Rx, Ry, Rz])[mm mm mm rad rad rad]
         """
-        return 0, 0
+        return self._done((0, 0))
 
     def get_joint_target_pos(self):
         """Get the desired angular position of all joints
@@ -1140,7 +1450,7 @@ class _ArmApiBase:
             joints(list): The current target joint angular position vector in rad
 
         """
-        return self.__get_reg_fp32(self.reg.JOINT_POS_CURR, self.__AXIS)
+        return self._get_reg_fp32(self.reg.JOINT_POS_CURR, self._AXIS)
 
     def get_joint_actual_pos(self):
         """NOT public in current version
@@ -1153,7 +1463,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             joints(list): The actual target joint angular position vector in rad
         """
-        return 0, 0
+        return self._done((0, 0))
 
     def get_ik(self, pose, qnear):
         """Inverse kinematic transformation(tool space -> joint space).
@@ -1168,13 +1478,13 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             joints(list): joint positions[rad]
         """
-        txdata = [0] * (6 + self.__AXIS)
+        txdata = [0] * (6 + self._AXIS)
         for i in range(6):
             txdata[i] = pose[i]
-        for i in range(self.__AXIS):
+        for i in range(self._AXIS):
             txdata[6 + i] = qnear[i]
 
-        return self.__get_reg_fp32_fp32(self.reg.CAL_IK, self.__AXIS, txdata, 6 + self.__AXIS)
+        return self._get_kin_cached(self._get_reg_fp32_fp32, self.reg.CAL_IK, self._AXIS, txdata, 6 + self._AXIS)
 
     def get_fk(self, joints):
         """Forward kinematic transformation(joint space -> tool space).
@@ -1186,10 +1496,10 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             pos(list): tool pose: ([X, Y, Z, Rx, Ry, Rz])[mm mm mm rad rad rad]
         """
-        txdata = [0] * self.__AXIS
-        for i in range(self.__AXIS):
+        txdata = [0] * self._AXIS
+        for i in range(self._AXIS):
             txdata[i] = joints[i]
-        return self.__get_reg_fp32_fp32(self.reg.CAL_FK, 6, txdata, self.__AXIS)
+        return self._get_kin_cached(self._get_reg_fp32_fp32, self.reg.CAL_FK, 6, txdata, self._AXIS)
 
     def is_joint_limit(self, joints):
         """Checks if the given joints is reachable and within the current safety limits of the robot.
@@ -1201,10 +1511,10 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             value[bool]: True if within limits, false otherwise
         """
-        txdata = [0] * self.__AXIS
-        for i in range(self.__AXIS):
+        txdata = [0] * self._AXIS
+        for i in range(self._AXIS):
             txdata[i] = joints[i]
-        return self.__get_reg_int8_fp32(self.reg.IS_JOINT_LIMIT, 1, txdata, self.__AXIS)
+        return self._get_kin_cached(self._get_reg_int8_fp32, self.reg.IS_JOINT_LIMIT, 1, txdata, self._AXIS)
 
     def is_tcp_limit(self, pose):
         """Checks if the given pose is reachable and within the current safety limits of the robot.
@@ -1222,7 +1532,168 @@ class _ArmApiBase:
         txdata = [0] * 6
         for i in range(6):
             txdata[i] = pose[i]
-        return self.__get_reg_int8_fp32(self.reg.IS_TCP_LIMIT, 1, txdata, 6)
+        return self._get_kin_cached(self._get_reg_int8_fp32, self.reg.IS_TCP_LIMIT, 1, txdata, 6)
+
+    def set_kinematics_cache(self, size=256, ttl_s=None, resolution=1e-4):
+        """Caches the results of get_ik, get_fk, is_joint_limit and is_tcp_limit,
+        so the repeated poses of a cycle need no request to the controller.
+        Arguments closer than resolution get the same result. The writes of this connection that change
+        the kinematics (tcp offset, tcp load, limit function, dh offset, erase_parm, reboot_system) clear the cache,
+        a result older than ttl_s is requested again. With AsyncUtraApi the queries are awaited as usual.
+
+        Args:
+            size (int, optional): Number of cached results, 0 turns the cache off. Defaults to 256.
+            ttl_s (float, optional): Age of a result before it is requested again [s], None is no limit. Defaults to None.
+            resolution (float, optional): Quantization of the arguments [mm or rad]. Defaults to 1e-4.
+        """
+        if size <= 0:
+            self._kin_cache = None
+            return
+        reg = self.reg
+        # writes of these registers change the results of get_ik/get_fk/is_joint_limit/is_tcp_limit
+        self._kin_model_cmd = set(r[0] for r in (reg.TCP_OFFSET, reg.LOAD_PARAM, reg.LIMIT_FUN, reg.DH_OFFSET,
+                                                 reg.SYS_REBOOT, reg.ERASE_PARM))
+        self._kin_resolution = resolution
+        self._kin_cache = LruCache(size, ttl_s)
+
+    def clear_kinematics_cache(self):
+        """Drops all results of the kinematics cache"""
+        if self._kin_cache is not None:
+            self._kin_cache.clear()
+
+    # configuration registers of the parameter cache, their read reply has the same layout as their write data
+    _PARAM_CACHE_REG = ("SYS_AUTORUN", "TCP_JERK", "TCP_MAXACC", "JOINT_JERK", "JOINT_MAXACC", "TCP_OFFSET",
+                        "LOAD_PARAM", "GRAVITY_DIR", "COLLIS_SENS", "TEACH_SENS")
+
+    def set_param_cache(self, enable=True):
+        """Turns the parameter cache on or off.
+        With the cache the getters of the configuration parameters (autorun, tcp/joint jerk and maxacc,
+        tcp offset and load, gravity direction, collision and teach sensitivity) ask the controller only once,
+        later reads return the cached value without a request. A successful setter stores its value in the cache,
+        reset_err, erase_parm and reboot_system drop all values.
+        Changes made by another connection are not seen, see refresh_param_cache and update_param_cache.
+
+        Args:
+            enable (bool, optional): Turn the cache on. Defaults to True.
+
+        Returns:
+            ret(int): Function execution result code, refer to appendix for code meaning
+        """
+        if enable:
+            self.param_cache = ParamCache(getattr(self.reg, name)[0] for name in self._PARAM_CACHE_REG)
+        else:
+            self.param_cache = None
+        return 0
+
+    def refresh_param_cache(self):
+        """Reads all cached parameters from the controller again
+
+        Returns:
+            ret(int): Function execution result code of the first failed read, refer to appendix for code meaning
+        """
+        if self.param_cache is None:
+            return self._done(0)
+        self.param_cache.clear()
+        return self._run(self.__refresh_param_steps())
+
+    def __refresh_param_steps(self):
+        ret = 0
+        for name in self._PARAM_CACHE_REG:
+            ret_i, utrc_rmsg = yield self._sendpend(UTRC_RW.R, getattr(self.reg, name), None)
+            if ret == 0 and ret_i != 0:
+                ret = ret_i
+        return ret
+
+    def update_param_cache(self, report):
+        """Stores the parameters of a config report in the cache, such as after report.wait_next()
+
+        Args:
+            report (ArmReportConfigParser): Config report of the arm, ArmReportConfig or a parser
+        """
+        cache = self.param_cache
+        if cache is None or report.seq == 0:
+            return
+        # trs is the tcp motion, p2p the joint motion
+        cache.put(0, self.reg.TCP_MAXACC[0], hex_data.fp32_to_bytes_big(report.trs_maxacc, 1))
+        cache.put(0, self.reg.TCP_JERK[0], hex_data.fp32_to_bytes_big(report.trs_jerk, 1))
+        cache.put(0, self.reg.JOINT_MAXACC[0], hex_data.fp32_to_bytes_big(report.p2p_maxacc, 1))
+        cache.put(0, self.reg.JOINT_JERK[0], hex_data.fp32_to_bytes_big(report.p2p_jerk, 1))
+        cache.put(0, self.reg.TCP_OFFSET[0], hex_data.fp32_to_bytes_big(report.tcp_offset, 6))
+        cache.put(0, self.reg.LOAD_PARAM[0], hex_data.fp32_to_bytes_big(report.tcp_load, 4))
+        cache.put(0, self.reg.GRAVITY_DIR[0], hex_data.fp32_to_bytes_big(report.gravity_dir, 3))
+        cache.put(0, self.reg.COLLIS_SENS[0], hex_data.int8_to_bytes_big(report.collis_sens, 1))
+        cache.put(0, self.reg.TEACH_SENS[0], hex_data.int8_to_bytes_big(report.teach_sens, 1))
+
+    def get_param_cache_stats(self):
+        """Get the statistics of the parameter cache
+
+        Returns:
+            stats (dict): {"hits", "misses", "hit_rate", "entries", "dirty"}, None if the cache is off.
+                dirty is the list of register names set since the last saved_parm, a reboot would lose them.
+        """
+        if self.param_cache is None:
+            return None
+        stats = self.param_cache.stats()
+        names = dict((getattr(self.reg, name)[0], name) for name in self._PARAM_CACHE_REG)
+        stats["dirty"] = [names[cmd] for dev, cmd in stats["dirty"]]
+        return stats
+
+    def get_kinematics_cache_stats(self):
+        """Get the statistics of the kinematics cache
+
+        Returns:
+            stats (dict): {"hits", "misses", "hit_rate", "entries", "clears"}, None if the cache is off
+        """
+        if self._kin_cache is None:
+            return None
+        return self._kin_cache.stats()
+
+    def get_kinematics(self, check=3, lower=None, upper=None):
+        """Builds the kinematics of the arm on the host from its dh parameters and tcp offset,
+        so fk, ik and joint limit checks of many joint vectors need no request to the controller.
+        Standard and modified dh are checked against get_fk() at check joint vectors, the closer one is used.
+        See ArmKinematics, validate() compares it with the controller at more joint vectors.
+
+        Args:
+            check (int, optional): Number of joint vectors compared with get_fk(), 0 uses standard dh. Defaults to 3.
+            lower (list, optional): Lower limit of each joint [rad], they are not read from the controller.
+                Defaults to no limit, validate() then skips the joint limit comparison.
+            upper (list, optional): Upper limit of each joint [rad]. Defaults to no limit.
+
+        Returns:
+            ret(int): Function execution result code, refer to appendix for code meaning
+            kin(ArmKinematics): Kinematics of the arm, None if ret is not 0
+        """
+        return self._run(self.__kinematics_steps(check, lower, upper))
+
+    def __kinematics_steps(self, check, lower, upper):
+        dh = []
+        for axis in range(1, self._AXIS + 1):
+            ret, offset = yield self.get_dh_offset(axis)
+            if ret != 0:
+                return ret, None
+            dh.append(offset)
+        ret, tcp_offset = yield self.get_tcp_offset()
+        if ret != 0:
+            return ret, None
+
+        kin = ArmKinematics(dh, tcp_offset, False, lower, upper)
+        if check <= 0:
+            return 0, kin
+        joints = np.random.RandomState(0).uniform(-1, 1, (check, self._AXIS))
+        ret, errors = yield kin.validate(self, joints)
+        if ret != 0:
+            return ret, None
+        kin_mdh = ArmKinematics(dh, tcp_offset, True, lower, upper)
+        ret, errors_mdh = yield kin_mdh.validate(self, joints)
+        if ret != 0:
+            return ret, None
+        if errors_mdh["fk_pos"] < errors["fk_pos"]:
+            kin, errors = kin_mdh, errors_mdh
+        if errors["fk_pos"] > 0.1 or errors["fk_rot"] > 1e-3:
+            logging.warning(self.DB_FLG + "kinematics differs from get_fk(): %.3fmm %.5frad"
+                            % (errors["fk_pos"], errors["fk_rot"]))
+        return 0, kin
 
     def get_joint_target_vel(self):
         """Get the desired angular velocity of all joints
@@ -1237,7 +1708,7 @@ class _ArmApiBase:
             vel(list): The current target joint angular velocity vector in rad
 
         """
-        return self.__get_reg_fp32(self.reg.JOINT_VEL_CURR, self.__AXIS)
+        return self._get_reg_fp32(self.reg.JOINT_VEL_CURR, self._AXIS)
 
     def get_joint_actual_vel(self):
         """NOT public in current version
@@ -1250,7 +1721,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             vel(list): The actual target joint angular velocity vector in rad
         """
-        return 0, 0
+        return self._done((0, 0))
 
     ############################################################
     #                       Rs485 Api
@@ -1277,13 +1748,15 @@ class _ArmApiBase:
         txdata += bytes([id])
         txdata += bytes([reg])
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.UTRC_INT8_NOW, txdata)
-        value = utrc_rmsg.data[0:2]
-        value = hex_data.bytes_to_int8(value, 2)
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value[0], value[1]
-        else:
-            return ret, ret
+        def decode(ret, utrc_rmsg):
+            value = utrc_rmsg.data[0:2]
+            value = hex_data.bytes_to_int8(value, 2)
+            if ret == 0 or ret == UTRC_RX_ERROR.STATE:
+                return value[0], value[1]
+            else:
+                return ret, ret
+
+        return self._request(UTRC_RW.R, self.reg.UTRC_INT8_NOW, txdata, decode)
 
     def set_utrc_int8_now(self, line, id, reg, value):
         """Write the 8 - bit register of the device through the utrc protocol
@@ -1306,12 +1779,7 @@ class _ArmApiBase:
         txdata += bytes([reg])
         txdata += bytes([int(value)])
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.UTRC_INT8_NOW, txdata)
-        value = hex_data.bytes_to_int8(utrc_rmsg.data[0])
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value
-        else:
-            return ret
+        return self._request(UTRC_RW.W, self.reg.UTRC_INT8_NOW, txdata, self.__now_ret)
 
     def get_utrc_int32_now(self, line, id, reg):
         """Read the int32 register of the device through the utrc protocol
@@ -1333,14 +1801,7 @@ class _ArmApiBase:
         txdata += bytes([id])
         txdata += bytes([reg])
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.UTRC_INT32_NOW, txdata)
-        value = [0] * 2
-        value[0] = hex_data.bytes_to_int32_big(utrc_rmsg.data[0:4])
-        value[1] = hex_data.bytes_to_int32_big(utrc_rmsg.data[4:8])
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value[0], value[1]
-        else:
-            return ret, ret
+        return self._request(UTRC_RW.R, self.reg.UTRC_INT32_NOW, txdata, self.__int32_pair)
 
     def set_utrc_int32_now(self, line, id, reg, value):
         """Write the int32 register of the device through the utrc protocol
@@ -1363,12 +1824,7 @@ class _ArmApiBase:
         txdata += bytes([reg])
         txdata += hex_data.int32_to_bytes_big(int(value))
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.UTRC_INT32_NOW, txdata)
-        value = hex_data.bytes_to_int8(utrc_rmsg.data[0])
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value
-        else:
-            return ret
+        return self._request(UTRC_RW.W, self.reg.UTRC_INT32_NOW, txdata, self.__now_ret)
 
     def get_utrc_float_now(self, line, id, reg):
         """Read the float register of the device through the utrc protocol
@@ -1390,14 +1846,7 @@ class _ArmApiBase:
         txdata += bytes([id])
         txdata += bytes([reg])
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.UTRC_FP32_NOW, txdata)
-        value = [0] * 2
-        value[0] = hex_data.bytes_to_fp32_big(utrc_rmsg.data[0:4])
-        value[1] = hex_data.bytes_to_fp32_big(utrc_rmsg.data[4:8])
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value[0], value[1]
-        else:
-            return ret, ret
+        return self._request(UTRC_RW.R, self.reg.UTRC_FP32_NOW, txdata, self.__fp32_pair)
 
     def set_utrc_float_now(self, line, id, reg, value):
         """Write the float register of the device through the utrc protocol
@@ -1420,12 +1869,7 @@ class _ArmApiBase:
         txdata += bytes([reg])
         txdata += hex_data.fp32_to_bytes_big(value)
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.UTRC_FP32_NOW, txdata)
-        value = hex_data.bytes_to_int8(utrc_rmsg.data[0])
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value
-        else:
-            return ret
+        return self._request(UTRC_RW.W, self.reg.UTRC_FP32_NOW, txdata, self.__now_ret)
 
     def get_utrc_int8n_now(self, line, id, reg, len):
         """Read the int8s register of the device through the utrc protocol
@@ -1447,13 +1891,29 @@ class _ArmApiBase:
         txdata += bytes([id])
         txdata += bytes([reg])
         txdata += bytes([len])
-        self.reg.UTRC_INT8N_NOW[2] = len + 1
+        cmd_reg = self.reg.UTRC_INT8N_NOW.with_len(r_rx_len=len + 1)
+        return self._request(UTRC_RW.R, cmd_reg, txdata, self.__int8n_value(len + 1))
+
+    def __int8n_value(self, n):
+        def decode(ret, utrc_rmsg):
+            value = utrc_rmsg.data[0:n]
+            value[0] = hex_data.bytes_to_int8(value[0])
+            if ret == 0 or ret == UTRC_RX_ERROR.STATE:
+                return value[0], value[1:n]
+            else:
+                return ret, ret
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.UTRC_INT8N_NOW, txdata)
-        value = utrc_rmsg.data[0 : len + 1]
-        value[0] = hex_data.bytes_to_int8(value[0])
+        return decode
+
+    def __int32_pair(self, ret, utrc_rmsg):
+        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
+            return hex_data.bytes_to_int32_big(utrc_rmsg.data[0:4]), hex_data.bytes_to_int32_big(utrc_rmsg.data[4:8])
+        else:
+            return ret, ret
+
+    def __fp32_pair(self, ret, utrc_rmsg):
         if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value[0], value[1 : len + 1]
+            return hex_data.bytes_to_fp32_big(utrc_rmsg.data[0:4]), hex_data.bytes_to_fp32_big(utrc_rmsg.data[4:8])
         else:
             return ret, ret
 
@@ -1479,9 +1939,10 @@ class _ArmApiBase:
         txdata += bytes([len])
         for i in range(len):
             txdata += bytes([value[i]])
-        self.reg.UTRC_INT8N_NOW[3] = len + 4
+        cmd_reg = self.reg.UTRC_INT8N_NOW.with_len(w_tx_len=len + 4)
+        return self._request(UTRC_RW.W, cmd_reg, txdata, self.__now_ret)
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.UTRC_INT8N_NOW, txdata)
+    def __now_ret(self, ret, utrc_rmsg):
         value = hex_data.bytes_to_int8(utrc_rmsg.data[0])
         if ret == 0 or ret == UTRC_RX_ERROR.STATE:
             return value
@@ -1509,11 +1970,7 @@ class _ArmApiBase:
         txdata += bytes([reg])
         txdata += bytes([int(value)])
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.UTRC_INT8_QUE, txdata)
-        if ret == UTRC_RX_ERROR.STATE:
-            return 0
-        else:
-            return ret
+        return self._sendpend_que(self.reg.UTRC_INT8_QUE, txdata)
 
     def set_utrc_int32_que(self, line, id, reg, value):
         """Write the int32 register of the device through the utrc protocol
@@ -1536,11 +1993,7 @@ class _ArmApiBase:
         txdata += bytes([reg])
         txdata += hex_data.int32_to_bytes_big(int(value))
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.UTRC_INT32_QUE, txdata)
-        if ret == UTRC_RX_ERROR.STATE:
-            return 0
-        else:
-            return ret
+        return self._sendpend_que(self.reg.UTRC_INT32_QUE, txdata)
 
     def set_utrc_float_que(self, line, id, reg, value):
         """Write the float register of the device through the utrc protocol
@@ -1564,11 +2017,7 @@ class _ArmApiBase:
         txdata += bytes([reg])
         txdata += hex_data.fp32_to_bytes_big(value)
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.UTRC_FP32_QUE, txdata)
-        if ret == UTRC_RX_ERROR.STATE:
-            return 0
-        else:
-            return ret
+        return self._sendpend_que(self.reg.UTRC_FP32_QUE, txdata)
 
     def set_utrc_int8n_que(self, line, id, reg, len, value):
         """Write the 8 - bit register of the device through the utrc protocol
@@ -1592,13 +2041,8 @@ class _ArmApiBase:
         txdata += bytes([len])
         for i in range(len):
             txdata += bytes([value[i]])
-        self.reg.UTRC_INT8N_QUE[3] = len + 4
-
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.UTRC_INT8N_QUE, txdata)
-        if ret == UTRC_RX_ERROR.STATE:
-            return 0
-        else:
-            return ret
+        cmd_reg = self.reg.UTRC_INT8N_QUE.with_len(w_tx_len=len + 4)
+        return self._sendpend_que(cmd_reg, txdata)
 
     def set_pass_rs485_now(self, line, timeout_ms, tx_len, rx_len, tx_data):
         """Send data to rs485 bus and receive data
@@ -1618,7 +2062,7 @@ class _ArmApiBase:
             data(list): Data received
         """
         if tx_len > 125 or rx_len > 125:
-            return -991, 0, 0, 0
+            return self._done((-991, 0, 0, 0))
 
         txdata = bytes([line])
         txdata += bytes([timeout_ms])
@@ -1626,16 +2070,8 @@ class _ArmApiBase:
         txdata += bytes([rx_len])
         for i in range(tx_len):
             txdata += bytes([tx_data[i]])
-        self.reg.PASS_RS485_NOW[3] = tx_len + 4
-        self.reg.PASS_RS485_NOW[4] = rx_len + 2
-
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.PASS_RS485_NOW, txdata)
-        value = utrc_rmsg.data[0 : rx_len + 2]
-        value[0] = hex_data.bytes_to_int8(value[0])
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value[0], value[1 : rx_len + 2]
-        else:
-            return ret, ret
+        cmd_reg = self.reg.PASS_RS485_NOW.with_len(w_tx_len=tx_len + 4, w_rx_len=rx_len + 2)
+        return self._request(UTRC_RW.W, cmd_reg, txdata, self.__int8n_value(rx_len + 2))
 
     def set_pass_rs485_que(self, line, tx_len, tx_data):
         """Send data to rs485 bus
@@ -1652,19 +2088,14 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
         """
         if tx_len > 125:
-            return -99
+            return self._done(-99)
 
         txdata = bytes([line])
         txdata += bytes([tx_len])
         for i in range(tx_len):
             txdata += bytes([tx_data[i]])
-        self.reg.PASS_RS485_QUE[3] = tx_len + 2
-
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.PASS_RS485_QUE, txdata)
-        if ret == UTRC_RX_ERROR.STATE:
-            return 0
-        else:
-            return ret
+        cmd_reg = self.reg.PASS_RS485_QUE.with_len(w_tx_len=tx_len + 2)
+        return self._sendpend_que(cmd_reg, txdata)
 
     def get_utrc_u8float_now(self, line, id, reg, num):
         """Read the float list register of the device through the utrc protocol
@@ -1689,14 +2120,7 @@ class _ArmApiBase:
         txdata += bytes([reg])
         txdata += bytes([num])
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.UTRC_U8FP32_NOW, txdata)
-        value = [0] * 2
-        value[0] = hex_data.bytes_to_fp32_big(utrc_rmsg.data[0:4])
-        value[1] = hex_data.bytes_to_fp32_big(utrc_rmsg.data[4:8])
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value[0], value[1]
-        else:
-            return ret, ret
+        return self._request(UTRC_RW.R, self.reg.UTRC_U8FP32_NOW, txdata, self.__fp32_pair)
 
     def set_utrc_u8float_now(self, line, id, reg, num, value):
         """Write the float list register of the device through the utrc protocol
@@ -1722,12 +2146,7 @@ class _ArmApiBase:
         txdata += bytes([num])
         txdata += hex_data.fp32_to_bytes_big(value)
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.W, self.reg.UTRC_U8FP32_NOW, txdata)
-        value = hex_data.bytes_to_int8(utrc_rmsg.data[0])
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value
-        else:
-            return ret
+        return self._request(UTRC_RW.W, self.reg.UTRC_U8FP32_NOW, txdata, self.__now_ret)
 
     def get_utrc_nfloat_now(self, line, id, reg, len):
         """Read the floats register of the device through the utrc protocol
@@ -1749,19 +2168,21 @@ class _ArmApiBase:
         txdata += bytes([id])
         txdata += bytes([reg])
         txdata += bytes([len])
-        self.reg.UTRC_FP32N_NOW[2] = len * 4 + 4
+        cmd_reg = self.reg.UTRC_FP32N_NOW.with_len(r_rx_len=len * 4 + 4)
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.UTRC_FP32N_NOW, txdata)
-        rx_data = hex_data.bytes_to_fp32_big(utrc_rmsg.data, len + 1)
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return rx_data[0], rx_data[1 : len + 1]
-        else:
-            return ret, ret
+        def decode(ret, utrc_rmsg):
+            rx_data = hex_data.bytes_to_fp32_big(utrc_rmsg.data, len + 1)
+            if ret == 0 or ret == UTRC_RX_ERROR.STATE:
+                return rx_data[0], rx_data[1 : len + 1]
+            else:
+                return ret, ret
+
+        return self._request(UTRC_RW.R, cmd_reg, txdata, decode)
 
     ############################################################
     #                       GPIO Api
     ############################################################
-    def __get_gpio_in(self, line, id):
+    def _get_gpio_in(self, line, id):
         """Gets the input value for the GPIO module
 
         Args:
@@ -1781,21 +2202,9 @@ class _ArmApiBase:
 
         txdata = bytes([line])
         txdata += bytes([id])
+        return self._request(UTRC_RW.R, self.reg.GPIO_IN, txdata, self.__gpio_value)
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.GPIO_IN, txdata)
-        value = [0] * 20
-        value[0] = hex_data.bytes_to_int8(utrc_rmsg.data[0])
-        value[1] = hex_data.bytes_to_uint32_big(utrc_rmsg.data[1:5])  # fun
-        value[2] = hex_data.bytes_to_uint32_big(utrc_rmsg.data[5:9])  # digit
-        value[3] = utrc_rmsg.data[9]
-        for i in range(value[3]):
-            value[4 + i] = hex_data.bytes_to_fp32_big(utrc_rmsg.data[(10 + i * 4) : (14 + i * 4)])  # digit
-        if ret == 0 or ret == UTRC_RX_ERROR.STATE:
-            return value[0], value[1:]
-        else:
-            return ret, ret
-
-    def __get_gpio_ou(self, line, id):
+    def _get_gpio_ou(self, line, id):
         """Gets the output value of the GPIO module
 
         Args:
@@ -1815,8 +2224,9 @@ class _ArmApiBase:
 
         txdata = bytes([line])
         txdata += bytes([id])
+        return self._request(UTRC_RW.R, self.reg.GPIO_OU, txdata, self.__gpio_value)
 
-        ret, utrc_rmsg = self.__sendpend(UTRC_RW.R, self.reg.GPIO_OU, txdata)
+    def __gpio_value(self, ret, utrc_rmsg):
         value = [0] * 20
         value[0] = hex_data.bytes_to_int8(utrc_rmsg.data[0])
         value[1] = hex_data.bytes_to_uint32_big(utrc_rmsg.data[1:5])  # fun
@@ -1829,6 +2239,19 @@ class _ArmApiBase:
         else:
             return ret, ret
 
+    def __get_gpio_str(self, line, id, reg, is_hex):
+        def decode(ret, data):
+            if not isinstance(data, list):
+                return ret, ""
+            if is_hex:
+                string = ""
+                for i in data[0:12]:
+                    string += "{0:0>2}".format(str(hex(i))[2:])
+                return ret, string
+            return ret, "".join([chr(x) for x in data[0:12]])
+
+        return self._then(self.get_utrc_int8n_now(line, id, reg[0], reg[2]), decode)
+
     ############################################################
     #                    End-Tool GPIO Api
     ############################################################
@@ -1843,7 +2266,7 @@ class _ArmApiBase:
                 data[2]: dac num
                 data[2 - N]: dac value
         """
-        return self.__get_gpio_in(RS485_LINE.TGPIO, self.tgpio_id)
+        return self._get_gpio_in(RS485_LINE.TGPIO, self.tgpio_id)
 
     def get_tgpio_out(self):
         """Gets the output value of the end - tool GPIO module
@@ -1856,7 +2279,7 @@ class _ArmApiBase:
                 data[2]: adc num
                 data[2 - N]: adc value
         """
-        return self.__get_gpio_ou(RS485_LINE.TGPIO, self.tgpio_id)
+        return self._get_gpio_ou(RS485_LINE.TGPIO, self.tgpio_id)
 
     def set_tgpio_digit_out(self, value):
         """Set the end - tool GPIO module to output digital I / O
@@ -1880,14 +2303,7 @@ class _ArmApiBase:
             uuid(string): The unique code of umbratek products is also a certificate of repair and warranty
                            12 - bit string
         """
-        ret, data = self.get_utrc_int8n_now(RS485_LINE.TGPIO, self.tgpio_id, GPIO_REG.UUID[0], GPIO_REG.UUID[2])
-        print(ret)
-        print(data)
-        uuid = data[0:12]
-        string = ""
-        for i in uuid:
-            string += "{0:0>2}".format(str(hex(i))[2:])
-        return ret, string
+        return self.__get_gpio_str(RS485_LINE.TGPIO, self.tgpio_id, GPIO_REG.UUID, True)
 
     def get_tgpio_sw_version(self):
         """Get the software version of the end - tool GPIO module
@@ -1896,15 +2312,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             version(string): Software version, 12 - bit string
         """
-        ret, data = self.get_utrc_int8n_now(
-            RS485_LINE.TGPIO, self.tgpio_id, GPIO_REG.SW_VERSION[0], GPIO_REG.SW_VERSION[2]
-        )
-        version = data[0:12]
-        print("get_tgpio_sw_version: ")
-        print(version)
-        version = "".join([chr(x) for x in version])
-        print(version)
-        return ret, version
+        return self.__get_gpio_str(RS485_LINE.TGPIO, self.tgpio_id, GPIO_REG.SW_VERSION, False)
 
     def get_tgpio_hw_version(self):
         """Get the hardware version of the end - tool GPIO module
@@ -1913,17 +2321,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             version(string): Hardware version, 12 - bit string
         """
-        ret, data = self.get_utrc_int8n_now(
-            RS485_LINE.TGPIO, self.tgpio_id, GPIO_REG.HW_VERSION[0], GPIO_REG.HW_VERSION[2]
-        )
-        version = data[0:12]
-        print("get_tgpio_hw_version: ")
-        print(version)
-        string = ""
-        for i in version:
-            string += "{0:0>2}".format(str(hex(i))[2:])
-        print(string)
-        return ret, string
+        return self.__get_gpio_str(RS485_LINE.TGPIO, self.tgpio_id, GPIO_REG.HW_VERSION, True)
 
     ############################################################
     #                    Controller GPIO Api
@@ -1939,7 +2337,7 @@ class _ArmApiBase:
                 data[2]: dac num
                 data[2 - N]: dac value
         """
-        return self.__get_gpio_in(RS485_LINE.CGPIO, self.cgpio_id)
+        return self._get_gpio_in(RS485_LINE.CGPIO, self.cgpio_id)
 
     def get_cgpio_out(self):
         """Gets the output value of the controller GPIO module
@@ -1952,7 +2350,7 @@ class _ArmApiBase:
                 data[2]: adc num
                 data[2 - N]: adc value
         """
-        return self.__get_gpio_ou(RS485_LINE.CGPIO, self.cgpio_id)
+        return self._get_gpio_ou(RS485_LINE.CGPIO, self.cgpio_id)
 
     def set_cgpio_digit_out(self, value):
         """Set the controller GPIO module to output digital I / O
@@ -1976,14 +2374,7 @@ class _ArmApiBase:
             uuid(string): The unique code of umbratek products is also a certificate of repair and warranty
                            12 - bit string
         """
-        ret, data = self.get_utrc_int8n_now(RS485_LINE.CGPIO, self.cgpio_id, GPIO_REG.UUID[0], GPIO_REG.UUID[2])
-        print(ret)
-        print(data)
-        uuid = data[0:12]
-        string = ""
-        for i in uuid:
-            string += "{0:0>2}".format(str(hex(i))[2:])
-        return ret, string
+        return self.__get_gpio_str(RS485_LINE.CGPIO, self.cgpio_id, GPIO_REG.UUID, True)
 
     def get_cgpio_sw_version(self):
         """Get the software version of the NTRO Controller
@@ -1992,15 +2383,7 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             version(string): Software version, 12 - bit string
         """
-        ret, data = self.get_utrc_int8n_now(
-            RS485_LINE.CGPIO, self.cgpio_id, GPIO_REG.SW_VERSION[0], GPIO_REG.SW_VERSION[2]
-        )
-        version = data[0:12]
-        print("get_cgpio_sw_version: ")
-        print(version)
-        version = "".join([chr(x) for x in version])
-        print(version)
-        return ret, version
+        return self.__get_gpio_str(RS485_LINE.CGPIO, self.cgpio_id, GPIO_REG.SW_VERSION, False)
 
     def get_cgpio_hw_version(self):
         """Get the hardware version of the NTRO Controller
@@ -2009,14 +2392,4 @@ class _ArmApiBase:
             ret(int): Function execution result code, refer to appendix for code meaning
             version(string): Hardware version, 12 - bit string
         """
-        ret, data = self.get_utrc_int8n_now(
-            RS485_LINE.CGPIO, self.cgpio_id, GPIO_REG.HW_VERSION[0], GPIO_REG.HW_VERSION[2]
-        )
-        version = data[0:12]
-        print("get_cgpio_hw_version: ")
-        print(version)
-        string = ""
-        for i in version:
-            string += "{0:0>2}".format(str(hex(i))[2:])
-        print(string)
-        return ret, string
+        return self.__get_gpio_str(RS485_LINE.CGPIO, self.cgpio_id, GPIO_REG.HW_VERSION, True)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def pose_to_matrix(poses):
+    """[X, Y, Z, Rx, Ry, Rz] (n x 6) -> homogeneous transforms (n x 4 x 4), R = Rz(Rz) * Ry(Ry) * Rx(Rx)"""
+    poses = np.asarray(poses, dtype=np.float64).reshape(-1, 6)
+    cx, cy, cz = np.cos(poses[:, 3]), np.cos(poses[:, 4]), np.cos(poses[:, 5])
+    sx, sy, sz = np.sin(poses[:, 3]), np.sin(poses[:, 4]), np.sin(poses[:, 5])
+    t = np.zeros((len(poses), 4, 4))
+    t[:, 0, 0] = cz * cy
+    t[:, 0, 1] = cz * sy * sx - sz * cx
+    t[:, 0, 2] = cz * sy * cx + sz * sx
+    t[:, 1, 0] = sz * cy
+    t[:, 1, 1] = sz * sy * sx + cz * cx
+    t[:, 1, 2] = sz * sy * cx - cz * sx
+    t[:, 2, 0] = -sy
+    t[:, 2, 1] = cy * sx
+    t[:, 2, 2] = cy * cx
+    t[:, 0:3, 3] = poses[:, 0:3]
+    t[:, 3, 3] = 1
+    return t
+
+
+def matrix_to_pose(t):
+    """Homogeneous transforms (n x 4 x 4) -> [X, Y, Z, Rx, Ry, Rz] (n x 6), the inverse of pose_to_matrix()"""
+    poses = np.empty((len(t), 6))
+    poses[:, 0:3] = t[:, 0:3, 3]
+    poses[:, 3] = np.arctan2(t[:, 2, 1], t[:, 2, 2])
+    poses[:, 4] = np.arctan2(-t[:, 2, 0], np.hypot(t[:, 0, 0], t[:, 1, 0]))
+    poses[:, 5] = np.arctan2(t[:, 1, 0], t[:, 0, 0])
+    return poses
+
+
+def _rot_x(alpha):
+    c, s = np.cos(alpha), np.sin(alpha)
+    return np.array([[1, 0, 0, 0], [0, c, -s, 0], [0, s, c, 0], [0, 0, 0, 1]], dtype=np.float64)
+
+
+def _trans(x, z):
+    t = np.eye(4)
+    t[0, 3] = x
+    t[2, 3] = z
+    return t
+
+
+class ArmKinematics:
+    """
+    Forward/inverse kinematics and joint limit checks of an arm on the host, for n joint vectors at once.
+    Each joint i is T_i = A_i * Rz(q_i + theta_i) * B_i with its dh parameters [theta d alpha a] (mm, rad):
+        standard dh: A_i = I,                    B_i = Tz(d) * Tx(a) * Rx(alpha)
+        modified dh: A_i = Rx(alpha) * Tx(a),    B_i = Tz(d)
+    and the tool pose is T_1 * ... * T_axis * tcp_offset, the same as get_fk() of the controller.
+    Build it from the controller by _ArmApiBase.get_kinematics(), which also checks it against get_fk().
+
+        ret, kin = arm.get_kinematics()
+        poses = kin.fk(joints)                    # (n x axis) -> (n x 6)
+        joints, ok = kin.ik(poses, qnear)         # (n x 6) -> (n x axis), bool (n)
+        ok = kin.is_joint_limit(joints)
+    """
+
+    def __init__(self, dh, tcp_offset=None, modified=False, lower=None, upper=None):
+        """
+        Args:
+            dh (list): [theta d alpha a] of each joint, (axis x 4) [rad mm rad mm]
+            tcp_offset (list, optional): Offset of the tool [mm mm mm rad rad rad]. Defaults to None.
+            modified (bool, optional): dh is modified (Craig) instead of standard dh. Defaults to False.
+            lower (list, optional): Lower limit of each joint [rad]. Defaults to no limit.
+            upper (list, optional): Upper limit of each joint [rad]. Defaults to no limit.
+        """
+        if np is None:
+            raise ImportError("[UbotKin ] ArmKinematics requires numpy, pip install numpy")
+        self.dh = np.asarray(dh, dtype=np.float64).reshape(-1, 4)
+        self.axis = len(self.dh)
+        self.modified = modified
+        self.set_tcp_offset(tcp_offset if tcp_offset is not None else [0] * 6)
+        self.set_joint_limit(lower, upper)
+
+        self._theta = self.dh[:, 0]
+        self._a = np.empty((self.axis, 4, 4))
+        self._b = np.empty((self.axis, 4, 4))
+        for i in range(self.axis):
+            theta, d, alpha, a = self.dh[i]
+            if modified:
+                self._a[i] = _rot_x(alpha).dot(_trans(a, 0))
+                self._b[i] = _trans(0, d)
+            else:
+                self._a[i] = np.eye(4)
+                self._b[i] = _trans(a, d).dot(_rot_x(alpha))
+
+    def set_tcp_offset(self, offset):
+        """Sets the tool offset [mm mm mm rad rad rad], the same as set_tcp_offset() of the controller"""
+        self.tcp_offset = np.asarray(offset, dtype=np.float64).reshape(6)
+        self._tool = pose_to_matrix(self.tcp_offset)[0]
+
+    def set_joint_limit(self, lower=None, upper=None):
+        """Sets the limits [rad] used by is_joint_limit(), None is no limit"""
+        self.lower = np.full(self.axis, -np.inf) if lower is None else np.asarray(lower, dtype=np.float64)
+        self.upper = np.full(self.axis, np.inf) if upper is None else np.asarray(upper, dtype=np.float64)
+
+    def __chain(self, joints):
+        """
+        return: tool transforms (n x 4 x 4), axis z (n x axis x 3) and origin (n x axis x 3) of each joint
+        """
+        num = len(joints)
+        q = joints + self._theta
+        c, s = np.cos(q), np.sin(q)
+        t = np.broadcast_to(np.eye(4), (num, 4, 4))
+        z = np.empty((num, self.axis, 3))
+        p = np.empty((num, self.axis, 3))
+        rz = np.zeros((num, 4, 4))
+        rz[:, 2, 2] = 1
+        rz[:, 3, 3] = 1
+        for i in range(self.axis):
+            t = np.matmul(t, self._a[i])
+            z[:, i] = t[:, 0:3, 2]
+            p[:, i] = t[:, 0:3, 3]
+            rz[:, 0, 0] = c[:, i]
+            rz[:, 0, 1] = -s[:, i]
+            rz[:, 1, 0] = s[:, i]
+            rz[:, 1, 1] = c[:, i]
+            t = np.matmul(np.matmul(t, rz), self._b[i])
+        return np.matmul(t, self._tool), z, p
+
+    def fk_matrix(self, joints):
+        """Forward kinematics, joints (n x axis) [rad] -> tool transforms (n x 4 x 4)"""
+        joints = np.asarray(joints, dtype=np.float64).reshape(-1, self.axis)
+        return self.__chain(joints)[0]
+
+    def fk(self, joints):
+        """Forward kinematics, the same as get_fk() of the controller
+
+        Args:
+            joints (list): Joint positions [rad], (axis) or (n x axis)
+
+        Returns:
+            poses (ndarray): Tool poses [mm mm mm rad rad rad], (6) or (n x 6) as joints
+        """
+        joints = np.asarray(joints, dtype=np.float64)
+        poses = matrix_to_pose(self.fk_matrix(joints))
+        return poses[0] if joints.ndim == 1 else poses
+
+    def ik(self, poses, qnear, max_iter=100, tol_pos=1e-3, tol_rot=1e-5, damping=1.0, max_step=0.2):
+        """Inverse kinematics by damped least squares from qnear, so the solution closest to qnear is found,
+        the same as get_ik() of the controller
+
+        Args:
+            poses (list): Tool poses [mm mm mm rad rad rad], (6) or (n x 6)
+            qnear (list): Start joint positions [rad], (axis) or (n x axis)
+            max_iter (int, optional): Iterations at most. Defaults to 100.
+            tol_pos (float, optional): Position error of a solution [mm]. Defaults to 1e-3.
+            tol_rot (float, optional): Orientation error of a solution [rad]. Defaults to 1e-5.
+            damping (float, optional): Damping [mm], larger is slower but steadier near singularities. Defaults to 1.0.
+            max_step (float, optional): Largest change of a joint in one iteration [rad]. Defaults to 0.2.
+
+        Returns:
+            joints (ndarray): Joint positions [rad], (axis) or (n x axis) as poses
+            ok (ndarray): A solution was found, bool or (n) bool as poses
+        """
+        poses = np.asarray(poses, dtype=np.float64)
+        target = pose_to_matrix(poses)
+        num = len(target)
+        qnear = np.broadcast_to(np.asarray(qnear, dtype=np.float64).reshape(-1, self.axis), (num, self.axis))
+        q = np.array(qnear)
+        # the orientation error is scaled to mm, so position and orientation have about the same weight
+        scale = max(np.abs(self.dh[:, 1:4:2]).sum(), 1.0)
+        eye = np.eye(self.axis) * damping ** 2
+        ok = np.zeros(num, dtype=bool)
+        # only the joint vectors without a solution yet are iterated
+        act = np.arange(num)
+        for _ in range(max_iter + 1):
+            t, z, p = self.__chain(q[act])
+            goal = target[act]
+            err = np.empty((len(act), 6))
+            err[:, 0:3] = goal[:, 0:3, 3] - t[:, 0:3, 3]
+            rot = np.matmul(goal[:, 0:3, 0:3], np.transpose(t[:, 0:3, 0:3], (0, 2, 1)))
+            err[:, 3] = rot[:, 2, 1] - rot[:, 1, 2]
+            err[:, 4] = rot[:, 0, 2] - rot[:, 2, 0]
+            err[:, 5] = rot[:, 1, 0] - rot[:, 0, 1]
+            err[:, 3:6] *= 0.5
+            # err[:, 3:6] is sin(angle) * axis of the orientation error, the trace excludes angles near pi
+            done = (np.linalg.norm(err[:, 0:3], axis=1) < tol_pos) & (np.linalg.norm(err[:, 3:6], axis=1) < tol_rot)
+            done &= np.einsum("nii->n", rot) > 1
+            ok[act[done]] = True
+            keep = ~done
+            act = act[keep]
+            if len(act) == 0:
+                break
+            err = err[keep]
+            err[:, 3:6] *= scale
+            jac = np.empty((len(act), 6, self.axis))
+            jac[:, 0:3] = np.cross(z[keep], t[keep, None, 0:3, 3] - p[keep]).transpose(0, 2, 1)
+            jac[:, 3:6] = z[keep].transpose(0, 2, 1) * scale
+            jt = jac.transpose(0, 2, 1)
+            step = np.linalg.solve(np.matmul(jt, jac) + eye, np.matmul(jt, err[:, :, None]))[:, :, 0]
+            # large steps far from the solution or near singularities are shortened to max_step
+            step *= np.minimum(1, max_step / np.maximum(np.abs(step).max(axis=1), 1e-12))[:, None]
+            q[act] += step
+        # of the equivalent angles q + 2k*pi, the one closest to qnear
+        q = qnear + (q - qnear + np.pi) % (2 * np.pi) - np.pi
+        if poses.ndim == 1:
+            return q[0], bool(ok[0])
+        return q, ok
+
+    def is_joint_limit(self, joints):
+        """Checks if the joints are within the limits of set_joint_limit()
+
+        Args:
+            joints (list): Joint positions [rad], (axis) or (n x axis)
+
+        Returns:
+            value (ndarray): True if within limits, bool or (n) bool as joints
+        """
+        joints = np.asarray(joints, dtype=np.float64)
+        ok = ((joints >= self.lower) & (joints <= self.upper)).all(axis=-1)
+        return bool(ok) if joints.ndim == 1 else ok
+
+    def is_tcp_limit(self, poses, qnear):
+        """Checks if the poses have an ik solution from qnear within the joint limits
+
+        Args:
+            poses (list): Tool poses [mm mm mm rad rad rad], (6) or (n x 6)
+            qnear (list): Start joint positions [rad], (axis) or (n x axis)
+
+        Returns:
+            value (ndarray): True if reachable, bool or (n) bool as poses
+        """
+        joints, ok = self.ik(poses, qnear)
+        return ok & self.is_joint_limit(joints)
+
+    def validate(self, arm, joints):
+        """Compares fk(), ik() and is_joint_limit() with get_fk(), get_ik() and is_joint_limit() of the controller,
+        one request of each per joint vector. With an AsyncUtraApi it returns a coroutine.
+
+        Args:
+            arm (_ArmApiBase): Connection of the arm
+            joints (list): Joint positions to compare at [rad], (n x axis)
+
+        Returns:
+            ret (int): Function execution result code of the last failed request, 0 if all succeeded
+            errors (dict): {"fk_pos", "fk_rot", "ik", "limit"}: largest position [mm], orientation [rad]
+                and joint [rad] error, and the number of different joint limit results.
+                limit is None if no joint limit is set, the limits of the controller are not read from it
+                and an unlimited model would report each of its out-of-limit results as a difference.
+        """
+        joints = np.asarray(joints, dtype=np.float64).reshape(-1, self.axis)
+        return arm._run(self.__validate_steps(arm, joints))
+
+    def __validate_steps(self, arm, joints):
+        t = self.fk_matrix(joints)
+        poses = matrix_to_pose(t)
+        ik_joints, _ = self.ik(poses, joints)
+        limit = self.is_joint_limit(joints)
+        has_limit = np.isfinite(self.lower).any() or np.isfinite(self.upper).any()
+        result = 0
+        errors = {"fk_pos": 0.0, "fk_rot": 0.0, "ik": 0.0, "limit": 0 if has_limit else None}
+        for i in range(len(joints)):
+            ret, pose = yield arm.get_fk(list(joints[i]))
+            if ret != 0:
+                result = ret
+                continue
+            t_ctrl = pose_to_matrix(pose)[0]
+            cos_err = (np.trace(t_ctrl[0:3, 0:3].T.dot(t[i, 0:3, 0:3])) - 1) / 2
+            errors["fk_pos"] = max(errors["fk_pos"], float(np.linalg.norm(t_ctrl[0:3, 3] - t[i, 0:3, 3])))
+            errors["fk_rot"] = max(errors["fk_rot"], float(np.arccos(np.clip(cos_err, -1, 1))))
+
+            ret, q = yield arm.get_ik(list(poses[i]), list(joints[i]))
+            if ret == 0:
+                errors["ik"] = max(errors["ik"], float(np.abs(np.asarray(q) - ik_joints[i]).max()))
+            else:
+                result = ret
+
+            if not has_limit:
+                continue
+            ret, value = yield arm.is_joint_limit(list(joints[i]))
+            if ret == 0:
+                errors["limit"] += int(bool(value) != bool(limit[i]))
+            else:
+                result = ret
+        return result, errors
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class ArmReportStatusBuffer:
+    """
+    Fixed-size ring buffer of every decoded status report frame, stamped with the monotonic receive time.
+    The reader gets contiguous numpy arrays, oldest frame first:
+        t (float64), seq (int64), motion_status, motion_mode, mt_brake, mt_able, err_code, war_code, cmd_num,
+        joint (n x axis), pose (n x 6), tau (n x axis)
+    seq is the number of the frame since the buffer was created, a jump in seq means frames were overwritten.
+    """
+
+    FIELDS = ("motion_status", "motion_mode", "mt_brake", "mt_able", "err_code", "war_code", "cmd_num")
+
+    def __init__(self, axis, size=1000):
+        if np is None:
+            raise ImportError("[UbotRBuf] ArmReportStatusBuffer requires numpy, pip install numpy")
+        self.axis = axis
+        self.size = size
+        self.count = 0
+        self.mutex = threading.Lock()
+
+        self.t = np.zeros(size, dtype=np.float64)
+        self.seq = np.zeros(size, dtype=np.int64)
+        self.motion_status = np.zeros(size, dtype=np.uint8)
+        self.motion_mode = np.zeros(size, dtype=np.uint8)
+        self.mt_brake = np.zeros(size, dtype=np.uint32)
+        self.mt_able = np.zeros(size, dtype=np.uint32)
+        self.err_code = np.zeros(size, dtype=np.uint8)
+        self.war_code = np.zeros(size, dtype=np.uint8)
+        self.cmd_num = np.zeros(size, dtype=np.uint16)
+        self.joint = np.zeros((size, axis), dtype=np.float64)
+        self.pose = np.zeros((size, 6), dtype=np.float64)
+        self.tau = np.zeros((size, axis), dtype=np.float64)
+
+    def append(self, t, frame):
+        """Appends one frame
+
+        Args:
+            t (float): Receive time, time.monotonic()
+            frame (tuple): The frame unpacked by the Struct "<HBBBIIBBH{axis}f6f{axis}f"
+        """
+        axis = self.axis
+        j = 9 + axis
+        with self.mutex:
+            i = self.count % self.size
+            self.t[i] = t
+            self.seq[i] = self.count
+            self.motion_status[i] = frame[2]
+            self.motion_mode[i] = frame[3]
+            self.mt_brake[i] = frame[4]
+            self.mt_able[i] = frame[5]
+            self.err_code[i] = frame[6]
+            self.war_code[i] = frame[7]
+            self.cmd_num[i] = frame[8]
+            self.joint[i] = frame[9:j]
+            self.pose[i] = frame[j:j + 6]
+            self.tau[i] = frame[j + 6:j + 6 + axis]
+            self.count += 1
+
+    def last(self, n):
+        """Gets the last n frames
+
+        Returns:
+            data (dict): {name: array}, the arrays have min(n, available) rows
+        """
+        with self.mutex:
+            return self.__take(self.count - n)
+
+    def since(self, cursor):
+        """Gets all frames appended since a cursor
+
+        Args:
+            cursor (int): 0 for everything in the buffer, else the cursor returned by the previous call
+
+        Returns:
+            data (dict): {name: array}, the frames with seq >= cursor that are still in the buffer
+            cursor (int): Cursor for the next call
+        """
+        with self.mutex:
+            return self.__take(cursor), self.count
+
+    def __take(self, start):
+        start = max(start, self.count - self.size, 0)
+        index = np.arange(start, self.count) % self.size
+        data = {"t": self.t[index], "seq": self.seq[index]}
+        for name in self.FIELDS:
+            data[name] = getattr(self, name)[index]
+        data["joint"] = self.joint[index]
+        data["pose"] = self.pose[index]
+        data["tau"] = self.tau[index]
+        return data
@@ -8,14 +8,19 @@
 # =============================================================================
 import struct
 import threading
+from utapi.base.arm_report_notify import _ArmReportNotify
 from utapi.common import print_msg
 from utapi.common.socket_tcp import SocketTcp
 
 
-class ArmReportConfig(threading.Thread):
-    def __init__(self, ip, port=30003):
+class ArmReportConfigParser(_ArmReportNotify):
+    """
+    Decodes the config report of the arm, it does not own a connection.
+    Consumers wait for frames with wait_next() or subscribe() instead of polling is_update().
+    """
 
-        self.__is_err = 0
+    def __init__(self):
+        self._init_notify()
         self.__rxcnt = 0
         self.__is_update = 0
 
@@ -31,30 +36,12 @@ class ArmReportConfig(threading.Thread):
         self.collis_sens = 0
         self.teach_sens = 0
 
-        self.__socekt_fp = SocketTcp(ip, port, -1, 32)
-        if self.__socekt_fp.is_error() != 0:
-            print("[UbotRConf] Error: SocketTcp failed, ip: %s, port: %d" % (ip, port))
-            return -1
-        print("[UbotRConf] Tcp Report Status connection successful")
+    def put(self, rx_data):
+        if rx_data == -1 or len(rx_data) <= 5:
+            return
 
-        threading.Thread.__init__(self)
-        self.daemon = True
-        self.start()
-
-    def run(self):
-        while self.__is_err == 0:
-            rx_data = self.__socekt_fp.read()
-            if rx_data == -1 or len(rx_data) <= 5:
-                continue
-
-            self.__rxcnt += 1
-            self.flush_data(rx_data)
-
-    def close(self):
-        self.__is_err = 0
-
-    def is_err(self):
-        return self.__is_err
+        self.__rxcnt += 1
+        self.flush_data(rx_data)
 
     def flush_data(self, rx_data):
         if len(rx_data) % 80 != 0:
@@ -77,6 +64,7 @@ class ArmReportConfig(threading.Thread):
         self.collis_sens = temp1[20]
         self.teach_sens = temp1[21]
         self.__is_update = 1
+        self._notify()
 
     def is_update(self):
         """Query whether the automatically reported data has been updated
@@ -104,3 +92,30 @@ class ArmReportConfig(threading.Thread):
         print_msg.nvect_03f("tcp_load   = ", self.tcp_load, 4)
         print_msg.nvect_03f("gravity_dir= ", self.gravity_dir, 3)
         print("")
+
+
+class ArmReportConfig(ArmReportConfigParser, threading.Thread):
+    def __init__(self, ip, port=30003):
+        ArmReportConfigParser.__init__(self)
+        self.__is_err = 0
+
+        self.__socekt_fp = SocketTcp(ip, port, -1, 32)
+        if self.__socekt_fp.is_error() != 0:
+            print("[UbotRConf] Error: SocketTcp failed, ip: %s, port: %d" % (ip, port))
+            return -1
+        print("[UbotRConf] Tcp Report Status connection successful")
+
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.start()
+
+    def run(self):
+        while self.__is_err == 0:
+            rx_data = self.__socekt_fp.read()
+            self.put(rx_data)
+
+    def close(self):
+        self.__is_err = 0
+
+    def is_err(self):
+        return self.__is_err
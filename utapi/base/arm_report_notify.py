@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import asyncio
+import threading
+
+
+class ArmReportSubscription:
+    """
+    One consumer of a report. It has its own cursor, so several consumers do not take updates from each other
+    as they do with the read-and-clear is_update().
+
+        sub = report.subscribe()
+        while sub.wait_next(1):
+            print(report.joint)
+
+    or in a coroutine:
+
+        async for report in report.subscribe():
+            print(report.joint)
+
+    missed counts the frames that were decoded while the consumer was busy.
+    """
+
+    def __init__(self, report):
+        self.report = report
+        self.cursor = report.seq
+        self.missed = 0
+        self.__loop = None
+        self.__event = None
+
+    def wait_next(self, timeout_s=None):
+        """Blocks until a frame newer than the cursor of this subscription is decoded
+
+        Args:
+            timeout_s (float, optional): None waits forever. Defaults to None.
+
+        Returns:
+            bool: True if there is a new frame, False on timeout
+        """
+        return self.__advance(self.report._wait_seq(self.cursor, timeout_s))
+
+    def __advance(self, seq):
+        if seq <= self.cursor:
+            return False
+        self.missed += seq - self.cursor - 1
+        self.cursor = seq
+        return True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.__event is None:
+            self.__loop = asyncio.get_event_loop()
+            self.__event = asyncio.Event()
+            self.report._add_waiter(self.__loop, self.__event)
+        while True:
+            self.__event.clear()
+            if self.__advance(self.report.seq):
+                return self.report
+            await self.__event.wait()
+
+    def close(self):
+        """Stops waking the async iterator of this subscription"""
+        if self.__event is not None:
+            self.report._remove_waiter(self.__loop, self.__event)
+            self.__event = None
+
+
+class _ArmReportNotify:
+    """
+    Wakes the consumers of a report parser when a frame is decoded, without polling.
+    self.seq is the number of frames decoded so far.
+    """
+
+    def _init_notify(self):
+        self.seq = 0
+        self.__cond = threading.Condition()
+        self.__waiters = []
+
+    def _notify(self):
+        with self.__cond:
+            self.seq += 1
+            self.__cond.notify_all()
+            waiters = list(self.__waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # the event loop of the subscriber was closed
+                self._remove_waiter(loop, event)
+
+    def _wait_seq(self, cursor, timeout_s):
+        with self.__cond:
+            self.__cond.wait_for(lambda: self.seq > cursor, timeout_s)
+            return self.seq
+
+    def _add_waiter(self, loop, event):
+        with self.__cond:
+            self.__waiters.append((loop, event))
+
+    def _remove_waiter(self, loop, event):
+        with self.__cond:
+            if (loop, event) in self.__waiters:
+                self.__waiters.remove((loop, event))
+
+    def subscribe(self):
+        """Creates a subscription with its own cursor, see ArmReportSubscription
+
+        Returns:
+            ArmReportSubscription: wait_next(timeout_s) blocks until the next frame, async for iterates the frames
+        """
+        return ArmReportSubscription(self)
+
+    def wait_next(self, timeout_s=None):
+        """Blocks until the next frame is decoded
+
+        Args:
+            timeout_s (float, optional): None waits forever. Defaults to None.
+
+        Returns:
+            bool: True if a new frame was decoded, False on timeout
+        """
+        seq = self.seq
+        return self._wait_seq(seq, timeout_s) > seq
@@ -8,18 +8,56 @@
 # =============================================================================
 import struct
 import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utapi.base.arm_report_buffer import ArmReportStatusBuffer
+from utapi.base.arm_report_notify import _ArmReportNotify
 from utapi.common import print_msg
 from utapi.common.socket_tcp import SocketTcp
 import logging
 
-
-class ArmReportStatus(threading.Thread):
-    def __init__(self, ip, port, irq_fun=0):
-        self.__is_err = 0
+# header "<HBBBIIBBH" (17 bytes) + joint[axis] + pose[6] + tau[axis], one Struct per axis count
+_FRAME_STRUCT = {}
+
+
+def _frame_struct(axis):
+    frame = _FRAME_STRUCT.get(axis)
+    if frame is None:
+        frame = struct.Struct("<HBBBIIBBH%df6f%df" % (axis, axis))
+        _FRAME_STRUCT[axis] = frame
+    return frame
+
+
+class ArmReportStatusParser(_ArmReportNotify):
+    """
+    Decodes the status report of the arm, it does not own a connection.
+    ArmReportStatus feeds it from its own thread, UtraFleet from an event loop.
+    With buffer_size > 0 every frame is also kept in self.buffer (ArmReportStatusBuffer, requires numpy).
+    Consumers wait for frames with wait_next() or subscribe() instead of polling is_update().
+    The attributes are updated one after the other by the receive thread, another thread can read joint, pose
+    and tau of two different frames. snapshot() returns the values of one frame.
+    """
+
+    def __init__(self, irq_fun=0, buffer_size=0):
+        # the buffer is created in the receive thread with the first frame, fail here instead
+        if buffer_size > 0 and np is None:
+            raise ImportError("[UbotRStat] buffer_size > 0 requires numpy, pip install numpy")
+        self._init_notify()
         self.__rxcnt = 0
         self.__is_update = 0
+        self.__rxbuf = b""
         self.frame_len = 0
+        self.frame = None
         self.irq_fun = irq_fun
+        self.buffer_size = buffer_size
+        self.buffer = None
+        # unpacked tuple of the last frame, replaced as a whole by each frame
+        self.__frame_data = None
 
         self.axis = 0
         self.motion_status = 0
@@ -33,86 +71,81 @@ class ArmReportStatus(threading.Thread):
         self.pose = [0] * 6
         self.tau = [0] * 32
 
-        self.__socekt_fp = SocketTcp(ip, port, -1, 32)
-        if self.__socekt_fp.is_error() != 0:
-            logging.error("[UbotRStat] Error: SocketTcp failed, ip: %s, port: %d" % (ip, port))
-            return -1
-        print("[UbotRStat] Tcp Report Status connection successful")
-
-        threading.Thread.__init__(self)
-        self.daemon = True
-        self.start()
-
-    def run(self):
-
-        while self.__is_err == 0:
-            rx_data = self.__socekt_fp.read()
-            if rx_data == -1 or len(rx_data) <= 41:
-                continue
-
-            if self.axis == 0:
-                if len(rx_data) == (41 + 3 * 8):
-                    self.axis = 3
-                    self.frame_len = 17 + self.axis * 4 + 6 * 4 + self.axis * 4
-                if len(rx_data) == (41 + 4 * 8):
-                    self.axis = 4
-                    self.frame_len = 17 + self.axis * 4 + 6 * 4 + self.axis * 4
-                if len(rx_data) == (41 + 5 * 8):
-                    self.axis = 5
-                    self.frame_len = 17 + self.axis * 4 + 6 * 4 + self.axis * 4
-                if len(rx_data) == (41 + 6 * 8):
-                    self.axis = 6
-                    self.frame_len = 17 + self.axis * 4 + 6 * 4 + self.axis * 4
-                if len(rx_data) == (41 + 7 * 8):
-                    self.axis = 7
-                    self.frame_len = 17 + self.axis * 4 + 6 * 4 + self.axis * 4
-            if self.axis > 0:
-                self.__rxcnt += 1
-                self.flush_data(rx_data)
-
-        if self.__socekt_fp:
-            self.__socekt_fp.close()
-            print("ubot report status close")
-
-    def close(self):
-        self.__is_err = -1
-
-    def is_err(self):
-        return self.__is_err
-
-    def flush_data(self, rx_data):
-        if len(rx_data) % self.frame_len != 0:
-            print("[UbotRStat] Error: rx_data len = %d" % len(rx_data))
-            # self.__is_err = 1
+    def put(self, rx_data):
+        if rx_data == -1:
             return
 
-        k = (int)(len(rx_data) / self.frame_len) - 1
-        k *= self.frame_len
+        if self.axis == 0:
+            if len(rx_data) <= 41:
+                return
+            for axis in range(3, 8):
+                if len(rx_data) == (41 + axis * 8):
+                    self.axis = axis
+                    self.frame = _frame_struct(axis)
+                    self.frame_len = self.frame.size
+                    if self.buffer_size > 0:
+                        self.buffer = ArmReportStatusBuffer(axis, self.buffer_size)
+        if self.axis > 0:
+            self.__rxcnt += 1
+            self.flush_data(rx_data)
 
-        temp1 = struct.unpack("<HBBBIIBBH", rx_data[k:k + 17])
-        axis = temp1[1]
+    def flush_data(self, rx_data):
+        t = time.monotonic()
+        # a frame split by the tcp stream is completed by the next recv
+        if len(self.__rxbuf) > 0:
+            rx_data = self.__rxbuf + rx_data
+        end = len(rx_data) - len(rx_data) % self.frame_len
+        self.__rxbuf = rx_data[end:]
+
+        # every frame of a coalesced recv is decoded, the attributes hold the last one
+        for k in range(0, end, self.frame_len):
+            if self.__decode(rx_data, k, t) != 0:
+                self.__rxbuf = b""
+                return
+
+    def __decode(self, rx_data, k, t):
+        # the whole frame in one call, the values are copied into the joint/pose/tau lists
+        temp = self.frame.unpack_from(rx_data, k)
+        axis = temp[1]
         if self.axis != axis:
             print("[UbotRStat] Error: axis = %d %d" % (axis, self.axis))
             # self.__is_err = 1
-            return
-        self.motion_status = temp1[2]
-        self.motion_mode = temp1[3]
-        self.mt_brake = temp1[4]
-        self.mt_able = temp1[5]
-        self.err_code = temp1[6]
-        self.war_code = temp1[7]
-        self.cmd_num = temp1[8]
-        for i in range(self.axis):
-            j1 = k + i * 4 + 17
-            j2 = j1 + self.axis * 4
-            j3 = j2 + 6 * 4
-            self.joint[i] = struct.unpack("<f", rx_data[j1:j1 + 4])[0]
-            if i < 6:
-                self.pose[i] = struct.unpack("<f", rx_data[j2:j2 + 4])[0]
-            self.tau[i] = struct.unpack("<f", rx_data[j3:j3 + 4])[0]
+            return -1
+        self.motion_status = temp[2]
+        self.motion_mode = temp[3]
+        self.mt_brake = temp[4]
+        self.mt_able = temp[5]
+        self.err_code = temp[6]
+        self.war_code = temp[7]
+        self.cmd_num = temp[8]
+        j = 9 + axis
+        self.joint[0:axis] = temp[9:j]
+        self.pose[0:6] = temp[j:j + 6]
+        self.tau[0:axis] = temp[j + 6:j + 6 + axis]
+        self.__frame_data = temp
+        if self.buffer is not None:
+            self.buffer.append(t, temp)
         self.__is_update = 1
+        self._notify()
         if self.irq_fun != 0:
             self.irq_fun.irq_run(self)
+        return 0
+
+    def snapshot(self):
+        """Get the values of the last reported frame, all of them from the same frame
+
+        Returns:
+            dict: {"motion_status", "motion_mode", "mt_brake", "mt_able", "err_code", "war_code", "cmd_num",
+                   "joint", "pose", "tau"}, joint and tau have axis values, None if no frame was received yet
+        """
+        temp = self.__frame_data
+        if temp is None:
+            return None
+        axis = temp[1]
+        j = 9 + axis
+        return {"motion_status": temp[2], "motion_mode": temp[3], "mt_brake": temp[4], "mt_able": temp[5],
+                "err_code": temp[6], "war_code": temp[7], "cmd_num": temp[8],
+                "joint": list(temp[9:j]), "pose": list(temp[j:j + 6]), "tau": list(temp[j + 6:j + 6 + axis])}
 
     def is_update(self):
         """Query whether the automatically reported data has been updated
@@ -139,3 +172,35 @@ class ArmReportStatus(threading.Thread):
         print_msg.nvect_03f("pose    = ", self.pose, 6)
         print_msg.nvect_03f("tau     = ", self.tau, self.axis)
         print("")
+
+
+class ArmReportStatus(ArmReportStatusParser, threading.Thread):
+    def __init__(self, ip, port, irq_fun=0, buffer_size=0):
+        ArmReportStatusParser.__init__(self, irq_fun, buffer_size)
+        self.__is_err = 0
+
+        self.__socekt_fp = SocketTcp(ip, port, -1, 32)
+        if self.__socekt_fp.is_error() != 0:
+            logging.error("[UbotRStat] Error: SocketTcp failed, ip: %s, port: %d" % (ip, port))
+            return -1
+        print("[UbotRStat] Tcp Report Status connection successful")
+
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.start()
+
+    def run(self):
+
+        while self.__is_err == 0:
+            rx_data = self.__socekt_fp.read()
+            self.put(rx_data)
+
+        if self.__socekt_fp:
+            self.__socekt_fp.close()
+            print("ubot report status close")
+
+    def close(self):
+        self.__is_err = -1
+
+    def is_err(self):
+        return self.__is_err
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import json
+import os
+import time
+
+from utapi.base.servo_reg import SERVO_REG
+from utapi.common import hex_data
+from utapi.common.utrc import UTRC_RW, UTRC_RX_ERROR
+from utapi.common.utcc import UtccType, UTCC_RX_ERROR
+
+# UUID, SW_VERSION and HW_VERSION have the same registers on all devices (SERVO_REG and GPIO_REG)
+_PROBE_REG = SERVO_REG.UUID
+
+
+class BusScanner:
+    CACHE_PATH = os.path.join(os.path.expanduser("~"), ".utapi", "bus_scan.json")
+
+    def __init__(self, api, cache_path=None):
+        """Finds the devices on the RS485/CAN bus of a connection.
+
+            adra = AdraApiTcp("192.168.1.168")
+            devices = BusScanner(adra).scan()
+            for dev in devices:
+                print(dev["id"], dev["uuid"], dev["sw_version"], dev["type"])
+
+        1. One broadcast CPVT_CURRENT read (UTRC buses only) finds the actuators, all of them answer it at once.
+           Note that it clears the number of received write broadcasts of the actuators.
+        2. The ids that did not answer are probed with a UUID read and a short timeout, one after the other,
+           because two devices answering at the same time collide on a half-duplex bus.
+        3. The found devices are asked for their versions.
+        The result is saved in ~/.utapi/bus_scan.json for the bus type and port of the connection.
+
+        Args:
+            api (AdraApiBase or CgpioApiBase): Connection of the bus, its connected id is restored after a scan
+            cache_path (string, optional): File of the cache. Defaults to ~/.utapi/bus_scan.json.
+        """
+        self.DB_FLG = "[BusScan ] "
+        self.api = api
+        self.cache_path = cache_path if cache_path is not None else self.CACHE_PATH
+        self.key = self.__bus_key()
+
+    def __bus_key(self):
+        socket_fp = self.api.socket_fp
+        port = getattr(socket_fp, "addr", None)
+        if port is None and hasattr(socket_fp, "com"):
+            port = getattr(socket_fp.com, "port", None) or getattr(socket_fp.com, "name", None)
+        if port is None and hasattr(socket_fp, "fp"):
+            try:
+                port = socket_fp.fp.getpeername()
+            except OSError:
+                port = None
+        if isinstance(port, tuple):
+            port = "%s:%d" % port[0:2]
+        return "%s %s %s" % (type(self.api.tx_data).__name__, type(socket_fp).__name__, port)
+
+    def scan(self, ids=range(1, 126), timeout_s=0.02, broadcast=True, use_cache=False):
+        """Scans the bus
+
+        Args:
+            ids (iterable, optional): IDs to look for. Defaults to 1..125.
+            timeout_s (float, optional): Timeout of the probe of one id. Defaults to 0.02.
+            broadcast (bool, optional): Find the actuators with one broadcast read first. Defaults to True.
+            use_cache (bool, optional): Only check the devices of the cache, and scan all ids if one of them
+                does not answer. Defaults to False.
+
+        Returns:
+            devices (list): {"id", "uuid", "sw_version", "hw_version", "type"} of each device, in ascending order of id.
+                type is "servo" for the devices that answered the broadcast read, else "unknown".
+        """
+        if use_cache:
+            cached = self.load()
+            if cached:
+                devices = self.__scan([dev["id"] for dev in cached], timeout_s, broadcast)
+                if [dev["uuid"] for dev in devices] == [dev["uuid"] for dev in cached]:
+                    return devices
+
+        devices = self.__scan(ids, timeout_s, broadcast)
+        self.save(devices)
+        return devices
+
+    def __scan(self, ids, timeout_s, broadcast):
+        ids = sorted(set(ids))
+        if len(ids) == 0:
+            return []
+        servos = set()
+        if broadcast and hasattr(self.api, "_gather_current") and hasattr(self.api.bus_client, "gather"):
+            ret, values = self.api._gather_current(SERVO_REG.CPVT_CURRENT, ids[0], ids[-1], 0.2)
+            for i in range(len(ret)):
+                if ret[i] == 0 or ret[i] == UTRC_RX_ERROR.STATE:
+                    servos.add(ids[0] + i)
+
+        devices = []
+        api = self.api
+        with api.mutex:
+            id = api.id
+            virid = api.virid
+            for dev_id in ids:
+                api._connect_to_id(dev_id)
+                uuid = self.__read(_PROBE_REG, "hex", timeout_s if dev_id not in servos else 10 * timeout_s)
+                if uuid is None:
+                    continue
+                devices.append({
+                    "id": dev_id,
+                    "uuid": uuid,
+                    "sw_version": self.__read(SERVO_REG.SW_VERSION, "str", 10 * timeout_s),
+                    "hw_version": self.__read(SERVO_REG.HW_VERSION, "hex", 10 * timeout_s),
+                    "type": "servo" if dev_id in servos else "unknown",
+                })
+            api._connect_to_id(id, virid)
+        return devices
+
+    def __read(self, reg, kind, timeout_s):
+        deadline = time.monotonic() + timeout_s
+        self.api._send(UTRC_RW.R, reg, None)
+        ret, bus_rmsg = self.api._pend(UTRC_RW.R, reg, timeout_s)
+        # a late reply of the previously probed id is skipped, the clients report it with different codes
+        id_err = UTCC_RX_ERROR.ID if isinstance(self.api.tx_data, UtccType) else UTRC_RX_ERROR.M_ID
+        while ret == id_err and time.monotonic() < deadline:
+            ret, bus_rmsg = self.api._pend(UTRC_RW.R, reg, deadline - time.monotonic())
+        if ret != 0 and ret != UTRC_RX_ERROR.STATE:
+            return None
+        return hex_data.bytes_to_value(bus_rmsg.data, kind, reg[2])
+
+    def load(self):
+        """Gets the devices of the last scan of this bus from the cache
+
+        Returns:
+            devices (list): The same as scan(), None if this bus is not in the cache
+        """
+        entry = self.__load_file().get(self.key)
+        if entry is None:
+            return None
+        return entry["devices"]
+
+    def save(self, devices):
+        """Saves the devices of this bus in the cache"""
+        cache = self.__load_file()
+        cache[self.key] = {"time": time.time(), "devices": devices}
+        try:
+            folder = os.path.dirname(self.cache_path)
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w") as fp:
+                json.dump(cache, fp, indent=1)
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, TypeError, ValueError) as err:
+            print(self.DB_FLG + "Error: save cache %s, %s" % (self.cache_path, err))
+
+    def __load_file(self):
+        try:
+            with open(self.cache_path, "r") as fp:
+                cache = json.load(fp)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict):
+            return {}
+        return cache
@@ -7,9 +7,17 @@
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
 import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from utapi.base.servo_reg import SERVO_REG
 from utapi.common import hex_data
+from utapi.common.param_cache import ParamCache
+from utapi.common.rtt_estimator import RttEstimator
 from utapi.common.utrc import UTRC_RW, UTRC_RX_ERROR
 
 
@@ -22,6 +30,13 @@ class _ServoApiBase:
         self.tx_data = tx_data
         self.__is_err = 0
 
+        # reply timeout of the device, adaptive reads use the rto of self.rtt instead
+        self.timeout_s = 1
+        self.adaptive = False
+        self.retries = 0
+        self.rtt = RttEstimator(rto_max=self.timeout_s)
+        self.param_cache = None
+
         id = 1
         self.id = id
         self.virid = id
@@ -36,7 +51,7 @@ class _ServoApiBase:
         self.tx_data.id = self.id
         self.tx_data.slave_id = self.id
 
-    def _send(self, rw, cmd, cmd_data, len_tx=0):
+    def _send(self, rw, cmd, cmd_data, len_tx=0, flush=True):
         if self.__is_err:
             return 0
 
@@ -55,28 +70,202 @@ class _ServoApiBase:
             self.tx_data.data[i] = cmd_data[i]
 
         # self.tx_data.print_pack()
-        self.bus_client.send(self.tx_data)
+        self.bus_client.send(self.tx_data, flush)
 
-    def _pend(self, rw, cmd, timeout_s=1):
+    def _pend(self, rw, cmd, timeout_s=None):
         if self.__is_err:
             return -999, self.tx_data
 
+        if timeout_s is None:
+            timeout_s = self.timeout_s
         if rw == UTRC_RW.R:
             data_rlen = cmd[2]
         else:
             data_rlen = cmd[4]
         return self.bus_client.pend(self.tx_data, data_rlen, timeout_s)
 
-    def __sendpend(self, rw, reg, tx_data):
+    def _set_timeout(self, timeout_s=1, adaptive=False, retries=0):
+        self.timeout_s = timeout_s
+        self.adaptive = adaptive
+        self.retries = retries
+        self.rtt.rto_max = timeout_s
+        self.rtt.rto = min(self.rtt.rto, timeout_s)
+        return 0
+
+    # configuration registers of the parameter cache, their read reply has the same layout as their write data
+    _PARAM_CACHE_REG = (
+        "MECH_RATIO", "ELEC_RATIO", "MOTION_DIR", "IWDG_CYC", "TEMP_LIMIT", "VOLT_LIMIT", "CURR_LIMIT", "BRAKE_DELAY",
+        "POS_LIMIT_MAX", "POS_LIMIT_MIN", "POS_LIMIT_DIFF", "POS_PIDP", "POS_SMOOTH_CYC",
+        "VEL_LIMIT_MAX", "VEL_LIMIT_MIN", "VEL_LIMIT_DIFF", "VEL_PIDP", "VEL_PIDI", "VEL_SMOOTH_CYC",
+        "TAU_LIMIT_MAX", "TAU_LIMIT_MIN", "TAU_LIMIT_DIFF", "TAU_PIDP", "TAU_PIDI", "TAU_SMOOTH_CYC",
+    )
+
+    def _set_param_cache(self, enable=True):
+        if enable:
+            self.param_cache = ParamCache(getattr(SERVO_REG, name)[0] for name in self._PARAM_CACHE_REG)
+        else:
+            self.param_cache = None
+        return 0
+
+    def _refresh_param_cache(self):
+        if self.param_cache is None:
+            return 0
+        self.param_cache.clear(self.id)
+        ret = 0
+        for name in self._PARAM_CACHE_REG:
+            ret_i, bus_rmsg = self.__sendpend(UTRC_RW.R, getattr(SERVO_REG, name), None)
+            if ret == 0 and ret_i != 0:
+                ret = ret_i
+        return ret
+
+    def _get_param_cache_stats(self):
+        if self.param_cache is None:
+            return None
+        stats = self.param_cache.stats()
+        names = dict((getattr(SERVO_REG, name)[0], name) for name in self._PARAM_CACHE_REG)
+        stats["dirty"] = [(dev, names[cmd]) for dev, cmd in stats["dirty"]]
+        return stats
+
+    def __param_cache_get(self, rw, reg):
+        """return: the reply from the parameter cache, None if it must be requested from the device"""
+        cache = self.param_cache
+        cmd = reg[0]
+        if rw == UTRC_RW.R:
+            if cmd not in cache.cmds:
+                return None
+            data = cache.get(self.id, cmd)
+            if data is None:
+                return None
+            bus_rmsg = type(self.tx_data)()
+            bus_rmsg.data[0:len(data)] = data
+            bus_rmsg.len = len(data) + 1
+            return 0, bus_rmsg
+
+        # a broadcast write changes the registers of all devices
+        dev = None if self.id == 0x55 else self.id
+        if cmd in cache.cmds:
+            cache.drop(dev, cmd)
+        elif cmd in (SERVO_REG.RESET_ERR[0], SERVO_REG.REBOOT_DRIVER[0], SERVO_REG.ERASE_PARM[0], SERVO_REG.COM_ID[0]):
+            cache.clear(dev)
+        return None
+
+    def __param_cache_put(self, rw, reg, tx_data, ret, bus_rmsg):
+        cache = self.param_cache
+        cmd = reg[0]
+        if ret != 0:
+            return
+        if rw == UTRC_RW.W and cmd == SERVO_REG.SAVED_PARM[0]:
+            cache.saved(None if self.id == 0x55 else self.id)
+        elif cmd in cache.cmds and self.id != 0x55:
+            if rw == UTRC_RW.R:
+                cache.put(self.id, cmd, bus_rmsg.data[0:reg[2]])
+            else:
+                cache.put(self.id, cmd, tx_data[0:reg[3]], True)
+
+    def __sendpend(self, rw, reg, tx_data, timeout_s=None):
+        if self.param_cache is not None:
+            cached = self.__param_cache_get(rw, reg)
+            if cached is not None:
+                return cached
+        ret, bus_rmsg = self.__sendpend_bus(rw, reg, tx_data, timeout_s)
+        if self.param_cache is not None:
+            self.__param_cache_put(rw, reg, tx_data, ret, bus_rmsg)
+        return ret, bus_rmsg
+
+    def __sendpend_bus(self, rw, reg, tx_data, timeout_s=None):
+        # reads are idempotent, so only they are retransmitted and only their round trip time is measured
+        is_read = (rw == UTRC_RW.R)
+        tries = 1 + self.retries if is_read else 1
         self.mutex.acquire()
-        self._send(rw, reg, tx_data)
-        ret, bus_rmsg = self._pend(rw, reg)
+        for i in range(tries):
+            if timeout_s is not None:
+                timeout = timeout_s
+            elif self.adaptive and is_read:
+                timeout = self.rtt.rto
+            else:
+                timeout = self.timeout_s
+            if i > 0:
+                self.rtt.retransmits += 1
+
+            t = time.monotonic()
+            self._send(rw, reg, tx_data)
+            ret, bus_rmsg = self._pend(rw, reg, timeout)
+            if ret != UTRC_RX_ERROR.TIMEOUT:
+                # Karn's algorithm: the reply to a retransmitted request does not give a sample
+                if is_read and i == 0:
+                    self.rtt.sample(time.monotonic() - t)
+                break
+            if is_read:
+                self.rtt.timeout()
         self.mutex.release()
         return ret, bus_rmsg
 
     def is_err(self):
         return self.__is_err
 
+    # decode type of the registers that can be read by _read_many
+    _READ_MANY_TYPE = {
+        "UUID": "hex", "SW_VERSION": "str", "HW_VERSION": "hex", "MECH_RATIO": "fp32",
+        "ELEC_RATIO": "fp32", "MOTION_DIR": "int8", "IWDG_CYC": "int32", "TEMP_LIMIT": "int8",
+        "VOLT_LIMIT": "int8", "CURR_LIMIT": "fp32", "MOTION_MDOE": "int8", "MOTION_ENABLE": "int8",
+        "BRAKE_ENABLE": "int8", "TEMP_DRIVER": "fp32", "TEMP_MOTOR": "fp32", "BUS_VOLT": "fp32",
+        "BUS_CURR": "fp32", "MULTI_VOLT": "fp32", "ERROR_CODE": "int8",
+        "POS_TARGET": "fp32", "POS_CURRENT": "fp32", "POS_LIMIT_MAX": "fp32", "POS_LIMIT_MIN": "fp32",
+        "POS_LIMIT_DIFF": "fp32", "POS_PIDP": "fp32", "POS_SMOOTH_CYC": "int8",
+        "VEL_TARGET": "fp32", "VEL_CURRENT": "fp32", "VEL_LIMIT_MAX": "fp32", "VEL_LIMIT_MIN": "fp32",
+        "VEL_LIMIT_DIFF": "fp32", "VEL_PIDP": "fp32", "VEL_PIDI": "fp32", "VEL_SMOOTH_CYC": "int8",
+        "TAU_TARGET": "fp32", "TAU_CURRENT": "fp32", "TAU_LIMIT_MAX": "fp32", "TAU_LIMIT_MIN": "fp32",
+        "TAU_LIMIT_DIFF": "fp32", "TAU_PIDP": "fp32", "TAU_PIDI": "fp32", "TAU_SMOOTH_CYC": "int8",
+    }
+
+    # RS485/CAN buses are half-duplex and replies of pipelined requests can collide,
+    # also behind an EtherNet module, so _read_many sends one request at a time unless the caller asks for more
+    def _read_many(self, names, timeout_s=1, window=1):
+        regs = []
+        for name in names:
+            if name not in self._READ_MANY_TYPE:
+                raise ValueError(self.DB_FLG + "read_many: register %s can not be read in a batch" % name)
+            regs.append(getattr(SERVO_REG, name))
+        if window <= 0:
+            window = len(regs)
+            # more replies than the receive queue holds would drop the oldest ones
+            rx_que = getattr(self.socket_fp, "rx_que", None)
+            if rx_que is not None and rx_que.maxsize > 0:
+                window = min(window, rx_que.maxsize)
+
+        ret = 0
+        lost = 0
+        values = {}
+        self.mutex.acquire()
+        sent = 0
+        for i in range(len(regs)):
+            # keep up to window requests on the bus, replies come back in request order
+            while lost == 0 and sent < len(regs) and sent < i + window:
+                self._send(UTRC_RW.R, regs[sent], None, flush=(sent == 0))
+                sent += 1
+
+            reg = regs[i]
+            name = names[i]
+            if lost == 0:
+                self.tx_data.rw = UTRC_RW.R
+                self.tx_data.cmd = reg[0]
+                ret_i, bus_rmsg = self._pend(UTRC_RW.R, reg, timeout_s)
+            else:
+                # the replies are out of step after a failed one, do not wait for the rest
+                ret_i = lost
+
+            if ret_i == 0 or ret_i == UTRC_RX_ERROR.STATE:
+                kind = self._READ_MANY_TYPE[name]
+                n = reg[2] if kind in ("int8", "str", "hex") else reg[2] // 4
+                values[name] = hex_data.bytes_to_value(bus_rmsg.data, kind, n)
+            else:
+                values[name] = None
+                lost = ret_i
+            if ret == 0:
+                ret = ret_i
+        self.mutex.release()
+        return ret, values
+
     ############################################################
     #                       Basic Function
     ############################################################
@@ -477,15 +666,15 @@ class _ServoApiBase:
 
     def _set_cpos_target(self, sid, eid, pos):
         id = self.id
-        self.connect_to_id(0x55, 0x55)
 
         num = eid - sid + 1
         txdata = bytes([sid])
         txdata += bytes([eid])
         txdata += hex_data.fp32_to_bytes_big(pos, num)
-        SERVO_REG.CPOS_TARGET[3] = 2 + 4 * num
+        reg = SERVO_REG.CPOS_TARGET.with_len(w_tx_len=2 + 4 * num)
         self.mutex.acquire()
-        self._send(UTRC_RW.W, SERVO_REG.CPOS_TARGET, txdata)
+        self.connect_to_id(0x55, 0x55)
+        self._send(UTRC_RW.W, reg, txdata)
         self.connect_to_id(id, id)
         self.mutex.release()
 
@@ -493,15 +682,15 @@ class _ServoApiBase:
 
     def _set_ctau_target(self, sid, eid, tau):
         id = self.id
-        self.connect_to_id(0x55, 0x55)
 
         num = eid - sid + 1
         txdata = bytes([sid])
         txdata += bytes([eid])
         txdata += hex_data.fp32_to_bytes_big(tau, num)
-        SERVO_REG.CTAU_TARGET[3] = 2 + 4 * num
+        reg = SERVO_REG.CTAU_TARGET.with_len(w_tx_len=2 + 4 * num)
         self.mutex.acquire()
-        self._send(UTRC_RW.W, SERVO_REG.CTAU_TARGET, txdata)
+        self.connect_to_id(0x55, 0x55)
+        self._send(UTRC_RW.W, reg, txdata)
         self.connect_to_id(id, id)
         self.mutex.release()
 
@@ -519,11 +708,11 @@ class _ServoApiBase:
         txdata = bytes([sid])
         txdata += bytes([eid])
         txdata += hex_data.fp32_to_bytes_big(postau, num * 2)
-        SERVO_REG.CPOSTAU_TARGET[3] = 4 * num * 2 + 2
+        reg = SERVO_REG.CPOSTAU_TARGET.with_len(w_tx_len=4 * num * 2 + 2)
 
         self.mutex.acquire()
         self.connect_to_id(0x55, 0x55)
-        self._send(UTRC_RW.W, SERVO_REG.CPOSTAU_TARGET, txdata)
+        self._send(UTRC_RW.W, reg, txdata)
         self.connect_to_id(id, id)
         self.mutex.release()
 
@@ -541,11 +730,11 @@ class _ServoApiBase:
         txdata = bytes([sid])
         txdata += bytes([eid])
         txdata += hex_data.fp32_to_bytes_big(posvel, num * 2)
-        SERVO_REG.CPOSVEL_TARGET[3] = 4 * num * 2 + 2
+        reg = SERVO_REG.CPOSVEL_TARGET.with_len(w_tx_len=4 * num * 2 + 2)
 
         self.mutex.acquire()
         self.connect_to_id(0x55, 0x55)
-        self._send(UTRC_RW.W, SERVO_REG.CPOSVEL_TARGET, txdata)
+        self._send(UTRC_RW.W, reg, txdata)
         self.connect_to_id(id, id)
         self.mutex.release()
 
@@ -553,15 +742,15 @@ class _ServoApiBase:
 
     def _set_cvel_target(self, sid, eid, vel):
         id = self.id
-        self.connect_to_id(0x55, 0x55)
 
         num = eid - sid + 1
         txdata = bytes([sid])
         txdata += bytes([eid])
         txdata += hex_data.fp32_to_bytes_big(vel, num)
-        SERVO_REG.CVEL_TARGET[3] = 2 + 4 * num
+        reg = SERVO_REG.CVEL_TARGET.with_len(w_tx_len=2 + 4 * num)
         self.mutex.acquire()
-        self._send(UTRC_RW.W, SERVO_REG.CVEL_TARGET, txdata)
+        self.connect_to_id(0x55, 0x55)
+        self._send(UTRC_RW.W, reg, txdata)
         self.connect_to_id(id, id)
         self.mutex.release()
 
@@ -582,74 +771,93 @@ class _ServoApiBase:
             tau = hex_data.bytes_to_fp32_big(bus_rmsg.data[5:9])
         return ret, num, pos, tau
 
-    def _get_cpostau_current(self, sid, eid):
+    def _gather_current(self, reg, sid, eid, timeout_s):
+        """Sends a broadcast read to the actuators sid..eid and collects their replies.
+        The replies are indexed by the id of the actuator, timeout_s is the deadline of the whole read.
+        A bus client without gather() is read one reply after the other until the deadline.
+
+        Returns:
+            ret (list): Result code of each actuator, UTRC_RX_ERROR.TIMEOUT if it did not answer
+            values (list): Reply data of each actuator, None if it did not answer
+        """
         id = self.id
         num = eid - sid + 1
-
-        ret = [0] * num
-        broadcast_num = [0] * num
-        pos = [0] * num
-        tau = [0] * num
+        ret = [UTRC_RX_ERROR.TIMEOUT] * num
+        values = [None] * num
 
         txdata = bytes([sid])
         txdata += bytes([eid])
         self.mutex.acquire()
         self.connect_to_id(0x55, 0x55)
-        self._send(UTRC_RW.R, SERVO_REG.CPOSTAU_CURRENT, txdata)
-        for i in range(num):
-            ret[i], bus_rmsg = self._pend(UTRC_RW.R, SERVO_REG.CPOSTAU_CURRENT)
-            # if (bus_rmsg.master_id != i + 1):
-            #    ret[i] = UTRC_RX_ERROR.TIMEOUT
-
-            if ret[i] == UTRC_RX_ERROR.TIMEOUT:
-                broadcast_num[i] = 0
-                pos[i] = 0
-                tau[i] = 0
-            else:
-                broadcast_num[i] = hex_data.bytes_to_int8(bus_rmsg.data[0])
-                pos[i] = hex_data.bytes_to_fp32_big(bus_rmsg.data[1:5])
-                tau[i] = hex_data.bytes_to_fp32_big(bus_rmsg.data[5:9])
-
+        self._send(UTRC_RW.R, reg, txdata)
+        if hasattr(self.bus_client, "gather"):
+            replies = self.bus_client.gather(self.tx_data, reg[2], range(sid, eid + 1), timeout_s)
+            for rid, (ret_i, bus_rmsg) in replies.items():
+                ret[rid - sid] = ret_i
+                values[rid - sid] = bus_rmsg.data
+        else:
+            deadline = time.monotonic() + timeout_s
+            for i in range(num):
+                remain = deadline - time.monotonic()
+                if remain <= 0:
+                    break
+                ret_i, bus_rmsg = self._pend(UTRC_RW.R, reg, remain)
+                if ret_i == UTRC_RX_ERROR.TIMEOUT:
+                    break
+                rid = bus_rmsg.master_id if hasattr(bus_rmsg, "master_id") else bus_rmsg.id
+                if sid <= rid <= eid:
+                    ret[rid - sid] = ret_i
+                    values[rid - sid] = bus_rmsg.data
         self.connect_to_id(id, id)
         self.mutex.release()
+        return ret, values
 
+    def _get_cpostau_current(self, sid, eid, timeout_s=1):
+        ret, values = self._gather_current(SERVO_REG.CPOSTAU_CURRENT, sid, eid, timeout_s)
+        num = len(ret)
+        broadcast_num = [0] * num
+        pos = [0] * num
+        tau = [0] * num
+        for i in range(num):
+            if values[i] is not None:
+                broadcast_num[i] = hex_data.bytes_to_int8(values[i][0])
+                pos[i], tau[i] = hex_data.bytes_to_fp32_big(values[i][1:9], 2)
         return ret, broadcast_num, pos, tau
 
-    def _get_cpvt_current(self, sid, eid):
-        id = self.id
-        num = eid - sid + 1
-
-        ret = [0] * num
+    def _get_cpvt_current(self, sid, eid, timeout_s=1):
+        ret, values = self._gather_current(SERVO_REG.CPVT_CURRENT, sid, eid, timeout_s)
+        num = len(ret)
         broadcast_num = [0] * num
         pos = [0] * num
         vel = [0] * num
         tau = [0] * num
-
-        txdata = bytes([sid])
-        txdata += bytes([eid])
-        self.mutex.acquire()
-        self.connect_to_id(0x55, 0x55)
-        self._send(UTRC_RW.R, SERVO_REG.CPVT_CURRENT, txdata)
         for i in range(num):
-            ret[i], bus_rmsg = self._pend(UTRC_RW.R, SERVO_REG.CPVT_CURRENT)
-            # if (bus_rmsg.master_id != i + 1):
-            #    ret[i] = UTRC_RX_ERROR.TIMEOUT
-
-            if ret[i] == UTRC_RX_ERROR.TIMEOUT:
-                broadcast_num[i] = 0
-                pos[i] = 0
-                tau[i] = 0
-            else:
-                broadcast_num[i] = hex_data.bytes_to_int8(bus_rmsg.data[0])
-                pos[i] = hex_data.bytes_to_fp32_big(bus_rmsg.data[1:5])
-                vel[i] = hex_data.bytes_to_fp32_big(bus_rmsg.data[5:9])
-                tau[i] = hex_data.bytes_to_fp32_big(bus_rmsg.data[9:13])
-
-        self.connect_to_id(id, id)
-        self.mutex.release()
-
+            if values[i] is not None:
+                broadcast_num[i] = hex_data.bytes_to_int8(values[i][0])
+                pos[i], vel[i], tau[i] = hex_data.bytes_to_fp32_big(values[i][1:13], 3)
         return ret, broadcast_num, pos, vel, tau
 
+    def _get_current_array(self, reg, nfp, sid, eid, timeout_s):
+        if np is None:
+            raise ImportError(self.DB_FLG + "the array api requires numpy, pip install numpy")
+        ret, values = self._gather_current(reg, sid, eid, timeout_s)
+        num = len(ret)
+        valid = np.array([r == 0 or r == UTRC_RX_ERROR.STATE for r in ret], dtype=bool)
+        broadcast_num = np.zeros(num, dtype=np.int8)
+        data = np.zeros((num, nfp), dtype=np.float64)
+        for i in np.flatnonzero(valid):
+            broadcast_num[i] = hex_data.bytes_to_int8(values[i][0])
+            data[i] = np.frombuffer(bytes(values[i][1:1 + 4 * nfp]), dtype=">f4")
+        return valid, broadcast_num, data
+
+    def _get_cpostau_current_array(self, sid, eid, timeout_s=1):
+        valid, broadcast_num, data = self._get_current_array(SERVO_REG.CPOSTAU_CURRENT, 2, sid, eid, timeout_s)
+        return valid, broadcast_num, data[:, 0], data[:, 1]
+
+    def _get_cpvt_current_array(self, sid, eid, timeout_s=1):
+        valid, broadcast_num, data = self._get_current_array(SERVO_REG.CPVT_CURRENT, 3, sid, eid, timeout_s)
+        return valid, broadcast_num, data[:, 0], data[:, 1], data[:, 2]
+
     ############################################################
     #                       Developer Api
     ############################################################
@@ -58,19 +58,83 @@ CRC_TABLE_L = (0x00, 0xC0, 0xC1, 0x01, 0xC3, 0x03, 0x02, 0xC2, 0xC6, 0x06, 0x07,
                0x81, 0x80, 0x40)
 
 
-def crc_modbus(data):
-    leng = len(data)
-    init_crch = 0xFF
-    init_crcl = 0xFF
-    i = 0
-
-    while leng > 0:
-        index = init_crch ^ data[i]
-        i += 1
-        init_crch = init_crcl ^ CRC_TABLE_H[index]
-        init_crcl = CRC_TABLE_L[index]
-        leng -= 1
-    crc16 = init_crch << 8 | init_crcl
-    crc = bytes([crc16 // 256 % 256])
-    crc += bytes([crc16 % 256])
+CRC16_INIT = 0xFFFF
+
+# Single 16-bit table of the reflected modbus polynomial (0xA001), merged from the
+# two 8-bit tables above: the low byte lives in CRC_TABLE_H, the high byte in CRC_TABLE_L.
+CRC16_TABLE = tuple((CRC_TABLE_L[i] << 8) | CRC_TABLE_H[i] for i in range(256))
+
+
+def _as_bytes(data):
+    if isinstance(data, (bytes, bytearray)):
+        return data
+    try:
+        return memoryview(data).cast("B")
+    except TypeError:
+        return bytes(data)
+
+
+def crc16_modbus_py(data, crc=CRC16_INIT):
+    table = CRC16_TABLE
+    for ch in _as_bytes(data):
+        crc = (crc >> 8) ^ table[(crc ^ ch) & 0xFF]
     return crc
+
+
+try:
+    from crcmod import _crcfunext  # only the C extension is faster than the table below
+    from crcmod.predefined import mkPredefinedCrcFun
+    _crc16_modbus_c = mkPredefinedCrcFun("modbus")
+except ImportError:
+    _crc16_modbus_c = None
+
+
+if _crc16_modbus_c is not None:
+    CRC16_BACKEND = "crcmod"
+
+    def crc16_modbus(data, crc=CRC16_INIT):
+        """
+        Computes (or continues, when crc is the value of a previous call) the modbus crc of data
+        data: any object that supports the buffer protocol, or a sequence of ints
+        return: crc value as int, the low byte is transmitted first
+        """
+        if not isinstance(data, bytes):
+            data = bytes(_as_bytes(data))
+        return _crc16_modbus_c(data, crc)
+else:
+    CRC16_BACKEND = "python"
+    crc16_modbus = crc16_modbus_py
+
+
+class Crc16Modbus:
+    """
+    Incremental modbus crc, for data that arrives in pieces
+    """
+
+    def __init__(self, data=None):
+        self.crc = CRC16_INIT
+        if data is not None:
+            self.update(data)
+
+    def reset(self):
+        self.crc = CRC16_INIT
+
+    def update(self, data):
+        self.crc = crc16_modbus(data, self.crc)
+        return self.crc
+
+    def digest(self):
+        return bytes([self.crc & 0xFF, self.crc >> 8])
+
+
+def crc_modbus(data):
+    crc = crc16_modbus(data)
+    return bytes([crc & 0xFF, crc >> 8])
+
+
+def crc_modbus_check(buf, length):
+    """
+    Checks the 2 crc bytes that follow the first length bytes of buf
+    """
+    crc = crc16_modbus(memoryview(_as_bytes(buf))[:length])
+    return crc == (buf[length] | (buf[length + 1] << 8))
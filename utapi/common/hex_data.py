@@ -9,18 +9,47 @@
 
 import struct
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# struct.Struct of every (format, count) used so far, one unpack/pack call converts all values of a payload
+_STRUCT = {}
+
+
+def _struct(fmt, num):
+    key = (fmt, num)
+    s = _STRUCT.get(key)
+    if s is None:
+        s = struct.Struct(fmt[0] + str(num) + fmt[1])
+        _STRUCT[key] = s
+    return s
+
+
+def _unpack(fmt, data, num):
+    s = _struct(fmt, num)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return list(s.unpack_from(data))
+    return list(s.unpack(bytes(data[0:s.size])))
+
+
+_NP_TYPE = {"b": "i1", "B": "u1", "h": "i2", "H": "u2", "i": "i4", "I": "u4", "f": "f4"}
+
+
+def _pack(fmt, data, num):
+    # an ndarray is converted and byte swapped by numpy without a python loop
+    if np is not None and isinstance(data, np.ndarray):
+        return np.asarray(data[0:num], dtype=fmt[0] + _NP_TYPE[fmt[1]]).tobytes()
+    return _struct(fmt, num).pack(*data[0:num])
+
 
 def bytes_to_int8(data, num=1):
     if num == 1:
         str1 = struct.unpack("<b", bytes([data]))
         return str1[0]
 
-    ret = [0] * num
-    for i in range(num):
-        byte = bytes([data[i]])
-        str1 = struct.unpack("<b", byte)
-        ret[i] = str1[0]
-    return ret
+    return _unpack("<b", data, num)
 
 
 def bytes_to_int16_big(data):
@@ -58,15 +87,7 @@ def bytes_to_int32_big(data):
 
 
 def bytes_to_int32_big(data, num=1):
-    ret = [0] * num
-    for i in range(num):
-        byte = bytes([data[i * 4]])
-        byte += bytes([data[i * 4 + 1]])
-        byte += bytes([data[i * 4 + 2]])
-        byte += bytes([data[i * 4 + 3]])
-        str1 = struct.unpack(">i", byte)
-        ret[i] = str1[0]
-
+    ret = _unpack(">i", data, num)
     if num == 1:
         return ret[0]
     else:
@@ -74,15 +95,7 @@ def bytes_to_int32_big(data, num=1):
 
 
 def bytes_to_uint32_big(data, num=1):
-    ret = [0] * num
-    for i in range(num):
-        byte = bytes([data[i * 4]])
-        byte += bytes([data[i * 4 + 1]])
-        byte += bytes([data[i * 4 + 2]])
-        byte += bytes([data[i * 4 + 3]])
-        str1 = struct.unpack(">I", byte)
-        ret[i] = str1[0]
-
+    ret = _unpack(">I", data, num)
     if num == 1:
         return ret[0]
     else:
@@ -98,57 +111,32 @@ def int8_to_bytes_big(data):
 
 def int8_to_bytes_big(data, num=1):
     if num == 1:
-        str1 = bytes(struct.pack(">b", data))
-        return str1
-    else:
-        str1 = bytes(struct.pack(">b", data[0]))
-        for i in range(num - 1):
-            str1 += bytes(struct.pack(">b", data[i + 1]))
-    return str1
+        return struct.pack(">b", data)
+    return _pack(">b", data, num)
 
 
 def uint8_to_bytes_big(data, num=1):
     if num == 1:
-        str1 = bytes(struct.pack(">B", data))
-        return str1
-    else:
-        str1 = bytes(struct.pack(">B", data[0]))
-        for i in range(num - 1):
-            str1 += bytes(struct.pack(">B", data[i + 1]))
-    return str1
+        return struct.pack(">B", data)
+    return _pack(">B", data, num)
 
 
 def int16_to_bytes_big(data, num=1):
     if num == 1:
-        str1 = bytes(struct.pack(">h", data))
-        return str1
-    else:
-        str1 = bytes(struct.pack(">h", data[0]))
-        for i in range(num - 1):
-            str1 += bytes(struct.pack(">h", data[i + 1]))
-    return str1
+        return struct.pack(">h", data)
+    return _pack(">h", data, num)
 
 
 def uint16_to_bytes_big(data, num=1):
     if num == 1:
-        str1 = bytes(struct.pack(">H", data))
-        return str1
-    else:
-        str1 = bytes(struct.pack(">H", data[0]))
-        for i in range(num - 1):
-            str1 += bytes(struct.pack(">H", data[i + 1]))
-    return str1
+        return struct.pack(">H", data)
+    return _pack(">H", data, num)
 
 
 def uint16_to_bytes(data, num=1):
     if num == 1:
-        str1 = bytes(struct.pack("<H", data))
-        return str1
-    else:
-        str1 = bytes(struct.pack("<H", data[0]))
-        for i in range(num - 1):
-            str1 += bytes(struct.pack("<H", data[i + 1]))
-    return str1
+        return struct.pack("<H", data)
+    return _pack("<H", data, num)
 
 
 '''
@@ -160,47 +148,24 @@ def int32_to_bytes_big(data):
 
 def int32_to_bytes_big(data, num=1):
     if num == 1:
-        str1 = bytes(struct.pack(">i", data))
-        return str1
-    else:
-        str1 = bytes(struct.pack(">i", data[0]))
-        for i in range(num - 1):
-            str1 += bytes(struct.pack(">i", data[i + 1]))
-    return str1
+        return struct.pack(">i", data)
+    return _pack(">i", data, num)
 
 
 def uint32_to_bytes_big(data, num=1):
     if num == 1:
-        str1 = bytes(struct.pack(">I", data))
-        return str1
-    else:
-        str1 = bytes(struct.pack(">I", data[0]))
-        for i in range(num - 1):
-            str1 += bytes(struct.pack(">I", data[i + 1]))
-    return str1
+        return struct.pack(">I", data)
+    return _pack(">I", data, num)
 
 
 def fp32_to_bytes_big(data, num=1):
     if num == 1:
-        str1 = bytes(struct.pack(">f", data))
-        return str1
-    else:
-        str1 = bytes(struct.pack(">f", data[0]))
-        for i in range(1, num):
-            str1 += bytes(struct.pack(">f", data[i]))
-        return str1
+        return struct.pack(">f", data)
+    return _pack(">f", data, num)
 
 
 def bytes_to_fp32_big(data, num=1):
-    ret = [0] * num
-    for i in range(num):
-        byte = bytes([data[i * 4]])
-        byte += bytes([data[i * 4 + 1]])
-        byte += bytes([data[i * 4 + 2]])
-        byte += bytes([data[i * 4 + 3]])
-        str1 = struct.unpack(">f", byte)
-        ret[i] = str1[0]
-
+    ret = _unpack(">f", data, num)
     if num == 1:
         return ret[0]
     else:
@@ -208,16 +173,28 @@ def bytes_to_fp32_big(data, num=1):
 
 
 def bytes_to_fp32(data, num=1):
-    ret = [0] * num
-    for i in range(num):
-        byte = bytes([data[i * 4]])
-        byte += bytes([data[i * 4 + 1]])
-        byte += bytes([data[i * 4 + 2]])
-        byte += bytes([data[i * 4 + 3]])
-        str1 = struct.unpack("<f", byte)
-        ret[i] = str1[0]
-
+    ret = _unpack("<f", data, num)
     if num == 1:
         return ret[0]
     else:
         return ret
+
+
+def bytes_to_value(data, kind, num=1):
+    """
+    Decodes num values of a register reply, kind is one of
+    "int8", "int32", "fp32", "str" (ascii chars) or "hex" (hex string of the bytes)
+    """
+    if kind == "int8":
+        if num == 1:
+            return bytes_to_int8(data[0], 1)
+        return bytes_to_int8(data[0:num], num)
+    elif kind == "int32":
+        return bytes_to_int32_big(data, num)
+    elif kind == "fp32":
+        return bytes_to_fp32_big(data, num)
+    elif kind == "str":
+        return "".join([chr(x) for x in data[0:num]])
+    elif kind == "hex":
+        return "".join(["%02x" % (x & 0xFF) for x in data[0:num]])
+    return None
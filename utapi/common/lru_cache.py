@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import threading
+import time
+from collections import OrderedDict
+
+
+class LruCache:
+    """
+    Thread-safe cache of at most size entries, the least recently used entry is dropped first.
+    An entry older than ttl_s is not returned any more, ttl_s None keeps entries until they are dropped or cleared.
+    """
+
+    def __init__(self, size=256, ttl_s=None):
+        self.size = size
+        self.ttl_s = ttl_s
+        self.mutex = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.clears = 0
+
+    def get(self, key):
+        """return: the value of key, None if it is not cached or expired"""
+        with self.mutex:
+            entry = self.entries.get(key)
+            if entry is not None and self.ttl_s is not None and time.monotonic() - entry[0] > self.ttl_s:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self.mutex:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.mutex:
+            self.entries.clear()
+            self.clears += 1
+
+    def stats(self):
+        """
+        return: {"hits", "misses", "hit_rate", "entries", "clears"}
+        """
+        with self.mutex:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                    "entries": len(self.entries), "clears": self.clears}
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import socket
+import threading
+import time
+
+from utapi.common.utrc import UTRC_RX_ERROR
+
+# longest time an EtherNet module needs to answer again after a network reset
+RESET_READY_TIMEOUT = 5
+
+
+def reset_net(ip, tcp_port, udp_port, buf, db_flg=""):
+    """
+    Sends the reset frame buf to the TCP and the UDP port of an EtherNet module.
+    The module restarts its network, wait_ready() waits until it answers again.
+    """
+    try:
+        print(db_flg + "Reset Net Step1: connect to tcp")
+        fp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        fp.connect((ip, tcp_port))
+        fp.send(buf)
+    except Exception as err:
+        print(err)
+    time.sleep(0.1)
+
+    try:
+        print(db_flg + "Reset Net Step2: connect to udp")
+        addr = (ip, udp_port)
+        fp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        fp.sendto(buf, addr)
+    except Exception as err:
+        print(err)
+
+
+def wait_ready(probe, timeout_s=RESET_READY_TIMEOUT, interval_s=0.05, max_interval_s=0.8):
+    """
+    Calls probe(attempt_timeout_s) until it returns 0 or timeout_s has passed.
+    The attempts start interval_s apart, the interval doubles up to max_interval_s,
+    and each attempt waits at most the current interval for the answer.
+    return: 0 or the result code of the last attempt
+    """
+    deadline = time.monotonic() + timeout_s
+    interval = interval_s
+    while True:
+        t = time.monotonic()
+        ret = probe(interval)
+        if ret == 0:
+            return 0
+        remain = deadline - time.monotonic()
+        if remain <= 0:
+            return ret
+        time.sleep(max(0, min(interval - (time.monotonic() - t), remain)))
+        interval = min(interval * 2, max_interval_s)
+
+
+def connect_ready(bus_client, baud, is_reset):
+    """
+    Handshakes with the module by connect_device(), after a reset until the module answers.
+    return: result code of connect_device()
+    """
+    if is_reset:
+        return wait_ready(lambda timeout_s: bus_client.connect_device(baud, timeout_s))
+    return bus_client.connect_device(baud)
+
+
+def open_ready(open_fp, client_type, baud, is_reset):
+    """
+    Opens a connection with open_fp() and handshakes with the module by client_type(socket_fp).connect_device().
+    After a reset both are repeated until the module answers, a TCP port does not accept connections
+    while the module restarts.
+    return: ret, socket_fp, bus_client of the last attempt, check socket_fp.is_error() before ret
+    """
+    last = [None, None]
+
+    def probe(timeout_s=None):
+        if last[0] is not None:
+            try:
+                last[0].close()
+            except OSError:
+                # the module closed the connection of the previous attempt
+                pass
+        last[0] = open_fp()
+        last[1] = None
+        if last[0].is_error() != 0:
+            return UTRC_RX_ERROR.CONNECT
+        last[0].flush()
+        last[1] = client_type(last[0])
+        if timeout_s is None:
+            return last[1].connect_device(baud)
+        return last[1].connect_device(baud, timeout_s)
+
+    if is_reset:
+        ret = wait_ready(probe)
+    else:
+        ret = probe()
+    return ret, last[0], last[1]
+
+
+def connect_parallel(factories):
+    """
+    Creates several connections at the same time, one thread per factory. Each thread sends its own reset
+    and probes its own module, so the restarts of the modules overlap and the bring-up of a cell takes
+    as long as its slowest module, not the sum of them:
+
+        adras = connect_parallel([lambda: AdraApiUdp("192.168.1.16"), lambda: AdraApiUdp("192.168.1.17")])
+
+    factories: list of functions without arguments that return a connection
+    return: list of the connections in the order of factories, the exception if a factory raised one
+    """
+    results = [None] * len(factories)
+
+    def run(i):
+        try:
+            results[i] = factories[i]()
+        except Exception as err:
+            results[i] = err
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(factories))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
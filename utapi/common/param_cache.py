@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import threading
+
+
+class ParamCache:
+    """
+    Write-through cache of the data of configuration registers, by device id and register cmd.
+    Only registers whose read reply has the same layout as their write data can be cached (cmds),
+    a successful write stores the written data as the next read reply.
+    A written value is dirty until the parameters are saved on the device, a reboot would lose it.
+    """
+
+    def __init__(self, cmds):
+        self.cmds = set(cmds)
+        self.mutex = threading.Lock()
+        self.values = {}
+        self.dirty = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, dev, cmd):
+        """return: the cached data of the register, None if it is not cached"""
+        with self.mutex:
+            data = self.values.get((dev, cmd))
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return data
+
+    def put(self, dev, cmd, data, dirty=False):
+        with self.mutex:
+            self.values[(dev, cmd)] = bytes(data)
+            if dirty:
+                self.dirty.add((dev, cmd))
+
+    def drop(self, dev, cmd):
+        """Drops a register of a device, of all devices if dev is None"""
+        with self.mutex:
+            for key in list(self.values):
+                if key[1] == cmd and (dev is None or key[0] == dev):
+                    del self.values[key]
+                    self.dirty.discard(key)
+
+    def clear(self, dev=None):
+        """Drops all registers of a device, of all devices if dev is None"""
+        with self.mutex:
+            for key in list(self.values):
+                if dev is None or key[0] == dev:
+                    del self.values[key]
+            self.dirty = set(key for key in self.dirty if dev is not None and key[0] != dev)
+
+    def saved(self, dev=None):
+        """The parameters of a device (of all devices if dev is None) were saved, none of them is dirty"""
+        with self.mutex:
+            self.dirty = set(key for key in self.dirty if dev is not None and key[0] != dev)
+
+    def stats(self):
+        """
+        return: {"hits", "misses", "hit_rate", "entries", "dirty"}, dirty is a list of (dev, cmd)
+        """
+        with self.mutex:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                    "entries": len(self.values), "dirty": sorted(self.dirty)}
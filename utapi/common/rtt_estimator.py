@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+
+
+class RttEstimator:
+    """
+    Round trip time estimator of one connection, the same as the retransmission timer of TCP (RFC 6298):
+        srtt   = 7/8 * srtt + 1/8 * rtt
+        rttvar = 3/4 * rttvar + 1/4 * |srtt - rtt|
+        rto    = srtt + 4 * rttvar, limited to [rto_min, rto_max]
+    Every timeout doubles rto until the next sample. Samples of retransmitted requests must not be given,
+    their reply can belong to any of the transmissions.
+    """
+
+    def __init__(self, rto_init=1.0, rto_min=0.01, rto_max=1.0):
+        self.rto_init = rto_init
+        self.rto_min = rto_min
+        self.rto_max = rto_max
+        self.reset()
+
+    def reset(self):
+        self.srtt = 0.0
+        self.rttvar = 0.0
+        self.rto = self.rto_init
+        self.samples = 0
+        self.timeouts = 0
+        self.retransmits = 0
+
+    def sample(self, rtt):
+        """Updates the estimate with the round trip time [s] of a request that was sent once"""
+        if self.samples == 0:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.samples += 1
+        self.rto = min(max(self.srtt + 4 * self.rttvar, self.rto_min), self.rto_max)
+
+    def timeout(self):
+        """Backs off after a request got no reply"""
+        self.timeouts += 1
+        self.rto = min(self.rto * 2, self.rto_max)
+
+    def stats(self):
+        """
+        return: {"srtt", "rttvar", "rto" [s], "samples", "timeouts", "retransmits"}
+        """
+        return {"srtt": self.srtt, "rttvar": self.rttvar, "rto": self.rto, "samples": self.samples,
+                "timeouts": self.timeouts, "retransmits": self.retransmits}
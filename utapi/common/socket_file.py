@@ -6,6 +6,7 @@
 #
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
+import os
 import queue
 import threading
 # import time
@@ -14,9 +15,10 @@ import threading
 
 class SocketFile(threading.Thread):
 
-    def __init__(self, port, buad, bus_decode=-1, rxque_max=10):
+    def __init__(self, port, buad, bus_decode=-1, rxque_max=10, rxdata_len=4096):
         self.DB_FLG = "[SockeFil] "
         try:
+            self.rxdata_len = rxdata_len
             self.rx_que = queue.Queue(rxque_max)
             self.rx_decoder = bus_decode
             self.com = open(port, "rb+", buffering=0)
@@ -85,16 +87,16 @@ class SocketFile(threading.Thread):
         print(self.DB_FLG + "recv_proc thread start")
         try:
             while self.is_err == 0:
-                rxch = self.com.read(1)
-                if (len(rxch) <= 0):
+                rx_data = os.read(self.com.fileno(), self.rxdata_len)
+                if (len(rx_data) <= 0):
                     continue
                 if self.rx_decoder == -1:
                     if self.rx_que.full():
                         self.rx_que.get()
-                    self.rx_que.put(rxch)
+                    self.rx_que.put(rx_data)
                 else:
-                    self.rx_decoder.put(rxch, 1, self.rx_que)
-                # print_msg.nhex("[SockFile] read: ", rxch, len(rxch))
+                    self.rx_decoder.put(rx_data, len(rx_data), self.rx_que)
+                # print_msg.nhex("[SockFile] read: ", rx_data, len(rx_data))
         except Exception as err:
             self.close()
             self.is_err = 1
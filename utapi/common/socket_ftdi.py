@@ -18,7 +18,7 @@ import usb.util
 
 
 class SocketFtdi(threading.Thread):
-    def __init__(self, bus, address, baud, bus_decode=-1, rxque_max=10):
+    def __init__(self, bus, address, baud, bus_decode=-1, rxque_max=10, rxdata_len=1024):
         self.DB_FLG = "[SockeSer] "
         try:
             """
@@ -30,6 +30,7 @@ class SocketFtdi(threading.Thread):
                     print(i)
             """
             self.is_err = 0
+            self.rxdata_len = rxdata_len
             self.rx_que = queue.Queue(rxque_max)
             self.rx_decoder = bus_decode
 
@@ -107,16 +108,16 @@ class SocketFtdi(threading.Thread):
         print(self.DB_FLG + "recv_proc thread start")
         try:
             while self.is_err == 0:
-                rxch = self.ftdi.read_data(1)
-                if (len(rxch) <= 0):
+                rx_data = self.ftdi.read_data(self.rxdata_len)
+                if (len(rx_data) <= 0):
                     continue
                 if self.rx_decoder == -1:
                     if self.rx_que.full():
                         self.rx_que.get()
-                    self.rx_que.put(rxch)
+                    self.rx_que.put(rx_data)
                 else:
                     self.time3 = time.time_ns()
-                    self.rx_decoder.put(rxch, 1, self.rx_que)
+                    self.rx_decoder.put(rx_data, len(rx_data), self.rx_que)
                     self.time4 = time.time_ns()
         except Exception as err:
             self.close()
@@ -13,9 +13,10 @@ import serial
 
 
 class SocketSerial(threading.Thread):
-    def __init__(self, port, baud, bus_decode=-1, rxque_max=10):
+    def __init__(self, port, baud, bus_decode=-1, rxque_max=10, rxdata_len=1024):
         self.DB_FLG = "[SockeSer] "
         try:
+            self.rxdata_len = rxdata_len
             self.rx_que = queue.Queue(rxque_max)
             self.rx_decoder = bus_decode
             self.com = serial.Serial(port=port, baudrate=baud)
@@ -88,16 +89,19 @@ class SocketSerial(threading.Thread):
         print(self.DB_FLG + "recv_proc thread start")
         try:
             while self.is_err == 0:
-                rxch = self.com.read(1)
-                if len(rxch) <= 0:
+                rx_data = self.com.read(1)
+                if len(rx_data) <= 0:
                     continue
+                waiting = self.com.in_waiting
+                if waiting > 0:
+                    rx_data += self.com.read(min(waiting, self.rxdata_len))
                 if self.rx_decoder == -1:
                     if self.rx_que.full():
                         self.rx_que.get()
-                    self.rx_que.put(rxch)
+                    self.rx_que.put(rx_data)
                 else:
-                    self.rx_decoder.put(rxch, 1, self.rx_que)
-        except Exception:
+                    self.rx_decoder.put(rx_data, len(rx_data), self.rx_que)
+        except Exception as err:
             self.close()
             self.is_err = 1
             print(err)
@@ -23,6 +23,8 @@ class SocketTcp(threading.Thread):
             socket.setdefaulttimeout(1)
             self.fp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.fp.setblocking(1)
+            # requests are small and may be sent back-to-back, do not hold them back for the ack of the previous one
+            self.fp.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.fp.connect((ip, port))
 
             self.is_err = 0
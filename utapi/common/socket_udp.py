@@ -19,6 +19,8 @@ class SocketUDP(threading.Thread):
             self.addr = (ip, port)
             self.rx_que = queue.Queue(rxque_max)
             self.fp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            # SocketTcp sets a global default timeout, recv_proc must not stop while the module is silent
+            self.fp.settimeout(None)
 
             self.is_err = 0
             threading.Thread.__init__(self)
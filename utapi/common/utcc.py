@@ -6,6 +6,7 @@
 #
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
+import time
 from utapi.common import print_msg
 from utapi.common import hex_data
 from utapi.common import crc16
@@ -85,10 +86,7 @@ class UtccType():
 
         self.crc[0] = buf[self.len + 4]
         self.crc[1] = buf[self.len + 5]
-        temp1 = hex_data.bytes_to_uint16_big(self.crc)
-        crc = crc16.crc_modbus(buf[0:self.len + 4])
-        temp2 = hex_data.bytes_to_uint16_big(crc)
-        if temp1 != temp2:
+        if not crc16.crc_modbus_check(buf, self.len + 4):
             return UTCC_RX_ERROR.CRC
         return 0
 
@@ -114,7 +112,7 @@ class UtccClient():
         self.port_fp = port_fp
         self.port_fp.flush()
 
-    def connect_device(self, argv1=0xFFFFFFFF):
+    def connect_device(self, argv1=0xFFFFFFFF, timeout_s=2):
         tx_utcc = UtccType()
         tx_utcc.head = 0xAA
         tx_utcc.id = 0x0055
@@ -128,24 +126,25 @@ class UtccClient():
         # print(tx_utcc.data[0:8])
 
         self.send(tx_utcc)
-        ret, rx_utcc = self.pend(tx_utcc, 1, 2)
+        ret, rx_utcc = self.pend(tx_utcc, 1, timeout_s)
         if ret != 0:
             return ret
         return 0
 
-    def send(self, tx_utcc):
+    def send(self, tx_utcc, flush=True):
         buf = tx_utcc.pack()
-        self.port_fp.flush()
+        if flush:
+            self.port_fp.flush()
         self.port_fp.write(buf)
         # print_msg.nhex("MxBus send_xbus buf : ", buf, len(buf))
 
     def _pend(self, tx_utcc, timeout):
         """
-        timeout：ms
+        timeout：s
         """
         rx_utcc = UtccType()
         ret = UTCC_RX_ERROR.TIMEOUT
-        rx_data = self.port_fp.read(int(timeout))
+        rx_data = self.port_fp.read(timeout)
         if rx_data == -1 or len(rx_data) < 7:
             return (ret, rx_utcc)
 
@@ -168,20 +167,90 @@ class UtccClient():
         return (ret, rx_utcc)
 
     def pend(self, tx_utcc, rx_len, timeout):
-        rx_utcc1 = -1
+        """
+        timeout：s, for all frames of the response
+        A response longer than one frame is reassembled in a buffer of rx_len bytes,
+        rx_utcc.data of the returned frame is then a memoryview of this buffer.
+        """
+        deadline = time.monotonic() + timeout
+        ret, rx_utcc = self._pend(tx_utcc, timeout)
+        if ret != 0 and ret != UTCC_RX_ERROR.STATE:
+            return ret, rx_utcc
+        if rx_utcc.len == rx_len + 1:
+            return ret, rx_utcc
+
+        data = bytearray(rx_len)
+        n = 0
+        state = ret
+        rx_frame = rx_utcc
         while(1):
-            ret, rx_utcc2 = self._pend(tx_utcc, timeout)
+            if ret == UTCC_RX_ERROR.STATE:
+                state = ret
+            part = rx_frame.len - 1
+            if part < 0 or n + part > rx_len:
+                print("[UtccCil] Error: UTCC_RX_ERROR.LEN: %d %d" % (n + part, rx_len))
+                return UTCC_RX_ERROR.LEN, rx_frame
+            data[n:n + part] = bytes(rx_frame.data[0:part])
+            n += part
+            if n == rx_len:
+                rx_utcc.data = memoryview(data)
+                rx_utcc.len = rx_len + 1
+                return state, rx_utcc
+
+            ret, rx_frame = self._pend(tx_utcc, max(deadline - time.monotonic(), 0))
             if ret != 0 and ret != UTCC_RX_ERROR.STATE:
-                return ret, rx_utcc2
+                return ret, rx_frame
 
-            if rx_utcc1 == -1:
-                rx_utcc1 = rx_utcc2
+    def gather(self, tx_utcc, rx_len, ids, timeout_s):
+        """
+        Collects the responses to a broadcast request from several devices, as UtrcClient.gather().
+        The responses are indexed by the id of the sender, a response longer than one frame is
+        reassembled per sender so the frames of different devices may interleave.
+        return: {id: (ret, rx_utcc)} of the ids that answered
+        """
+        ids = set(ids)
+        replies = {}
+        parts = {}
+        deadline = time.monotonic() + timeout_s
+        while len(replies) < len(ids):
+            remain = deadline - time.monotonic()
+            if remain <= 0:
+                break
+            rx_data = self.port_fp.read(remain)
+            if rx_data == -1:
+                break
+            if len(rx_data) < 7:
+                continue
+
+            rx_utcc = UtccType()
+            if rx_utcc.unpack(rx_data) != 0:
+                continue
+            if rx_utcc.id not in ids or rx_utcc.id in replies:
+                continue
+            if tx_utcc.rw != rx_utcc.rw or tx_utcc.cmd != rx_utcc.cmd:
+                replies[rx_utcc.id] = (UTCC_RX_ERROR.CMD, rx_utcc)
+                continue
+            ret = UTCC_RX_ERROR.STATE if rx_utcc.state != 0 else 0
+            if rx_utcc.id not in parts and rx_utcc.len == rx_len + 1:
+                replies[rx_utcc.id] = (ret, rx_utcc)
+                continue
+
+            data, n, state = parts.get(rx_utcc.id, (bytearray(rx_len), 0, 0))
+            part = rx_utcc.len - 1
+            if part < 0 or n + part > rx_len:
+                replies[rx_utcc.id] = (UTCC_RX_ERROR.LEN, rx_utcc)
+                continue
+            data[n:n + part] = bytes(rx_utcc.data[0:part])
+            n += part
+            if ret == UTCC_RX_ERROR.STATE:
+                state = ret
+            if n == rx_len:
+                rx_utcc.data = memoryview(data)
+                rx_utcc.len = rx_len + 1
+                replies[rx_utcc.id] = (state, rx_utcc)
             else:
-                rx_utcc1.data = rx_utcc1.data[0:rx_utcc1.len - 1] + rx_utcc2.data[0:rx_utcc2.len - 1]
-                rx_utcc1.len = rx_utcc1.len + rx_utcc2.len - 1
-
-            if rx_utcc1.len == rx_len + 1:
-                return ret, rx_utcc1
+                parts[rx_utcc.id] = (data, n, state)
+        return replies
 
 
 class UTCC_RXSTART:
@@ -258,8 +327,7 @@ class UtccDecode:
             elif UTCC_RXSTART.CRC2 == self.rxstate:
                 self.rxbuf += rxch
                 self.rxstate = UTCC_RXSTART.FROMID
-                crc = crc16.crc_modbus(self.rxbuf[:self.len + 4])
-                if crc[0] == self.rxbuf[self.len + 4] and crc[1] == self.rxbuf[self.len + 5]:
+                if crc16.crc_modbus_check(self.rxbuf, self.len + 4):
                     if rx_que.full():
                         rx_que.get()
                     rx_que.put(self.rxbuf)
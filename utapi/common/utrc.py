@@ -6,6 +6,10 @@
 #
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
+import collections
+import struct
+import threading
+import time
 from utapi.common import print_msg
 from utapi.common import crc16
 from utapi.common import hex_data
@@ -32,6 +36,54 @@ class UTRC_RW:
     W = 1
 
 
+UTRC_HEAD = struct.Struct("BBBB")
+UTRC_DATA_MAX = 125
+
+
+class UtrcReg(tuple):
+    """
+    Immutable register descriptor, the five values of the former register lists:
+        [cmd, read tx len, read rx len, write tx len, write rx len]
+    reg[0] ... reg[4] still work. A length of 0x55 is variable, with_len() returns a descriptor with the
+    lengths of one call, so the shared definitions are never modified and can be used by any thread.
+    """
+    __slots__ = ()
+
+    def __new__(cls, cmd, r_tx_len, r_rx_len, w_tx_len, w_rx_len):
+        return tuple.__new__(cls, (cmd, r_tx_len, r_rx_len, w_tx_len, w_rx_len))
+
+    @property
+    def cmd(self):
+        return self[0]
+
+    @property
+    def r_tx_len(self):
+        return self[1]
+
+    @property
+    def r_rx_len(self):
+        return self[2]
+
+    @property
+    def w_tx_len(self):
+        return self[3]
+
+    @property
+    def w_rx_len(self):
+        return self[4]
+
+    def with_len(self, r_tx_len=None, r_rx_len=None, w_tx_len=None, w_rx_len=None):
+        """Returns a copy with the given lengths replaced"""
+        return UtrcReg(self[0],
+                       self[1] if r_tx_len is None else r_tx_len,
+                       self[2] if r_rx_len is None else r_rx_len,
+                       self[3] if w_tx_len is None else w_tx_len,
+                       self[4] if w_rx_len is None else w_rx_len)
+
+    def __repr__(self):
+        return "UtrcReg(0x%02X, %r, %r, %r, %r)" % self
+
+
 class UtrcType:
     def __init__(self):
         self.master_id = 0xAA
@@ -40,47 +92,55 @@ class UtrcType:
         self.len = 0
         self.rw = 0
         self.cmd = 0
-        self.data = [0] * 125
+        self.data = [0] * UTRC_DATA_MAX
         self.crc = [0] * 2
 
         self.buf = bytes([0])
+        self.payload = memoryview(b"")
+        self._txbuf = bytearray(UTRC_HEAD.size + 0x7F + 2)
+        self._txview = memoryview(self._txbuf)
 
     def pack(self):
-        self.buf = bytes([self.master_id])
-        self.buf += bytes([self.slave_id])
-        self.buf += bytes([((self.state & 0x01) << 7) + (self.len & 0x7F)])
-        self.buf += bytes([((self.rw & 0x01) << 7) + (self.cmd & 0x7F)])
-
-        for i in range(self.len - 1):
-            self.buf += bytes([self.data[i]])
-
-        self.crc = crc16.crc_modbus(self.buf)
-        self.buf += self.crc
+        """
+        Packs the frame into a preallocated buffer.
+        The returned memoryview is only valid until the next pack() of this object.
+        """
+        data_len = self.len - 1
+        if data_len < 0:
+            data_len = 0
+        end = UTRC_HEAD.size + data_len
+        UTRC_HEAD.pack_into(self._txbuf, 0, self.master_id, self.slave_id,
+                            ((self.state & 0x01) << 7) + (self.len & 0x7F),
+                            ((self.rw & 0x01) << 7) + (self.cmd & 0x7F))
+        self._txbuf[UTRC_HEAD.size:end] = self.data[0:data_len]
+
+        self.crc = crc16.crc_modbus(self._txview[:end])
+        self._txbuf[end:end + 2] = self.crc
+        self.buf = self._txview[:end + 2]
         return self.buf
 
     def unpack(self, buf):
         self.buf = buf
-        if len(buf) < 6:
-            print("[UtrcType] Error: UTRC_RX_ERROR.LEN: %d" % (len(buf)))
+        buf_len = len(buf)
+        if buf_len < 6:
+            print("[UtrcType] Error: UTRC_RX_ERROR.LEN: %d" % (buf_len))
             return UTRC_RX_ERROR.LEN
 
-        self.len = buf[2] & 0x7F
-        if self.len + 5 != len(buf):
-            print("[UtrcType] Error: UTRC_RX_ERROR.LEN: %d %d" % (self.len, len(buf)))
+        self.master_id, self.slave_id, len_byte, cmd_byte = UTRC_HEAD.unpack_from(buf, 0)
+        self.len = len_byte & 0x7F
+        if self.len + 5 != buf_len:
+            print("[UtrcType] Error: UTRC_RX_ERROR.LEN: %d %d" % (self.len, buf_len))
             return UTRC_RX_ERROR.LEN
 
-        self.master_id = buf[0]
-        self.slave_id = buf[1]
-        self.state = (buf[2] & 0x80) >> 7
-        self.rw = (buf[3] & 0x80) >> 7
-        self.cmd = buf[3] & 0x7F
+        self.state = (len_byte & 0x80) >> 7
+        self.rw = (cmd_byte & 0x80) >> 7
+        self.cmd = cmd_byte & 0x7F
 
-        data_len = self.len - 1
-        for i in range(data_len):
-            self.data[i] = buf[4 + i]
+        end = self.len + 3
+        self.payload = memoryview(buf)[4:end]
+        self.data[0:end - 4] = self.payload
 
-        self.crc[0] = buf[data_len + 4]
-        self.crc[1] = buf[data_len + 5]
+        self.crc = [buf[end], buf[end + 1]]
         return 0
 
     def print_pack(self):
@@ -101,11 +161,12 @@ class UtrcType:
 
 
 class UtrcClient:
-    def __init__(self, port_fp):
+    def __init__(self, port_fp, pipeline=None):
         self.port_fp = port_fp
+        self.pipeline = pipeline
         self.port_fp.flush()
 
-    def connect_device(self, argv1=0xFFFFFFFF):
+    def connect_device(self, argv1=0xFFFFFFFF, timeout_s=1):
         tx_utrc = UtrcType()
         tx_utrc.master_id = 0xAA
         tx_utrc.slave_id = 0x55
@@ -119,15 +180,16 @@ class UtrcClient:
         buf = tx_utrc.pack()
         self.port_fp.flush(tx_utrc.slave_id, tx_utrc.master_id)
         self.port_fp.write(buf)
-        ret, rx_utrc = self.pend(tx_utrc, 1, 1)
+        ret, rx_utrc = self.pend(tx_utrc, 1, timeout_s)
         if ret != 0:
             return ret
         return 0
 
-    def send(self, tx_utrc):
+    def send(self, tx_utrc, flush=True):
         buf = tx_utrc.pack()
         # tx_utrc.print_buf()
-        self.port_fp.flush(tx_utrc.slave_id, tx_utrc.master_id)
+        if flush:
+            self.port_fp.flush(tx_utrc.slave_id, tx_utrc.master_id)
         self.port_fp.write(buf)
         # print_msg.nhex("UtrcClient send_xbus buf : ", buf, len(buf))
 
@@ -145,25 +207,236 @@ class UtrcClient:
         ret = rx_utrc.unpack(rx_data)
         if ret != 0:
             return (ret, rx_utrc)
-        elif rx_utrc.master_id != tx_utrc.slave_id and tx_utrc.slave_id != 0x55:
-            print("[UtrcClie] Error: UTRC_RX_ERROR.M_ID: %d %d" % (rx_utrc.master_id, tx_utrc.slave_id))
-            ret = UTRC_RX_ERROR.M_ID
-        elif rx_utrc.slave_id != tx_utrc.master_id:
-            print("[UtrcClie] Error: UTRC_RX_ERROR.S_ID: %d %d" % (rx_utrc.slave_id, tx_utrc.master_id))
-            ret = UTRC_RX_ERROR.S_ID
-        elif rx_utrc.state != 0:
-            ret = UTRC_RX_ERROR.STATE
-        elif rx_utrc.len != r_len + 1 and r_len != 0x55:
-            print("[UtrcClie] Error: UTRC_RX_ERROR.LEN: %d %d" % (rx_utrc.len, r_len))
-            ret = UTRC_RX_ERROR.LEN
-        elif rx_utrc.rw != tx_utrc.rw:
-            print("[UtrcClie] Error: UTRC_RX_ERROR.RW: %d %d" % (rx_utrc.rw, tx_utrc.rw))
-            ret = UTRC_RX_ERROR.RW
-        elif rx_utrc.cmd != tx_utrc.cmd:
-            print("[UtrcClie] Error: UTRC_RX_ERROR.CMD: %d %d" % (rx_utrc.cmd, tx_utrc.cmd))
-            ret = UTRC_RX_ERROR.CMD
-
-        return (ret, rx_utrc)
+        return (utrc_check(tx_utrc, rx_utrc, r_len), rx_utrc)
+
+    def gather(self, tx_utrc, r_len, ids, timeout_s):
+        """
+        Collects the responses to a broadcast request from several devices.
+        The responses are indexed by their master_id, so the order of arrival and the devices that do not answer
+        do not matter. Returns when all ids answered or after timeout_s in total.
+        return: {id: (ret, rx_utrc)} of the ids that answered
+        """
+        ids = set(ids)
+        replies = {}
+        deadline = time.monotonic() + timeout_s
+        while len(replies) < len(ids):
+            remain = deadline - time.monotonic()
+            if remain <= 0:
+                break
+            rx_data = self.port_fp.read(remain)
+            if rx_data == -1:
+                break
+            if len(rx_data) < 6:
+                continue
+
+            rx_utrc = UtrcType()
+            if rx_utrc.unpack(rx_data) != 0:
+                continue
+            if rx_utrc.master_id not in ids or rx_utrc.master_id in replies:
+                continue
+            replies[rx_utrc.master_id] = (utrc_check(tx_utrc, rx_utrc, r_len), rx_utrc)
+        return replies
+
+    def submit(self, tx_utrc, r_len, timeout_s):
+        """
+        Sends tx_utrc and returns a UtrcFuture for its response.
+        Without a pipeline the request is completed synchronously before returning.
+        """
+        if self.pipeline is not None:
+            return self.pipeline.submit(self.port_fp, tx_utrc, r_len, timeout_s)
+
+        future = UtrcFuture(tx_utrc, r_len, timeout_s)
+        self.send(tx_utrc)
+        ret, rx_utrc = self.pend(tx_utrc, r_len, timeout_s)
+        future.set_result(ret, rx_utrc)
+        return future
+
+
+def utrc_check(tx_utrc, rx_utrc, r_len):
+    """
+    Checks that rx_utrc is the response to tx_utrc, tx_utrc only needs master_id, slave_id, rw and cmd
+    """
+    ret = 0
+    if rx_utrc.master_id != tx_utrc.slave_id and tx_utrc.slave_id != 0x55:
+        print("[UtrcClie] Error: UTRC_RX_ERROR.M_ID: %d %d" % (rx_utrc.master_id, tx_utrc.slave_id))
+        ret = UTRC_RX_ERROR.M_ID
+    elif rx_utrc.slave_id != tx_utrc.master_id:
+        print("[UtrcClie] Error: UTRC_RX_ERROR.S_ID: %d %d" % (rx_utrc.slave_id, tx_utrc.master_id))
+        ret = UTRC_RX_ERROR.S_ID
+    elif rx_utrc.state != 0:
+        ret = UTRC_RX_ERROR.STATE
+    elif rx_utrc.len != r_len + 1 and r_len != 0x55:
+        print("[UtrcClie] Error: UTRC_RX_ERROR.LEN: %d %d" % (rx_utrc.len, r_len))
+        ret = UTRC_RX_ERROR.LEN
+    elif rx_utrc.rw != tx_utrc.rw:
+        print("[UtrcClie] Error: UTRC_RX_ERROR.RW: %d %d" % (rx_utrc.rw, tx_utrc.rw))
+        ret = UTRC_RX_ERROR.RW
+    elif rx_utrc.cmd != tx_utrc.cmd:
+        print("[UtrcClie] Error: UTRC_RX_ERROR.CMD: %d %d" % (rx_utrc.cmd, tx_utrc.cmd))
+        ret = UTRC_RX_ERROR.CMD
+    return ret
+
+
+class UtrcFuture:
+    """
+    Pending response of one UTRC request, keeps a copy of the request header
+    because the UtrcType that was sent is reused by the caller.
+    """
+
+    def __init__(self, tx_utrc, r_len, timeout_s):
+        self.master_id = tx_utrc.master_id
+        self.slave_id = tx_utrc.slave_id
+        self.rw = tx_utrc.rw
+        self.cmd = tx_utrc.cmd
+        self.r_len = r_len
+        self.deadline = time.monotonic() + timeout_s
+
+        self.ret = UTRC_RX_ERROR.TIMEOUT
+        self.rx_utrc = None
+        self.__event = threading.Event()
+        self.__callbacks = []
+        self.__mutex = threading.Lock()
+
+    def done(self):
+        return self.__event.is_set()
+
+    def set_result(self, ret, rx_utrc):
+        with self.__mutex:
+            if self.__event.is_set():
+                return
+            self.ret = ret
+            self.rx_utrc = rx_utrc
+            self.__event.set()
+            callbacks = self.__callbacks
+            self.__callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        """
+        callback(future) is called from the receive thread, or immediately if the future is already done
+        """
+        with self.__mutex:
+            if not self.__event.is_set():
+                self.__callbacks.append(callback)
+                return
+        callback(self)
+
+    def result(self, timeout_s=None):
+        """
+        Waits for the response, by default until the deadline given at submit time
+        return: (ret, rx_utrc) the same as UtrcClient.pend()
+        """
+        if timeout_s is None:
+            timeout_s = self.deadline - time.monotonic()
+        if timeout_s > 0:
+            self.__event.wait(timeout_s)
+        if not self.__event.is_set():
+            return (UTRC_RX_ERROR.TIMEOUT, UtrcType())
+        return (self.ret, self.rx_utrc)
+
+
+class _UtrcFrameSink:
+    """
+    Stands in for rx_que when the pipeline calls the inner decoder
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def full(self):
+        return False
+
+    def get(self):
+        return None
+
+    def put(self, frame):
+        self.pipeline.dispatch(frame)
+
+
+class UtrcPipeline:
+    """
+    Keeps several UTRC requests in flight on one connection.
+    It is installed as the bus_decode of a socket, wraps the real decoder and resolves
+    the UtrcFuture of each response in the receive thread. Responses are matched to
+    requests by (cmd, rw) in the order the requests were written.
+    Frames that match no request are put in the socket rx_que as before.
+    """
+
+    def __init__(self, decoder, stale_s=1):
+        self.DB_FLG = "[UtrcPipe] "
+        self.decoder = decoder
+        self.stale_s = stale_s
+        self.inflight = collections.deque()
+        self.mutex = threading.Lock()
+        self.__sink = _UtrcFrameSink(self)
+        self.__rx_que = None
+
+    def flush(self, fromid=-1, toid=-1):
+        self.decoder.flush(fromid, toid)
+
+    def put(self, rxstr, length, rx_que):
+        self.__rx_que = rx_que
+        self.decoder.put(rxstr, length, self.__sink)
+
+    def submit(self, port_fp, tx_utrc, r_len, timeout_s):
+        future = UtrcFuture(tx_utrc, r_len, timeout_s)
+        with self.mutex:
+            stale = self.__drop_stale(time.monotonic())
+            buf = tx_utrc.pack()
+            self.inflight.append(future)
+            ret = port_fp.write(buf)
+            if ret != 0:
+                self.inflight.remove(future)
+        self.__expire(stale)
+        if ret != 0:
+            future.set_result(UTRC_RX_ERROR.CONNECT, UtrcType())
+        return future
+
+    def dispatch(self, frame):
+        rx_utrc = UtrcType()
+        if rx_utrc.unpack(frame) != 0:
+            return
+
+        future = None
+        with self.mutex:
+            for i in range(len(self.inflight)):
+                if self.inflight[i].cmd == rx_utrc.cmd and self.inflight[i].rw == rx_utrc.rw:
+                    future = self.inflight[i]
+                    del self.inflight[i]
+                    break
+            stale = self.__drop_stale(time.monotonic())
+        self.__expire(stale)
+
+        if future is not None:
+            future.set_result(utrc_check(future, rx_utrc, future.r_len), rx_utrc)
+        elif self.__rx_que is not None:
+            if self.__rx_que.full():
+                self.__rx_que.get()
+            self.__rx_que.put(frame)
+
+    def abort(self, ret=UTRC_RX_ERROR.CONNECT):
+        """
+        Completes every request still in flight with ret, used when the connection is lost
+        """
+        with self.mutex:
+            inflight = list(self.inflight)
+            self.inflight.clear()
+        for future in inflight:
+            future.set_result(ret, UtrcType())
+
+    def __drop_stale(self, now):
+        # a request whose caller gave up is kept for stale_s so that its late response is not
+        # taken by a newer request with the same (cmd, rw)
+        stale = []
+        while len(self.inflight) and self.inflight[0].deadline + self.stale_s < now:
+            stale.append(self.inflight.popleft())
+        return stale
+
+    def __expire(self, stale):
+        # completed outside the mutex, the callbacks of a request without a response learn that it timed out
+        for future in stale:
+            future.set_result(UTRC_RX_ERROR.TIMEOUT, UtrcType())
 
 
 class UX2HEX_RXSTART:
@@ -177,15 +450,16 @@ class UX2HEX_RXSTART:
 
 
 class UtrcDecode:
-    def __init__(self, fromid, toid):
+    def __init__(self, fromid, toid, rxlen_max=UX2HEX_RXSTART.RXLEN_MAX):
         self.DB_FLG = "[ux2 ptcl] "
+        self.rxlen_max = rxlen_max
+        self.rxbuf = bytearray()
         self.flush(fromid, toid)
 
     # wipe cache , set from_id and to_id
     def flush(self, fromid=-1, toid=-1):
-        self.rxstate = UX2HEX_RXSTART.FROMID
-        self.data_idx = 0
         self.len = 0
+        del self.rxbuf[:]
         if fromid != -1:
             self.fromid = fromid
         if toid != -1:
@@ -196,51 +470,53 @@ class UtrcDecode:
             length = len(rxstr)
         if len(rxstr) < length:
             print(self.DB_FLG + "error: len(rxstr) < length")
+            length = len(rxstr)
 
-        for i in range(length):
-            rxch = bytes([rxstr[i]])
-            # print_msg.nhex(self.DB_FLG, rxch, 1)
-            # print('state:%d 0x%x' % (self.rxstate, self.fromid))
-            if UX2HEX_RXSTART.FROMID == self.rxstate:
-                if self.fromid == rxch[0] or self.fromid == 0x55:
-                    self.rxbuf = rxch
-                    self.rxstate = UX2HEX_RXSTART.TOID
-
-            elif UX2HEX_RXSTART.TOID == self.rxstate:
-                if self.toid == rxch[0]:
-                    self.rxbuf += rxch
-                    self.rxstate = UX2HEX_RXSTART.LEN
-                else:
-                    self.rxstate = UX2HEX_RXSTART.FROMID
-
-            elif UX2HEX_RXSTART.LEN == self.rxstate:
-                if (rxch[0] & 0x7F) < UX2HEX_RXSTART.RXLEN_MAX:
-                    self.rxbuf += rxch
-                    self.len = rxch[0] & 0x7F
-                    self.data_idx = 0
-                    self.rxstate = UX2HEX_RXSTART.DATA
-                else:
-                    self.rxstate = UX2HEX_RXSTART.FROMID
-
-            elif UX2HEX_RXSTART.DATA == self.rxstate:
-                if self.data_idx < self.len:
-                    self.rxbuf += rxch
-                    self.data_idx += 1
-                    if self.data_idx == self.len:
-                        self.rxstate = UX2HEX_RXSTART.CRC1
-                else:
-                    self.rxstate = UX2HEX_RXSTART.FROMID
-
-            elif UX2HEX_RXSTART.CRC1 == self.rxstate:
-                self.rxbuf += rxch
-                self.rxstate = UX2HEX_RXSTART.CRC2
-
-            elif UX2HEX_RXSTART.CRC2 == self.rxstate:
-                self.rxbuf += rxch
-                self.rxstate = UX2HEX_RXSTART.FROMID
-                crc = crc16.crc_modbus(self.rxbuf[:self.len + 3])
-                if crc[0] == self.rxbuf[self.len + 3] and crc[1] == self.rxbuf[self.len + 4]:
-                    if rx_que.full():
-                        rx_que.get()
-                    rx_que.put(self.rxbuf)
-                    # print_msg.nhex("[UtrcDeco] rx_que.put: ", self.rxbuf, len(self.rxbuf))
+        rxbuf = self.rxbuf
+        rxbuf += memoryview(rxstr)[:length]
+        buf_len = len(rxbuf)
+        pos = 0
+        while pos < buf_len:
+            # FROMID: skip to the next candidate header byte
+            if self.fromid == 0x55:
+                start = pos
+            else:
+                start = rxbuf.find(self.fromid, pos)
+                if start < 0:
+                    pos = buf_len
+                    break
+            pos = start
+
+            # TOID: a wrong to_id drops both header bytes
+            if buf_len - start < 2:
+                break
+            if rxbuf[start + 1] != self.toid:
+                pos = start + 2
+                continue
+
+            # LEN: an oversize len drops the three header bytes, len 0 also drops the next byte
+            if buf_len - start < 3:
+                break
+            self.len = rxbuf[start + 2] & 0x7F
+            if self.len >= self.rxlen_max:
+                pos = start + 3
+                continue
+            if self.len == 0:
+                if buf_len - start < 4:
+                    break
+                pos = start + 4
+                continue
+
+            # DATA + CRC: a complete frame is dropped as a whole if the crc is wrong
+            frame_len = self.len + 5
+            if buf_len - start < frame_len:
+                break
+            pos = start + frame_len
+            frame = bytes(rxbuf[start:pos])
+            if crc16.crc_modbus_check(frame, self.len + 3):
+                if rx_que.full():
+                    rx_que.get()
+                rx_que.put(frame)
+                # print_msg.nhex("[UtrcDeco] rx_que.put: ", frame, frame_len)
+
+        del rxbuf[:pos]
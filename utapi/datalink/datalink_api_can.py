@@ -7,12 +7,12 @@
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
 import time
-import socket
 from utapi.common import hex_data
 from utapi.common.utcc import UtccClient, UtccType, UtccDecode
 from utapi.common.socket_udp import SocketUDP
 from utapi.common.socket_tcp import SocketTcp
 from utapi.common.socket_serial import SocketSerial
+from utapi.common.net_reset import connect_ready, open_ready, reset_net
 from utapi.common import crc16
 
 
@@ -36,7 +36,7 @@ class DataLinkApiCan():
                     4. If connection type is TCP and DataLink is not connected to TCP or UDP after being powered on, you do not need to reset.
                     5. If connection type is USB and DataLink is not connected to USB after being powered on, reset is required.
                     6. If connection type is USB and DataLink is connected to USB after being powered on, you do not need to reset.
-                    Note: In any case, it is good to use reset, but the initialization time is about 3 seconds longer than that without reset.
+                    Note: In any case, it is good to use reset, the initialization waits until the module answers again after the reset.
                     Note: After DataLink is powered on and connected to USB, it needs to be powered on again to connect to TCP or UDP.
             baud (int, optional): Set the baud rate of the EtherNet to CAN module to be the same as that of the actuator.
                                   If the baud rate is set to 0xFFFFFFFF, the baud rate of the EtherNet to CAN module is not set.
@@ -53,7 +53,7 @@ class DataLinkApiCan():
                   (self.ip, self.tcp_port, self.udp_port, baud))
             if is_reset:
                 self._reset_net(self.ip, self.tcp_port, self.udp_port)
-            self.socket_fp = self._connect_to_tcp(self.ip, self.tcp_port, baud)
+            self.socket_fp = self._connect_to_tcp(self.ip, self.tcp_port, baud, is_reset)
 
         elif connect_type == 2:
             self.ip = argv[0]
@@ -63,7 +63,7 @@ class DataLinkApiCan():
                   (self.ip, self.tcp_port, self.udp_port, baud))
             if is_reset:
                 self._reset_net(self.ip, self.tcp_port, self.udp_port)
-            self.socket_fp = self._connect_to_udp(self.ip, self.udp_port, baud)
+            self.socket_fp = self._connect_to_udp(self.ip, self.udp_port, baud, is_reset)
 
         elif connect_type == 3:
             self.com = argv[0]
@@ -76,23 +76,20 @@ class DataLinkApiCan():
             self.__is_err = 1
             return
 
-    def _connect_to_tcp(self, ip, port, baud):
+    def _connect_to_tcp(self, ip, port, baud, is_reset=0):
         self.bus_decode = UtccDecode(0xAA, id)
-        socket_fp = SocketTcp(ip, port, self.bus_decode)
+        ret, socket_fp, self.bus_client = open_ready(lambda: SocketTcp(ip, port, self.bus_decode), UtccClient, baud, is_reset)
         if socket_fp.is_error() != 0:
             print(self.DB_FLG + "Error: SocketTCP, ip:%s, port:%d" % (ip, port))
             self.__is_err = 1
             return
-        socket_fp.flush()
-        self.bus_client = UtccClient(socket_fp)
-        ret = self.bus_client.connect_device(baud)
         if ret != 0:
             print(self.DB_FLG + "Error: connect_device: ret = ", ret)
             self.__is_err = 1
             return
         return socket_fp
 
-    def _connect_to_udp(self, ip, port, baud):
+    def _connect_to_udp(self, ip, port, baud, is_reset=0):
         socket_fp = SocketUDP(ip, port)
         if socket_fp.is_error() != 0:
             print(self.DB_FLG + "Error: SocketUDP, ip:%s, port:%d" % (ip, port))
@@ -100,7 +97,7 @@ class DataLinkApiCan():
             return
         socket_fp.flush()
         self.bus_client = UtccClient(socket_fp)
-        ret = self.bus_client.connect_device(baud)
+        ret = connect_ready(self.bus_client, baud, is_reset)
         if ret != 0:
             print(self.DB_FLG + "Error: connect_device: ret = ", ret)
             self.__is_err = 1
@@ -131,25 +128,8 @@ class DataLinkApiCan():
         tx_utcc.cmd = 0x7F
         tx_utcc.data[0:8] = [0x7F, 0x7F, 0x7F, 0x7F, 0x7F, 0x7F, 0x7F]
         buf = tx_utcc.pack()
-
-        try:
-            print(self.DB_FLG + "Reset Net Step1: connect to tcp")
-            fp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            fp.connect((ip, tcp_port))
-            fp.send(buf)
-        except Exception as err:
-            print(err)
-        time.sleep(0.1)
-
-        try:
-            print(self.DB_FLG + "Reset Net Step2: connect to udp")
-            addr = (ip, udp_port)
-            fp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            fp.sendto(buf, addr)
-        except Exception as err:
-            print(err)
+        reset_net(ip, tcp_port, udp_port, buf, self.DB_FLG)
         self.__is_err = 0
-        time.sleep(3)
 
     def is_error(self):
         u"""Gets the connection status of the DataLink.
@@ -211,11 +191,7 @@ class DataLinkApiCan():
                 return -1
 
             buf_len = len(buf)
-            crc1 = [buf[buf_len - 2], buf[buf_len - 1]]
-            temp1 = hex_data.bytes_to_uint16_big(crc1)
-            crc2 = crc16.crc_modbus(buf[0:buf_len - 2])
-            temp2 = hex_data.bytes_to_uint16_big(crc2)
-            if temp1 != temp2:
+            if not crc16.crc_modbus_check(buf, buf_len - 2):
                 print(self.DB_FLG + "Error, The CRC check of received data is incorrect.")
                 continue
 
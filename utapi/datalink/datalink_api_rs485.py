@@ -7,11 +7,11 @@
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
 import time
-import socket
 from utapi.common.utrc import UtrcClient, UtrcType
 from utapi.common.socket_udp import SocketUDP
 from utapi.common.socket_tcp import SocketTcp
 from utapi.common.socket_serial import SocketSerial
+from utapi.common.net_reset import connect_ready, open_ready, reset_net
 
 
 class DataLinkApiRs485():
@@ -34,7 +34,7 @@ class DataLinkApiRs485():
                     4. If connection type is TCP and DataLink is not connected to TCP or UDP after being powered on, you do not need to reset.
                     5. If connection type is USB and DataLink is not connected to USB after being powered on, reset is required.
                     6. If connection type is USB and DataLink is connected to USB after being powered on, you do not need to reset.
-                    Note: In any case, it is good to use reset, but the initialization time is about 3 seconds longer than that without reset.
+                    Note: In any case, it is good to use reset, the initialization waits until the module answers again after the reset.
                     Note: After DataLink is powered on and connected to USB, it needs to be powered on again to connect to TCP or UDP.
             baud (int, optional): Set the baud rate of the EtherNet to RS485 module to be the same as that of the actuator.
                                   If the baud rate is set to 0xFFFFFFFF, the baud rate of the EtherNet to RS485 module is not set.
@@ -51,7 +51,7 @@ class DataLinkApiRs485():
                   (self.ip, self.tcp_port, self.udp_port, baud))
             if is_reset:
                 self._reset_net(self.ip, self.tcp_port, self.udp_port)
-            self.socket_fp = self._connect_to_tcp(self.ip, self.tcp_port, baud)
+            self.socket_fp = self._connect_to_tcp(self.ip, self.tcp_port, baud, is_reset)
 
         elif connect_type == 2:
             self.ip = argv[0]
@@ -61,7 +61,7 @@ class DataLinkApiRs485():
                   (self.ip, self.tcp_port, self.udp_port, baud))
             if is_reset:
                 self._reset_net(self.ip, self.tcp_port, self.udp_port)
-            self.socket_fp = self._connect_to_udp(self.ip, self.udp_port, baud)
+            self.socket_fp = self._connect_to_udp(self.ip, self.udp_port, baud, is_reset)
 
         elif connect_type == 3:
             self.com = argv[0]
@@ -74,22 +74,19 @@ class DataLinkApiRs485():
             self.__is_err = 1
             return
 
-    def _connect_to_tcp(self, ip, port, baud):
-        socket_fp = SocketTcp(ip, port)
+    def _connect_to_tcp(self, ip, port, baud, is_reset=0):
+        ret, socket_fp, self.bus_client = open_ready(lambda: SocketTcp(ip, port), UtrcClient, baud, is_reset)
         if socket_fp.is_error() != 0:
             print(self.DB_FLG + "Error: SocketTCP, ip:%s, port:%d" % (ip, port))
             self.__is_err = 1
             return
-        socket_fp.flush()
-        self.bus_client = UtrcClient(socket_fp)
-        ret = self.bus_client.connect_device(baud)
         if ret != 0:
             print(self.DB_FLG + "Error: connect_device: ret = ", ret)
             self.__is_err = 1
             return
         return socket_fp
 
-    def _connect_to_udp(self, ip, port, baud):
+    def _connect_to_udp(self, ip, port, baud, is_reset=0):
         socket_fp = SocketUDP(ip, port)
         if socket_fp.is_error() != 0:
             print(self.DB_FLG + "Error: SocketUDP, ip:%s, port:%d" % (ip, port))
@@ -97,7 +94,7 @@ class DataLinkApiRs485():
             return
         socket_fp.flush()
         self.bus_client = UtrcClient(socket_fp)
-        ret = self.bus_client.connect_device(baud)
+        ret = connect_ready(self.bus_client, baud, is_reset)
         if ret != 0:
             print(self.DB_FLG + "Error: connect_device: ret = ", ret)
             self.__is_err = 1
@@ -127,24 +124,8 @@ class DataLinkApiRs485():
         tx_utrc.cmd = 0x7F
         tx_utrc.data[0:8] = [0x7F, 0x7F, 0x7F, 0x7F, 0x7F, 0x7F, 0x7F]
         buf = tx_utrc.pack()
-        try:
-            print(self.DB_FLG + "Reset Net Step1: connect to tcp")
-            fp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            fp.connect((ip, tcp_port))
-            fp.send(buf)
-        except Exception as err:
-            print(err)
-        time.sleep(0.1)
-
-        try:
-            print(self.DB_FLG + "Reset Net Step2: connect to udp")
-            addr = (ip, udp_port)
-            fp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            fp.sendto(buf, addr)
-        except Exception as err:
-            print(err)
+        reset_net(ip, tcp_port, udp_port, buf, self.DB_FLG)
         self.__is_err = 0
-        time.sleep(3)
 
     def is_error(self):
         u"""Gets the connection status of the DataLink.
@@ -7,14 +7,14 @@
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
 from utapi.base.servo_api_base import _ServoApiBase
-from utapi.common.utrc import UTRC_RW
+from utapi.common.utrc import UTRC_RW, UtrcReg
 from utapi.common import hex_data
 
 
 class FLXIE_REG:
     null = 0
-    UNLOCK_FUN = [0x22, 0, 1, 1, 0]
-    SENSER1 = [0x60, 0, 16, null, null]
+    UNLOCK_FUN = UtrcReg(0x22, 0, 1, 1, 0)
+    SENSER1 = UtrcReg(0x60, 0, 16, null, null)
 
 
 class FlxiE2ApiBase(_ServoApiBase):
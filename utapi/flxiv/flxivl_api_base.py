@@ -7,13 +7,13 @@
 # Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
 # =============================================================================
 from utapi.base.servo_api_base import _ServoApiBase
-from utapi.common.utrc import UTRC_RW
+from utapi.common.utrc import UTRC_RW, UtrcReg
 from utapi.common import hex_data
 
 
 class FLXIV_REG:
     null = 0
-    SENSER1 = [0x60, 0, 16, null, null]
+    SENSER1 = UtrcReg(0x60, 0, 16, null, null)
 
 
 class FlxiVlApiBase(_ServoApiBase):
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import asyncio
+import logging
+import queue
+import time
+
+from utapi.base.arm_api_base import _ArmApiBase
+from utapi.common.utrc import UTRC_RX_ERROR, UtrcDecode, UtrcPipeline
+
+
+class UtrcProtocol(asyncio.Protocol):
+    """
+    asyncio transport of one UTRC connection.
+    It also provides the socket interface (is_error/flush/write/read/close) used by UtrcClient.
+    """
+
+    def __init__(self, pipeline):
+        self.DB_FLG = "[UtrcProto] "
+        self.pipeline = pipeline
+        self.transport = None
+        self.rx_que = queue.Queue(10)
+        self.is_err = 1
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.is_err = 0
+
+    def data_received(self, data):
+        self.pipeline.put(data, len(data), self.rx_que)
+
+    def connection_lost(self, exc):
+        if exc is not None:
+            logging.error(self.DB_FLG + "connection lost: %s" % exc)
+        self.is_err = 1
+        self.pipeline.abort(UTRC_RX_ERROR.CONNECT)
+
+    def is_error(self):
+        return self.is_err
+
+    def flush(self, fromid=-1, toid=-1):
+        if self.is_err != 0:
+            return -1
+        while not self.rx_que.empty():
+            self.rx_que.get()
+        self.pipeline.flush(fromid, toid)
+        return 0
+
+    def write(self, data):
+        if self.is_err != 0:
+            return -1
+        # the frame buffer is reused by the next pack(), the transport may keep a reference
+        self.transport.write(bytes(data))
+        return 0
+
+    def read(self, timeout_s=None):
+        if self.is_err != 0 or self.rx_que.empty():
+            return -1
+        return self.rx_que.get()
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+        self.is_err = 1
+
+
+class AsyncUtraApi(_ArmApiBase):
+    def __init__(self, ip, port=502):
+        """This is the asyncio API of Umbratek's UTRA series robot arm.
+        It has the same methods as UtraApiTcp, every method that talks to the arm is a coroutine.
+        No thread is created, all connections are driven by the event loop.
+        The methods of _ArmApiBase build the requests and decode the responses, this class only
+        overrides the hooks that wait for them (_wait, _then, _done, _run).
+
+            ubot = await AsyncUtraApi.connect("192.168.1.xxx")
+            ret, joint = await ubot.get_joint_target_pos()
+
+        Args:
+            ip (string): IP address of UTRA robotic arm
+            port (int, optional): TCP port. Defaults to 502.
+        """
+        self.DB_FLG = "[UbotAsync] "
+        self.ip = ip
+        self.port = port
+        self.pipeline = UtrcPipeline(UtrcDecode(0x55, 0xAA, 0x80))
+        self.socket_fp = None
+
+    @classmethod
+    async def connect(cls, ip, port=502):
+        """Creates an AsyncUtraApi and opens the connection
+
+        Returns:
+            ubot (AsyncUtraApi): Check ubot.is_err() for the result of the connection
+        """
+        ubot = cls(ip, port)
+        await ubot.open()
+        return ubot
+
+    async def open(self):
+        """Opens the TCP connection and reads the number of arm axes
+
+        Returns:
+            ret (int): Function execution result code, refer to appendix for code meaning
+        """
+        loop = asyncio.get_event_loop()
+        try:
+            transport, protocol = await loop.create_connection(lambda: UtrcProtocol(self.pipeline), self.ip, self.port)
+        except OSError as err:
+            logging.error(self.DB_FLG + "Error: connect, ip:%s, port:%d, %s" % (self.ip, self.port, err))
+            protocol = UtrcProtocol(self.pipeline)
+        self._init_link(protocol, 0x55, self.pipeline)
+        ret, axis = await self.get_axis()
+        self._init_axis(ret, axis)
+        return ret
+
+    async def _wait(self, future, timeout_s=None):
+        if timeout_s is None:
+            timeout_s = future.deadline - time.monotonic()
+        if not future.done():
+            waiter = asyncio.get_event_loop().create_future()
+
+            def wake(future):
+                if not waiter.done():
+                    waiter.set_result(None)
+
+            # the pipeline resolves futures in data_received(), i.e. in the loop thread
+            future.add_done_callback(wake)
+            try:
+                await asyncio.wait_for(waiter, max(0, timeout_s))
+            except asyncio.TimeoutError:
+                pass
+        return future.result(0)
+
+    async def _then(self, result, decode):
+        return decode(*(await result))
+
+    async def _done(self, value):
+        return value
+
+    async def _run(self, steps):
+        value = None
+        try:
+            while True:
+                value = await steps.send(value)
+        except StopIteration as stop:
+            return stop.value
+
+    async def request(self, rw, reg, tx_data=None, timeout_s=1):
+        """Sends one register request and waits for the response
+
+        Returns:
+            ret (int): Function execution result code, refer to appendix for code meaning
+            utrc_rmsg (UtrcType): Response frame
+        """
+        return await self._wait(self._submit(rw, reg, tx_data, timeout_s))
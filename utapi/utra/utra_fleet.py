@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import asyncio
+import logging
+import threading
+
+from utapi.base.arm_report_config import ArmReportConfigParser
+from utapi.base.arm_report_status import ArmReportStatusParser
+from utapi.utra.utra_api_async import AsyncUtraApi
+
+
+class _ReportProtocol(asyncio.Protocol):
+    def __init__(self, parser):
+        self.parser = parser
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.parser.put(data)
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+
+class UtraFleetArm:
+    def __init__(self, fleet, name, api):
+        """Handle of one arm of a UtraFleet, it has the same methods as UtraApiTcp.
+        Calls are executed in the event loop of the fleet and block the calling thread until they finish.
+
+        The reports of the arm are in:
+            status (ArmReportStatusParser): 100Hz status report, None if it is not connected
+            config (ArmReportConfigParser): config report, None if it is not connected
+        """
+        self.fleet = fleet
+        self.name = name
+        self.api = api
+        self.status = None
+        self.config = None
+        self._reports = []
+
+    def __getattr__(self, name):
+        attr = getattr(self.api, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            ret = attr(*args, **kwargs)
+            if asyncio.iscoroutine(ret):
+                return self.fleet.run(ret)
+            return ret
+        return call
+
+    def get_joint_actual_pos(self):
+        """Get the actual joint positions from the 100Hz status report
+
+        Returns:
+            ret (int): Function execution result code, refer to appendix for code meaning
+            joint (list): The actual angular positions of all joints
+        """
+        ret = self._report_joint_actual_pos()
+        if ret is None:
+            return self.fleet.run(self.api.get_joint_actual_pos())
+        return ret
+
+    def get_tcp_actual_pos(self):
+        """Get the actual tcp pose from the 100Hz status report
+
+        Returns:
+            ret (int): Function execution result code, refer to appendix for code meaning
+            pose (list): The current measured tool pose
+        """
+        ret = self._report_tcp_actual_pos()
+        if ret is None:
+            return self.fleet.run(self.api.get_tcp_actual_pos())
+        return ret
+
+    def _report_joint_actual_pos(self):
+        """return: (0, joint) of the last status report, None if there is none"""
+        frame = None if self.status is None else self.status.snapshot()
+        if frame is None:
+            return None
+        return 0, frame["joint"]
+
+    def _report_tcp_actual_pos(self):
+        """return: (0, pose) of the last status report, None if there is none"""
+        frame = None if self.status is None else self.status.snapshot()
+        if frame is None:
+            return None
+        return 0, frame["pose"]
+
+
+class UtraFleet:
+    def __init__(self):
+        """Drives many UTRA arms from one event loop running in one thread.
+        The command connection and the report connections of every arm share this loop,
+        so the number of threads does not grow with the number of arms.
+
+            fleet = UtraFleet()
+            arm1 = fleet.add("192.168.1.10")
+            arm2 = fleet.add("192.168.1.11")
+            ret, mode = arm1.get_motion_mode()
+            joints = fleet.get_joint_actual_pos()
+        """
+        self.DB_FLG = "[UtraFleet] "
+        self.arms = {}
+        self.loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.__run_loop)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout_s=None):
+        """Runs a coroutine in the event loop of the fleet and waits for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout_s)
+
+    def add(self, ip, name=None, port=502, status_port=30002, config_port=30003):
+        """Connects to one arm
+
+        Args:
+            ip (string): IP address of UTRA robotic arm
+            name (string, optional): Key of the arm in the fleet. Defaults to ip.
+            port (int, optional): Command port. Defaults to 502.
+            status_port (int, optional): Status report port, None to not connect it. Defaults to 30002 (100Hz).
+            config_port (int, optional): Config report port, None to not connect it. Defaults to 30003.
+
+        Returns:
+            arm (UtraFleetArm): Check arm.is_err() for the result of the connection
+        """
+        if name is None:
+            name = ip
+        arm = self.run(self.__add(ip, name, port, status_port, config_port))
+        self.arms[name] = arm
+        return arm
+
+    async def __add(self, ip, name, port, status_port, config_port):
+        api = await AsyncUtraApi.connect(ip, port)
+        arm = UtraFleetArm(self, name, api)
+        if status_port is not None:
+            arm.status = ArmReportStatusParser()
+            await self.__open_report(arm, ip, status_port, arm.status)
+        if config_port is not None:
+            arm.config = ArmReportConfigParser()
+            await self.__open_report(arm, ip, config_port, arm.config)
+        return arm
+
+    async def __open_report(self, arm, ip, port, parser):
+        try:
+            transport, protocol = await self.loop.create_connection(lambda: _ReportProtocol(parser), ip, port)
+            arm._reports.append(protocol)
+        except OSError as err:
+            logging.error(self.DB_FLG + "Error: report connect, ip:%s, port:%d, %s" % (ip, port, err))
+
+    def remove(self, name):
+        """Disconnects one arm and removes it from the fleet"""
+        arm = self.arms.pop(name)
+        self.loop.call_soon_threadsafe(self.__close_arm, arm)
+
+    def __close_arm(self, arm):
+        arm.api.close()
+        for report in arm._reports:
+            report.close()
+
+    def close(self):
+        """Disconnects all arms and stops the event loop"""
+        for name in list(self.arms.keys()):
+            self.remove(name)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.__thread.join(1)
+
+    def call_all(self, method, *args, **kwargs):
+        """Calls the same method on all arms at the same time
+
+        Args:
+            method (string): Name of a method of UtraApiTcp, such as "get_joint_target_pos"
+
+        Returns:
+            results (dict): {name: result of the method}
+        """
+        return self.run(self.__gather(list(self.arms.keys()), method, args, kwargs))
+
+    async def __gather(self, names, method, args, kwargs):
+        coros = [getattr(self.arms[name].api, method)(*args, **kwargs) for name in names]
+        results = await asyncio.gather(*coros)
+        return dict(zip(names, results))
+
+    def get_joint_actual_pos(self):
+        """Get the actual joint positions of all arms
+
+        Returns:
+            results (dict): {name: (ret, joint)}
+        """
+        return self.__report_all("get_joint_actual_pos", "_report_joint_actual_pos")
+
+    def get_tcp_actual_pos(self):
+        """Get the actual tcp pose of all arms
+
+        Returns:
+            results (dict): {name: (ret, pose)}
+        """
+        return self.__report_all("get_tcp_actual_pos", "_report_tcp_actual_pos")
+
+    def __report_all(self, method, report):
+        # the values of the arms with a status report are taken from it, the other arms are asked in one gather
+        results = {}
+        missing = []
+        for name, arm in self.arms.items():
+            ret = getattr(arm, report)()
+            if ret is None:
+                missing.append(name)
+            else:
+                results[name] = ret
+        if missing:
+            results.update(self.run(self.__gather(missing, method, (), {})))
+        return dict([(name, results[name]) for name in self.arms.keys()])
@@ -9,12 +9,13 @@
 from utapi.base.arm_reg import RS485_LINE
 from utapi.base.servo_reg import SERVO_REG as REG
 from utapi.common import hex_data
+from utapi.common.utrc import UtrcReg
 
 
 class FLXIE_REG:
     null = 0
-    UNLOCK_FUN = [0x22, 0, 1, 1, 0]
-    SENSER1 = [0x60, 0, 16, null, null]
+    UNLOCK_FUN = UtrcReg(0x22, 0, 1, 1, 0)
+    SENSER1 = UtrcReg(0x60, 0, 16, null, null)
 
 
 class UtraFlxiE2Api():
@@ -9,12 +9,13 @@
 from utapi.base.arm_reg import RS485_LINE
 from utapi.base.servo_reg import SERVO_REG as REG
 from utapi.common import hex_data
+from utapi.common.utrc import UtrcReg
 
 
 class FLXIV_REG:
     null = 0
     # cmd的reg  读reg发送cmd的长度  读reg接收data的长度  写reg发送cmd的长度  写reg接收data的长度
-    SENSER1 = [0x60, 0, 16, null, null]
+    SENSER1 = UtrcReg(0x60, 0, 16, null, null)
 
 
 class UtraFlxiVApi():
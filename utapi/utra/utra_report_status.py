@@ -32,12 +32,15 @@ class UtraReportStatus10Hz(ArmReportStatus):
 
 
 class UtraReportStatus100Hz(ArmReportStatus):
-    def __init__(self, ip, irq_fun=0):
+    def __init__(self, ip, irq_fun=0, buffer_size=0):
         """This class will create a new thread to connect to ubot and receive the status of ubot at a frequency of 100HZ
         The status is as follows:
             see the UtraReportStatus10HZ
 
         Args:
             ip (String): IP address of UTRA robotic arm
+            irq_fun (optional): Object whose irq_run(status) is called for every frame. Defaults to 0.
+            buffer_size (int, optional): Number of frames kept in self.buffer (ArmReportStatusBuffer, requires numpy),
+                                         0 does not keep them. Defaults to 0.
         """
-        ArmReportStatus.__init__(self, ip, 30002, irq_fun)
+        ArmReportStatus.__init__(self, ip, 30002, irq_fun, buffer_size)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+#
+# Copyright (C) 2020 UmbraTek Inc. All Rights Reserved.
+#
+# Software License Agreement (BSD License)
+#
+# Author: Jimy Zhang <jimy.zhang@umbratek.com> <jimy92@163.com>
+# =============================================================================
+import itertools
+import logging
+import numbers
+
+from utapi.common.utrc import UTRC_RX_ERROR
+
+
+class ServoTrajectoryStreamer:
+    def __init__(self, ubot, report, depth=16, frames_per_packet=3, timeout_s=1):
+        """Streams a long joint-servo trajectory and keeps the instruction cache of the controller at a fixed depth.
+        The fill level is the cmd_num of the 100Hz status report, so no get_cmd_num() request is needed.
+
+            ubot = UtraApiTcp(ip)
+            report = UtraReportStatus100Hz(ip)
+            streamer = ServoTrajectoryStreamer(ubot, report, depth=16)
+            ret = streamer.stream(joints, 0.01)
+
+        Args:
+            ubot (UtraApiTcp): Command connection of the arm
+            report (UtraReportStatus100Hz): Status report of the same arm
+            depth (int, optional): Number of cached instructions (frames) to keep in the controller (at most 1024).
+                Defaults to 16.
+            frames_per_packet (int, optional): Frames sent with one moveto_joint_servo (1 to 3). Defaults to 3.
+            timeout_s (float, optional): Maximum time without a status report. Defaults to 1.
+        """
+        self.DB_FLG = "[ServoStr] "
+        self.ubot = ubot
+        self.report = report
+        self.depth = depth
+        self.frames_per_packet = max(1, min(3, frames_per_packet))
+        self.timeout_s = timeout_s
+        self.sent_frames = 0
+        self.sent_packets = 0
+        self.__stop = False
+
+    def stop(self):
+        """Makes stream() return after the packet that is being sent, the frames already cached still run"""
+        self.__stop = True
+
+    def stream(self, joints, times):
+        """Sends all frames, blocks until the last one is in the instruction cache of the controller
+
+        Args:
+            joints (iterable): Joint positions [rad] of every frame, a list of lists, a generator or an (N, axis) numpy array
+            times (float or iterable): Time to move to each frame [s], one value for all frames or one per frame
+
+        Returns:
+            ret (int): Function execution result code, refer to appendix for code meaning
+        """
+        if isinstance(times, numbers.Real):
+            times = itertools.repeat(times)
+        frames = zip(joints, times)
+        sub = self.report.subscribe()
+        self.__stop = False
+        try:
+            return self.__stream(frames, sub)
+        finally:
+            sub.close()
+
+    def __stream(self, frames, sub):
+        while not self.__stop:
+            # refill on each report frame, packets sent in the last report period may not be counted in its
+            # cmd_num yet, so the cache can exceed depth by the frames of one period
+            if not sub.wait_next(self.timeout_s):
+                logging.error(self.DB_FLG + "Error: no status report for %.3fs" % self.timeout_s)
+                return UTRC_RX_ERROR.TIMEOUT
+
+            free = self.depth - self.report.cmd_num
+            while free > 0 and not self.__stop:
+                batch = list(itertools.islice(frames, min(self.frames_per_packet, free)))
+                if len(batch) == 0:
+                    return 0
+                ret = self.ubot.moveto_joint_servo(len(batch), [f[0] for f in batch], [f[1] for f in batch])
+                if ret != 0 and ret != UTRC_RX_ERROR.STATE:
+                    logging.error(self.DB_FLG + "Error: moveto_joint_servo, ret: %d" % ret)
+                    return ret
+                self.sent_frames += len(batch)
+                self.sent_packets += 1
+                free -= len(batch)
+        return 0